@@ -13,6 +13,41 @@ app.secret_key = 'reagent_db_secret_key'  # For flash messages
 DB_PATH = get_db_path()
 print(f"Database path initialized to: {DB_PATH}")
 
+# Whether new ORF sequences are written in the packed 2-bit format
+PACK_SEQUENCES = load_config().get('pack_sequences', False)
+
+# Seconds between change_log compactions
+CHANGE_LOG_COMPACT_INTERVAL = load_config().get('change_log_compact_interval', 3600)
+
+# Group commit settings for the single database writer (see app/db_writer.py)
+WRITE_GROUP_COMMIT_MS = load_config().get('write_group_commit_ms', 2)
+WRITE_GROUP_MAX_SIZE = load_config().get('write_group_max_size', 100)
+
+# Seconds between rebuilds of dirty ORF documents (see app/orf_documents.py)
+ORF_DOCUMENT_REFRESH_INTERVAL = load_config().get('orf_document_refresh_interval', 5)
+
+# Lookup tables shared between worker processes (see app/shared_lookups.py)
+SHARED_LOOKUPS = load_config().get('shared_lookups', False)
+SHARED_LOOKUP_REFRESH_INTERVAL = load_config().get('shared_lookup_refresh_interval', 5)
+
+# Cache-Control headers of the catalog API endpoints (see app/http_cache.py)
+API_CACHE_CONTROL = load_config().get('api_cache_control', {'default': 'no-cache'})
+
+# Rows read and written at a time by CSV and Excel imports (see app/unified_import.py)
+IMPORT_CHUNK_SIZE = load_config().get('import_chunk_size', 10000)
+
+# Background import jobs run at the same time (see app/import_jobs.py)
+IMPORT_WORKERS = load_config().get('import_workers', 2)
+
+# Worker processes reading the sheets of a multi-sheet Excel import (see xlsx_reader.py)
+IMPORT_SHEET_WORKERS = load_config().get('import_sheet_workers', 2)
+
+# Named groups taking the ORF fields from FASTA header lines (see fasta_reader.py)
+FASTA_HEADER_PATTERN = load_config().get('fasta_header_pattern', r'(?P<orf_id>\S+)\s*(?P<orf_annotation>.*)')
+
+# WAL journal mode, set by the database writer (see app/db_writer.py)
+WAL_MODE = load_config().get('wal_mode', True) and not load_config().get('use_onedrive', False)
+
 # Get app base directory
 current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -44,3 +79,17 @@ if not os.path.exists(EXPORTS_FOLDER):
 
 # Import routes after app is created to avoid circular imports
 from app.routes import *
+
+# Periodically collapse the change feed to the latest entry per row
+from app.change_log import start_change_log_compactor
+start_change_log_compactor(CHANGE_LOG_COMPACT_INTERVAL)
+
+# Rebuild the materialized ORF documents as their data changes
+from app.orf_documents import start_orf_document_refresher
+start_orf_document_refresher(ORF_DOCUMENT_REFRESH_INTERVAL)
+
+# Map the lookup tables shared between worker processes, publishing them if
+# this is the first process
+if SHARED_LOOKUPS:
+    from app.shared_lookups import start_shared_lookups
+    start_shared_lookups(DB_PATH, SHARED_LOOKUP_REFRESH_INTERVAL)
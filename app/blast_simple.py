@@ -16,6 +16,8 @@ from functools import wraps
 import sys
 
 from app import app, DB_PATH
+from app.change_log import current_change_seq, has_changes_since
+from sequence_codec import sequence_text, unpack_orf_sequence
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -27,6 +29,12 @@ BLAST_DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__f
 # Make sure the directory exists
 os.makedirs(BLAST_DB_PATH, exist_ok=True)
 
+# Change log sequence number the BLAST database was last built at
+BLAST_DB_SEQ_FILE = os.path.join(BLAST_DB_PATH, 'reagent_db_nucl.seq')
+
+# Tables whose changes require the BLAST database to be rebuilt
+BLAST_SOURCE_TABLES = ['orf_sequence', 'orf_metadata', 'orf_sequence_blob']
+
 # Timeout for BLAST commands (seconds)
 BLAST_TIMEOUT = 120
 
@@ -127,6 +135,24 @@ def check_blast_db_status():
         logger.error(f"Error checking BLAST database status: {str(e)}")
         return False
 
+def read_blast_db_seq():
+    """Get the change log sequence number of the last BLAST database build, if known"""
+    try:
+        with open(BLAST_DB_SEQ_FILE) as f:
+            return int(f.read().strip())
+    except (OSError, ValueError):
+        return None
+
+def write_blast_db_seq(seq):
+    """Record the change log sequence number the BLAST database was built at"""
+    if seq is None:
+        return
+    try:
+        with open(BLAST_DB_SEQ_FILE, 'w') as f:
+            f.write(str(seq))
+    except OSError as e:
+        logger.warning(f"Could not record BLAST database build sequence: {str(e)}")
+
 @timeout_handler
 def ensure_blast_db_exists():
     """
@@ -149,13 +175,39 @@ def ensure_blast_db_exists():
         conn = sqlite3.connect(DB_PATH)
         cursor = conn.cursor()
         
-        cursor.execute('''
-            SELECT orf_id, orf_name, orf_sequence 
-            FROM orf_sequence 
-            WHERE orf_sequence IS NOT NULL AND orf_sequence != ''
-        ''')
+        # Skip the rebuild if no ORF has changed since the last build
+        build_seq = current_change_seq(conn)
+        built_seq = read_blast_db_seq()
+        if build_seq is not None and built_seq is not None and check_blast_db_status() \
+                and not has_changes_since(conn, built_seq, BLAST_SOURCE_TABLES):
+            conn.close()
+            logger.info("BLAST database is up to date, skipping rebuild")
+            return {
+                'success': True,
+                'message': 'BLAST database is already up to date'
+            }
+        
+        # Include packed sequences if the database has been migrated
+        cursor.execute("PRAGMA table_info(orf_sequence)")
+        has_packed_sequences = 'orf_sequence_packed' in [column[1] for column in cursor.fetchall()]
         
-        sequences = cursor.fetchall()
+        if has_packed_sequences:
+            cursor.execute('''
+                SELECT orf_id, orf_name, orf_sequence, orf_sequence_packed
+                FROM orf_sequence 
+                WHERE (orf_sequence IS NOT NULL AND orf_sequence != '') OR orf_sequence_packed IS NOT NULL
+            ''')
+        else:
+            cursor.execute('''
+                SELECT orf_id, orf_name, orf_sequence, NULL
+                FROM orf_sequence 
+                WHERE orf_sequence IS NOT NULL AND orf_sequence != ''
+            ''')
+        
+        sequences = [
+            (seq_id, seq_name, sequence_text(sequence, packed))
+            for seq_id, seq_name, sequence, packed in cursor.fetchall()
+        ]
         conn.close()
         
         if not sequences:
@@ -215,6 +267,7 @@ def ensure_blast_db_exists():
             }
         
         logger.info("Successfully created nucleotide BLAST database")
+        write_blast_db_seq(build_seq)
         return {
             'success': True,
             'message': 'BLAST database created successfully'
@@ -520,7 +573,7 @@ def get_sequence_by_id(orf_id):
         conn.close()
         
         if result:
-            return dict(result)
+            return unpack_orf_sequence(dict(result))
         else:
             return None
     except Exception as e:
@@ -0,0 +1,199 @@
+"""
+Paginated and streaming catalog listings for the Reagent Database API.
+
+/api/organisms, /api/plasmids, /api/freezers and /api/orfs return their whole
+table in one response by default. For large catalogs they can instead be read
+page by page with keyset pagination (each page continues after the last key
+of the previous one, so deep pages cost the same as the first), or streamed as
+NDJSON. A stream reads the table in keyset batches on a fresh connection each,
+fetching rows from the cursor with fetchmany and closing the connection before
+the batch is sent, so neither server memory nor the time a connection is held
+grows with the size of the table or the speed of the client.
+
+Both modes accept updated_since to list only rows changed after a change_log
+sequence number or timestamp (see app/change_log.py).
+"""
+
+import json
+import sqlite3
+
+from flask import request, jsonify, Response
+
+from app import DB_PATH
+from app.utils import orf_metadata_table
+from app.change_log import change_log_exists, current_change_seq
+
+# Catalog listings: name -> (table, or None for the ORF metadata table,
+# key column, selected columns, change_log tables the rows come from)
+LISTINGS = {
+    'organisms': ('organisms', 'organism_id', '*', ['organisms']),
+    'plasmids': ('plasmid', 'plasmid_id', '*', ['plasmid']),
+    'freezers': ('freezer', 'freezer_id', '*', ['freezer']),
+    'orfs': (None, 'orf_id', 'orf_id, orf_name, orf_annotation', ['orf_metadata', 'orf_sequence']),
+}
+
+# Default and maximum page size
+DEFAULT_PAGE_SIZE = 1000
+MAX_PAGE_SIZE = 10000
+
+# Rows read per keyset batch when streaming; each batch uses its own connection
+STREAM_BATCH_SIZE = 5000
+
+# Rows taken from the cursor at a time
+FETCH_SIZE = 500
+
+class ListingError(ValueError):
+    """Invalid listing parameters"""
+
+def listing_requested():
+    """Check whether the request asks for a page or a stream rather than the full list"""
+    return any(name in request.args for name in ('limit', 'after', 'updated_since', 'format'))
+
+def _changed_since_filter(conn, key_column, tables, updated_since):
+    """WHERE clause and parameters restricting a listing to rows changed after updated_since"""
+    if not change_log_exists(conn):
+        raise ListingError('updated_since needs the change log. Run: python run_migration.py add_change_log')
+
+    if updated_since.isdigit():
+        condition, value = 'seq > ?', int(updated_since)
+    else:
+        # change_log timestamps are UTC 'YYYY-MM-DD HH:MM:SS'
+        value = updated_since.replace('T', ' ').rstrip('Z')
+        condition = 'changed_at > ?'
+    clause = f'''{key_column} IN (
+        SELECT row_key FROM change_log
+        WHERE table_name IN ({','.join(['?'] * len(tables))}) AND {condition}
+    )'''
+    return clause, tables + [value]
+
+def _listing_query(conn, name, updated_since, after, limit):
+    table_name, key_column, columns, tables = LISTINGS[name]
+    if table_name is None:
+        table_name = orf_metadata_table(conn)
+
+    conditions, params = [], []
+    if updated_since:
+        clause, clause_params = _changed_since_filter(conn, key_column, tables, updated_since)
+        conditions.append(clause)
+        params.extend(clause_params)
+    if after is not None:
+        conditions.append(f'{key_column} > ?')
+        params.append(after)
+
+    query = f'SELECT {columns} FROM {table_name}'
+    if conditions:
+        query += ' WHERE ' + ' AND '.join(conditions)
+    query += f' ORDER BY {key_column} LIMIT ?'
+    params.append(limit)
+    return query, params, key_column
+
+def _page_size():
+    try:
+        limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise ListingError('limit must be an integer')
+    if limit < 1:
+        raise ListingError('limit must be positive')
+    return min(limit, MAX_PAGE_SIZE)
+
+def _fetch_rows(c):
+    """Iterate the rows of the last query as dicts, FETCH_SIZE at a time"""
+    columns = [column[0] for column in c.description]
+    while True:
+        rows = c.fetchmany(FETCH_SIZE)
+        if not rows:
+            return
+        for row in rows:
+            yield dict(zip(columns, row))
+
+def list_page(name):
+    """
+    Return one page of a catalog listing.
+
+    Query parameters:
+        limit: Page size (default 1000, max 10000)
+        after: Key of the last row of the previous page
+        updated_since: change_log sequence number or UTC timestamp
+    """
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        limit = _page_size()
+        # Read one row more than the page to know whether another page follows
+        query, params, key_column = _listing_query(
+            conn, name, request.args.get('updated_since'), request.args.get('after'), limit + 1
+        )
+        current_seq = current_change_seq(conn)
+        c = conn.cursor()
+        c.execute(query, params)
+        rows = list(_fetch_rows(c))
+    except ListingError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    finally:
+        conn.close()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return jsonify({
+        name: rows,
+        'next_after': rows[-1][key_column] if has_more else None,
+        'has_more': has_more,
+        'current_seq': current_seq
+    })
+
+def stream_listing(name):
+    """
+    Stream a catalog listing as NDJSON, one row per line.
+
+    Query parameters:
+        after: Start after this key
+        updated_since: change_log sequence number or UTC timestamp
+
+    The X-Change-Seq header holds the change_log sequence number read before
+    the first batch; passing it as updated_since on the next sync picks up
+    everything that changed since. Rows are read in keyset batches on separate
+    connections, so the stream is not one snapshot: rows changed during it
+    may or may not appear, and will be listed again by that next sync.
+    """
+    updated_since = request.args.get('updated_since')
+    after = request.args.get('after')
+
+    # Validate the parameters before the response starts
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        _listing_query(conn, name, updated_since, after, STREAM_BATCH_SIZE)
+        current_seq = current_change_seq(conn)
+    except ListingError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    finally:
+        conn.close()
+
+    def generate():
+        last_key = after
+        while True:
+            # Read the batch and close the connection before sending it, so a
+            # slow client never keeps a connection open
+            conn = sqlite3.connect(DB_PATH)
+            try:
+                query, params, key_column = _listing_query(conn, name, updated_since, last_key, STREAM_BATCH_SIZE)
+                c = conn.cursor()
+                c.execute(query, params)
+                batch = list(_fetch_rows(c))
+            finally:
+                conn.close()
+
+            for row in batch:
+                yield json.dumps(row) + '\n'
+            if len(batch) < STREAM_BATCH_SIZE:
+                return
+            last_key = batch[-1][key_column]
+
+    response = Response(generate(), mimetype='application/x-ndjson')
+    if current_seq is not None:
+        response.headers['X-Change-Seq'] = str(current_seq)
+    return response
+
+def catalog_listing(name):
+    """Page or stream a catalog listing, depending on the format parameter"""
+    if request.args.get('format') == 'ndjson':
+        return stream_listing(name)
+    return list_page(name)
@@ -0,0 +1,109 @@
+"""
+Change feed for the Reagent Database application.
+
+Triggers created by setup_db.create_change_log record every insert, update
+and delete on the core tables in change_log with a monotonically increasing
+sequence number. Consumers remember the last sequence number they processed
+and ask for everything after it instead of rescanning whole tables.
+"""
+
+import threading
+import time
+import logging
+
+from app.db_writer import run_write
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+def change_log_exists(conn):
+    """Check whether the change_log table has been created"""
+    c = conn.cursor()
+    c.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='change_log'")
+    return c.fetchone() is not None
+
+def current_change_seq(conn):
+    """
+    Get the sequence number of the most recent change.
+
+    Returns:
+        int: Latest sequence number, 0 if nothing has been logged, or None if
+        the database has no change_log table
+    """
+    if not change_log_exists(conn):
+        return None
+    c = conn.cursor()
+    # sqlite_sequence keeps the high-water mark even after compaction
+    c.execute("SELECT seq FROM sqlite_sequence WHERE name = 'change_log'")
+    row = c.fetchone()
+    return row[0] if row else 0
+
+def get_changes(conn, since=0, limit=1000, tables=None):
+    """
+    Fetch changes recorded after a sequence number.
+
+    Args:
+        conn: sqlite3 connection
+        since (int): Return changes with a sequence number greater than this
+        limit (int): Maximum number of changes to return
+        tables (list): Optional list of table names to filter on
+
+    Returns:
+        list: Changes as dicts with seq, table_name, row_key, operation and changed_at
+    """
+    query = 'SELECT seq, table_name, row_key, operation, changed_at FROM change_log WHERE seq > ?'
+    params = [since]
+    if tables:
+        query += f" AND table_name IN ({','.join(['?'] * len(tables))})"
+        params.extend(tables)
+    query += ' ORDER BY seq LIMIT ?'
+    params.append(limit)
+
+    c = conn.cursor()
+    c.execute(query, params)
+    columns = [column[0] for column in c.description]
+    return [dict(zip(columns, row)) for row in c.fetchall()]
+
+def has_changes_since(conn, since, tables=None):
+    """Check whether any of the given tables changed after a sequence number"""
+    return bool(get_changes(conn, since, limit=1, tables=tables))
+
+def compact_change_log(conn):
+    """
+    Keep only the latest entry for each changed row.
+
+    Consumers only need to know that a row changed after their last sequence
+    number and what its final state is, so older entries for the same row are
+    redundant. The caller commits. Returns the number of entries removed.
+    """
+    c = conn.cursor()
+    c.execute('''
+        DELETE FROM change_log
+        WHERE seq NOT IN (
+            SELECT MAX(seq) FROM change_log GROUP BY table_name, row_key
+        )
+    ''')
+    return c.rowcount
+
+_compactor_started = False
+
+def start_change_log_compactor(interval):
+    """Compact the change log every `interval` seconds on a daemon thread"""
+    global _compactor_started
+    if _compactor_started or not interval:
+        return
+    _compactor_started = True
+
+    def run():
+        while True:
+            time.sleep(interval)
+            try:
+                removed = run_write(lambda conn: compact_change_log(conn) if change_log_exists(conn) else 0)
+                if removed:
+                    logger.info(f"Compacted change log, removed {removed} entries")
+            except Exception as e:
+                logger.error(f"Error compacting change log: {str(e)}")
+
+    thread = threading.Thread(target=run, name='change-log-compactor')
+    thread.daemon = True
+    thread.start()
@@ -0,0 +1,187 @@
+"""
+Single database writer for the Reagent Database application.
+
+SQLite allows one writer at a time, so concurrent form submissions and imports
+on their own connections end up waiting on each other's locks or failing with
+"database is locked". Instead, every write in the application is submitted to
+one writer thread that owns the only write connection. A write waits up to
+the group commit latency budget (write_group_commit_ms) for others to arrive
+and is committed together with them (group commit), which cuts the number of
+fsyncs under load at the cost of at most that much latency.
+
+With wal_mode the writer switches the database to WAL journaling, so readers
+keep reading the last committed state while a write is in progress. Without
+it, a long write such as an import blocks readers once its changes no longer
+fit in the page cache.
+
+A write is a function taking the writer's sqlite3 connection. It must not
+commit or roll back itself: each write runs inside its own savepoint, so a
+write that raises is undone without affecting the others in its group.
+
+    from app.db_writer import run_write
+
+    def add_freezer(conn):
+        conn.execute('INSERT INTO freezer (freezer_id) VALUES (?)', ('F1',))
+
+    run_write(add_freezer)
+"""
+
+import queue
+import sqlite3
+import threading
+import time
+import logging
+from concurrent.futures import Future
+
+from app import DB_PATH, WRITE_GROUP_COMMIT_MS, WRITE_GROUP_MAX_SIZE, WAL_MODE
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+class DatabaseWriter:
+    """Queue of writes consumed by one thread holding the only write connection"""
+
+    def __init__(self, db_path, group_commit_ms=2, max_group_size=100, wal_mode=False):
+        """
+        Args:
+            db_path (str): Path to the SQLite database
+            group_commit_ms (int): Latency budget in milliseconds: the longest
+                the first write of a group waits for further writes to add to
+                its commit (0 commits every write on its own)
+            max_group_size (int): Maximum number of writes per commit
+            wal_mode (bool): Switch the database to WAL journaling
+        """
+        self.db_path = db_path
+        self.wal_mode = wal_mode
+        self.group_commit_seconds = group_commit_ms / 1000.0
+        self.max_group_size = max(1, max_group_size)
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='database-writer')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def submit(self, func):
+        """
+        Queue a write.
+
+        Args:
+            func: Function taking the write connection; its return value
+                becomes the result of the future
+
+        Returns:
+            Future: Resolves once the write is committed, or raises the
+            exception that made it fail
+        """
+        future = Future()
+        self._queue.put((func, future))
+        return future
+
+    def _run(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        if self.wal_mode:
+            try:
+                # Persistent: readers' own connections use WAL from here on
+                mode = conn.execute('PRAGMA journal_mode=WAL').fetchone()[0]
+                if mode != 'wal':
+                    logger.warning(f"Database stayed in {mode} journal mode")
+            except sqlite3.Error as e:
+                logger.warning(f"Could not enable WAL mode: {str(e)}")
+        while True:
+            func, future = self._queue.get()
+            try:
+                self._run_group(conn, func, future)
+            except Exception as e:
+                logger.exception(f"Database writer error: {str(e)}")
+                if conn.in_transaction:
+                    conn.execute('ROLLBACK')
+
+    def _run_group(self, conn, func, future):
+        """Run a write and the writes queued behind it in one transaction"""
+        deadline = time.monotonic() + self.group_commit_seconds
+        completed = []
+
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+        except Exception as e:
+            future.set_exception(e)
+            return
+
+        while True:
+            if future.set_running_or_notify_cancel():
+                try:
+                    conn.execute('SAVEPOINT write')
+                    result = func(conn)
+                    conn.execute('RELEASE write')
+                    completed.append((future, result))
+                except Exception as e:
+                    future.set_exception(e)
+                    if not self._rollback_write(conn):
+                        # Some errors abort the whole transaction, taking the
+                        # earlier writes of the group with them
+                        for waiting, _ in completed:
+                            waiting.set_exception(e)
+                        return
+
+            # Keep taking writes, waiting for them to arrive, until the group
+            # is full or the first write has waited out the latency budget
+            remaining = deadline - time.monotonic()
+            if len(completed) >= self.max_group_size or remaining <= 0:
+                break
+            try:
+                func, future = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+
+        try:
+            conn.execute('COMMIT')
+        except Exception as e:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            for waiting, _ in completed:
+                waiting.set_exception(e)
+            return
+
+        # Before any caller wakes up, so their next read sees the write
+        for listener in _commit_listeners:
+            try:
+                listener()
+            except Exception as e:
+                logger.exception(f"Commit listener error: {str(e)}")
+
+        for waiting, result in completed:
+            waiting.set_result(result)
+
+    def _rollback_write(self, conn):
+        """Undo a failed write, returning False if the transaction itself was lost"""
+        try:
+            conn.execute('ROLLBACK TO write')
+            conn.execute('RELEASE write')
+            return True
+        except sqlite3.Error:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            return False
+
+_writer = None
+_writer_lock = threading.Lock()
+_commit_listeners = []
+
+def add_commit_listener(listener):
+    """Call `listener()` on the writer thread after every committed group of writes"""
+    _commit_listeners.append(listener)
+
+def get_writer():
+    """Get the application's database writer, starting it on first use"""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = DatabaseWriter(DB_PATH, WRITE_GROUP_COMMIT_MS, WRITE_GROUP_MAX_SIZE, WAL_MODE)
+        return _writer
+
+def submit_write(func):
+    """Queue a write on the application's writer and return its future"""
+    return get_writer().submit(func)
+
+def run_write(func, timeout=None):
+    """Run a write on the application's writer and wait for it to be committed"""
+    return submit_write(func).result(timeout)
@@ -0,0 +1,152 @@
+"""
+In-process cache of the small dimension tables for the Reagent Database application.
+
+Organisms, freezers, plasmids and source names change rarely but are read on
+every page load and for every search result. This cache keeps query results
+over them in memory, each stamped with a version: the change_log sequence
+number it was read at and the number of commits made by this process's
+database writer. A cached result is reused while neither has moved, or while
+change_log shows no change to its tables since it was read. Databases without
+change_log only see writes made through this process's writer.
+
+Connections inside a transaction (such as the writer's) bypass the cache, so
+uncommitted rows are never cached.
+"""
+
+import threading
+
+from app.change_log import current_change_seq, has_changes_since
+from app.db_writer import add_commit_listener
+from app.shared_lookups import get_lookup_table
+
+# Dimension tables: name -> (table, key column, columns copied onto referencing rows)
+DIMENSIONS = {
+    'organisms': ('organisms', 'organism_id',
+                  ['organism_name', 'organism_genus', 'organism_species', 'organism_strain']),
+    'freezers': ('freezer', 'freezer_id', ['freezer_location', 'freezer_condition']),
+    'plasmids': ('plasmid', 'plasmid_id', ['plasmid_name', 'plasmid_type']),
+}
+
+class DimensionCache:
+    """Versioned query results over tables that rarely change"""
+
+    def __init__(self):
+        self._entries = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        """Note that this process committed a write"""
+        with self._lock:
+            self._generation += 1
+
+    def version(self, key):
+        """(change_log sequence, writer generation) a cached result was read at, or None"""
+        entry = self._entries.get(key)
+        return entry[0] if entry else None
+
+    def rows(self, conn, key, sql, tables):
+        """
+        Get the result of a query over dimension tables.
+
+        Args:
+            conn: sqlite3 connection
+            key (str): Name of the cached result
+            sql (str): Query producing it
+            tables (list): Tables the query reads
+
+        Returns:
+            list: Rows as dicts; treat them as read-only
+        """
+        if conn.in_transaction:
+            return _query(conn, sql)
+
+        # Read the version first: a write landing after it only makes the
+        # result look older than it is
+        version = (current_change_seq(conn), self._generation)
+        entry = self._entries.get(key)
+        if entry:
+            (cached_seq, cached_generation), cached_rows = entry
+            if (cached_seq, cached_generation) == version:
+                return cached_rows
+            if (cached_seq is not None and cached_generation == version[1]
+                    and not has_changes_since(conn, cached_seq, tables)):
+                self._entries[key] = (version, cached_rows)
+                return cached_rows
+
+        rows = _query(conn, sql)
+        self._entries[key] = (version, rows)
+        return rows
+
+def _query(conn, sql, params=()):
+    c = conn.cursor()
+    c.execute(sql, params)
+    columns = [column[0] for column in c.description]
+    return [dict(zip(columns, row)) for row in c.fetchall()]
+
+_cache = DimensionCache()
+add_commit_listener(_cache.invalidate)
+
+def cached_rows(conn, key, sql, tables):
+    """Get the result of a query over dimension tables from the process-wide cache"""
+    return _cache.rows(conn, key, sql, tables)
+
+_indexes = {}
+
+def dimension(conn, name):
+    """
+    Get a dimension table as a mapping of rows by ID.
+
+    Worker processes read the published copy when shared lookups are enabled
+    and it is current (see app/shared_lookups.py), instead of each caching
+    the table.
+
+    Args:
+        conn: sqlite3 connection
+        name (str): 'organisms', 'freezers' or 'plasmids'
+    """
+    shared = get_lookup_table(name, conn)
+    if shared is not None:
+        return shared
+    table_name, key_column, _ = DIMENSIONS[name]
+    rows = cached_rows(conn, table_name, f'SELECT * FROM {table_name}', [table_name])
+    # Index each cached version of the rows once
+    indexed = _indexes.get(name)
+    if indexed is None or indexed[0] is not rows:
+        indexed = (rows, {row[key_column]: row for row in rows})
+        _indexes[name] = indexed
+    return indexed[1]
+
+def add_dimension_fields(conn, rows, name, foreign_key):
+    """
+    Copy dimension attributes onto rows that reference the dimension, in place
+    of a LEFT JOIN: organism fields onto ORFs, freezer and plasmid fields onto
+    positions. Rows whose reference is missing get NULL fields.
+
+    Args:
+        conn: sqlite3 connection
+        rows (list): Row dicts to complete
+        name (str): Dimension, see DIMENSIONS
+        foreign_key (str): Column of the rows holding the dimension's ID
+
+    Returns:
+        list: The same rows, for chaining
+    """
+    if not rows:
+        return rows
+    table_name, key_column, fields = DIMENSIONS[name]
+    if conn.in_transaction:
+        # Inside a write, only read the rows that are referenced
+        ids = list({row.get(foreign_key) for row in rows if row.get(foreign_key) is not None})
+        lookup = {}
+        if ids:
+            lookup = {row[key_column]: row for row in _query(
+                conn, f"SELECT * FROM {table_name} WHERE {key_column} IN ({','.join(['?'] * len(ids))})", ids
+            )}
+    else:
+        lookup = dimension(conn, name)
+    for row in rows:
+        dimension_row = lookup.get(row.get(foreign_key), {})
+        for field in fields:
+            row[field] = dimension_row.get(field)
+    return rows
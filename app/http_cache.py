@@ -0,0 +1,93 @@
+"""
+Conditional GET support for the Reagent Database API.
+
+Catalog endpoints are polled repeatedly by pages and scripts, and their
+responses only change when the database does. Each response carries a strong
+ETag derived from the database version; a request whose If-None-Match matches
+the current version gets 304 Not Modified without the endpoint's queries
+running at all.
+
+The database version is the change_log sequence number (see
+app/change_log.py) together with the schema version. Databases without
+change_log fall back to the modification time and size of the database file
+and its write-ahead log.
+"""
+
+import os
+import hashlib
+import sqlite3
+from functools import wraps
+
+from flask import request, make_response
+
+from app import app, DB_PATH, API_CACHE_CONTROL
+from app.change_log import current_change_seq
+
+def database_version():
+    """
+    Get a value that changes whenever committed data in the database changes.
+
+    Returns:
+        tuple: Version to derive ETags from, or None if it cannot be determined
+    """
+    try:
+        conn = sqlite3.connect(DB_PATH)
+        try:
+            seq = current_change_seq(conn)
+            schema_version = conn.execute('PRAGMA schema_version').fetchone()[0]
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return None
+
+    if seq is not None:
+        return ('change_log', seq, schema_version)
+
+    # Every commit rewrites the database file or appends to its WAL
+    version = ['file']
+    for path in (DB_PATH, DB_PATH + '-wal'):
+        try:
+            stat = os.stat(path)
+            version.extend([stat.st_mtime_ns, stat.st_size])
+        except OSError:
+            version.extend([None, None])
+    return tuple(version)
+
+def cache_control(name):
+    """Cache-Control header for an endpoint, from api_cache_control in app_config.json"""
+    return API_CACHE_CONTROL.get(name, API_CACHE_CONTROL.get('default', 'no-cache'))
+
+def conditional_get(name):
+    """
+    Decorate a GET endpoint with ETag / If-None-Match handling.
+
+    The ETag covers the database version, the endpoint and its query string.
+    The version is read before the endpoint runs, so a write landing while
+    the response is built only makes the tag older than the body.
+
+    Args:
+        name (str): Endpoint name used in the ETag and for its Cache-Control setting
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            version = database_version()
+            etag = None
+            if version is not None:
+                tag_source = repr((name, version, request.query_string)).encode('utf-8')
+                etag = hashlib.sha1(tag_source).hexdigest()[:20]
+
+                if request.if_none_match.contains(etag):
+                    response = app.response_class(status=304)
+                    response.set_etag(etag)
+                    response.headers['Cache-Control'] = cache_control(name)
+                    return response
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                if etag:
+                    response.set_etag(etag)
+                response.headers['Cache-Control'] = cache_control(name)
+            return response
+        return wrapper
+    return decorator
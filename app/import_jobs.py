@@ -0,0 +1,201 @@
+"""
+Background import jobs for the Reagent Database application.
+
+An uploaded file is imported by a job on a small worker pool instead of
+inside the upload request, so large files no longer run into request
+timeouts. The job reports its progress (rows parsed, rows written, errors so
+far) while it runs, and can be cancelled. A checkpointed import keeps the
+chunks it committed before the cancellation and can be resumed (see
+app/import_runs.py); an all-or-nothing import is one write on the database
+writer, so cancelling it rolls back everything it wrote.
+
+Jobs are kept in memory by this process and dropped an hour after they finish.
+"""
+
+import os
+import heapq
+import time
+import uuid
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from app import IMPORT_WORKERS
+from app.unified_import import error_messages, error_order
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Seconds a finished job is kept for status requests
+JOB_RETENTION_SECONDS = 3600
+
+# Error messages kept on a job; the count covers all of them
+MAX_JOB_ERRORS = 20
+
+class ImportCancelled(Exception):
+    """Raised inside an import whose job has been cancelled"""
+
+class ImportJob:
+    """One import of an uploaded file, run in the background"""
+
+    def __init__(self, import_type, filename, upload=None):
+        self.id = uuid.uuid4().hex
+        self.import_type = import_type
+        self.filename = filename
+        self.status = 'queued'
+        self.rows_parsed = 0
+        self.rows_written = 0
+        self.records = {}
+        self.error_count = 0
+        self.errors = []
+        self.success = None
+        self.message = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._cancel_requested = threading.Event()
+        self._import_cancelled = False
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+        # File being uploaded that the import reads as it arrives (see app/upload_stream.py)
+        self._upload = upload
+
+    def progress(self, rows_parsed, rows_written, stats, errors):
+        """Progress callback passed to the import; stops it if the job was cancelled"""
+        self.rows_parsed = rows_parsed
+        self.rows_written = rows_written
+        self.records = {key: value for key, value in stats.items() if key != 'errors'}
+        self.error_count = len(errors)
+        self.errors = error_messages(heapq.nsmallest(MAX_JOB_ERRORS, errors, key=error_order))
+        if self._cancel_requested.is_set():
+            self._import_cancelled = True
+            raise ImportCancelled('Import cancelled')
+
+    def cancel(self):
+        """
+        Ask the job to stop. A queued job never starts; a running one stops
+        at its next progress report and its uncommitted writes are rolled back.
+
+        Returns:
+            bool: False if the job had already finished
+        """
+        with self._lock:
+            if self.finished:
+                return False
+            self._cancel_requested.set()
+            if self.status == 'queued':
+                self._finish('cancelled', False, 'Import cancelled before it started')
+                # Nothing will read the upload; let the rest of it through
+                if self._upload is not None:
+                    self._upload.close()
+            return True
+
+    @property
+    def finished(self):
+        return self.status in ('completed', 'failed', 'cancelled')
+
+    def wait(self, timeout=None):
+        """Block until the job has finished"""
+        return self._done.wait(timeout)
+
+    def to_dict(self):
+        return {
+            'job_id': self.id,
+            'import_type': self.import_type,
+            'filename': self.filename,
+            'status': self.status,
+            'cancel_requested': self._cancel_requested.is_set(),
+            'rows_parsed': self.rows_parsed,
+            'rows_written': self.rows_written,
+            'records': self.records,
+            'error_count': self.error_count,
+            'errors': self.errors,
+            'success': self.success,
+            'message': self.message,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+
+    def _finish(self, status, success, message):
+        self.status = status
+        self.success = success
+        self.message = message
+        self.finished_at = time.time()
+        self._done.set()
+
+    def run(self, file_path, run_import):
+        """
+        Run the import on a pool thread and delete the uploaded file, if it is
+        still there; an upload being streamed is closed for reading
+        """
+        try:
+            with self._lock:
+                if self.finished:
+                    return
+                self.status = 'running'
+                self.started_at = time.time()
+
+            try:
+                success, message = run_import(self.import_type, file_path, self.progress)
+            except Exception as e:
+                logger.exception(f"Import job {self.id} failed")
+                success, message = False, f'Error during import: {str(e)}'
+
+            # The import reports its own errors as a message, so a cancellation
+            # is recognized by the flag set where it was raised
+            if self._import_cancelled:
+                self._finish('cancelled', False, message or 'Import cancelled; no changes were saved')
+            else:
+                self._finish('completed' if success else 'failed', success, message)
+        finally:
+            if self._upload is not None:
+                self._upload.close()
+            if file_path and os.path.exists(file_path):
+                os.unlink(file_path)
+
+_executor = None
+_jobs = {}
+_jobs_lock = threading.Lock()
+
+def _prune_jobs():
+    cutoff = time.time() - JOB_RETENTION_SECONDS
+    for job_id, job in list(_jobs.items()):
+        if job.finished and job.finished_at < cutoff:
+            del _jobs[job_id]
+
+def submit_import_job(import_type, filename, file_path, run_import, upload=None):
+    """
+    Queue the import of an uploaded file.
+
+    Args:
+        import_type (str): Import type from the import form
+        filename (str): Name the file was uploaded as
+        file_path (str): Saved upload, deleted when the job finishes unless
+            the import moved it; None when resuming an import run
+        run_import: Function taking (import_type, file_path, progress) and
+            returning (success, message)
+        upload (UploadPipe): The file as it is being uploaded, when the
+            import reads it from there instead of file_path; closed when the
+            job finishes, so the rest of the upload is not held up
+
+    Returns:
+        ImportJob: The queued job
+    """
+    global _executor
+    job = ImportJob(import_type, filename, upload)
+    with _jobs_lock:
+        _prune_jobs()
+        _jobs[job.id] = job
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=max(1, IMPORT_WORKERS), thread_name_prefix='import-job')
+    _executor.submit(job.run, file_path, run_import)
+    return job
+
+def get_import_job(job_id):
+    """Get a job by ID, or None"""
+    return _jobs.get(job_id)
+
+def list_import_jobs():
+    """All jobs this process knows about, newest first"""
+    return sorted(_jobs.values(), key=lambda job: job.created_at, reverse=True)
@@ -0,0 +1,288 @@
+"""
+Changeset previews of unified imports for the Reagent Database application.
+
+A preview shows what an import would change without running it. The file is
+parsed exactly as the import parses it (prepare_unified_rows) and its rows are
+loaded into temp staging tables on a read connection. The changes are then
+computed with a few set-based statements against the current tables:
+
+- organisms, freezers, plasmids and ORFs are matched on their ID. Only the
+  last row for each ID counts, as in the import. IDs missing from the table
+  (anti-join) are inserts. Matched IDs (join) are updates, listing the
+  columns whose values differ, or unchanged.
+- positions and sources have no ID and are always added by the import. Those
+  identical to a row already in the database are reported as
+  already_present: importing them adds a second copy, unless an earlier
+  import recorded their content hash. Rows the import would fail to write
+  because the table lacks one of its columns are rejected.
+
+The summary counts every action; the paged details list the inserts, updates
+and rejected rows.
+
+Nothing is written to the database. Previews are kept in memory by this
+process, so their details can be paged, and dropped an hour after they
+are made.
+"""
+
+import time
+import uuid
+import sqlite3
+import threading
+
+from app.unified_import import (
+    DIMENSION_UPSERTS, SEQUENCE_STAGE_COLUMNS, prepare_unified_rows, sheet_errors, error_messages
+)
+
+# Seconds a preview is kept for detail requests
+PREVIEW_RETENTION_SECONDS = 3600
+
+# Default and maximum page size of preview details
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Staged columns of each batch, in the order prepare_unified_rows produces them
+STAGE_COLUMNS = dict(
+    {batch: [key] + columns for batch, (_, key, columns) in DIMENSION_UPSERTS.items()},
+    sequences=SEQUENCE_STAGE_COLUMNS,
+    entry_positions=['orf_id', 'plate', 'well', 'freezer_id', 'plasmid_id', 'orf_create_date'],
+    yeast_ad_positions=['orf_id', 'plate', 'well', 'position_type'],
+    yeast_db_positions=['orf_id', 'plate', 'well', 'position_type'],
+    sources=['orf_id', 'source_name', 'source_details', 'source_url', 'submission_date', 'submitter', 'notes'],
+)
+
+# Entities matched on an ID: entity -> (batch, table, key column)
+KEYED_ENTITIES = dict(
+    {batch: (batch, table, key) for batch, (table, key, _) in DIMENSION_UPSERTS.items()},
+    orfs=('sequences', 'orf_sequence', 'orf_id'),
+)
+
+KEYED_BATCHES = {batch for batch, _, _ in KEYED_ENTITIES.values()}
+
+# Entities the import always adds: entity -> (batch, table, columns
+# identifying an existing copy, SQL expression labelling a staged row)
+APPENDED_ENTITIES = {
+    'entry_positions': ('entry_positions', 'orf_position', ['orf_id', 'plate', 'well'],
+                        "s.orf_id || ' ' || s.plate || '-' || s.well"),
+    'yeast_ad_positions': ('yeast_ad_positions', 'yeast_orf_position', ['orf_id', 'plate', 'well', 'position_type'],
+                           "s.orf_id || ' ' || s.plate || '-' || s.well"),
+    'yeast_db_positions': ('yeast_db_positions', 'yeast_orf_position', ['orf_id', 'plate', 'well', 'position_type'],
+                           "s.orf_id || ' ' || s.plate || '-' || s.well"),
+    'sources': ('sources', 'orf_sources', ['orf_id', 'source_name', 'source_details', 'source_url'],
+                "s.orf_id || ' ' || s.source_name"),
+}
+
+def _table_columns(c, table):
+    """Columns of a table or view, empty if it does not exist"""
+    c.execute(f'PRAGMA table_info({table})')
+    return [column[1] for column in c.fetchall()]
+
+def stage_preview_rows(conn, chunks, pack_sequences=False):
+    """
+    Parse unified import rows and load them into temp staging tables.
+
+    Args:
+        conn: sqlite3 connection; only its temp schema is written
+        chunks: DataFrames with mapped column names, as for import_unified_chunks
+        pack_sequences (bool): Stage sequences as the import would store them
+
+    Returns:
+        tuple: (rows_read, errors) with errors as from import_unified_chunks
+    """
+    c = conn.cursor()
+    for batch, columns in STAGE_COLUMNS.items():
+        c.execute(f'DROP TABLE IF EXISTS temp.preview_stage_{batch}')
+        c.execute(f"CREATE TEMP TABLE preview_stage_{batch} (row_number INTEGER, {', '.join(columns)})")
+
+    rows_read = 0
+    errors = []
+    for chunk in chunks:
+        if chunk.empty:
+            continue
+        batches, chunk_errors = prepare_unified_rows(chunk, pack_sequences)
+        errors.extend(sheet_errors(chunk, chunk_errors))
+        for batch, columns in STAGE_COLUMNS.items():
+            rows = batches.get(batch, [])
+            if batch in KEYED_BATCHES:
+                # Only the last row for each ID matters; drop the others early
+                rows = {values[0]: (row_number, values) for row_number, values in rows}.values()
+            c.executemany(
+                f"INSERT INTO preview_stage_{batch} VALUES ({', '.join(['?'] * (len(columns) + 1))})",
+                [(row_number,) + tuple(values) for row_number, values in rows]
+            )
+        rows_read += len(chunk)
+    return rows_read, errors
+
+def compute_changes(conn):
+    """
+    Compare the staged rows with the current tables.
+
+    Inserts, updates and rejected rows are recorded in temp.preview_changes
+    (entity, action, row_number, key, changed_columns); unchanged and
+    already present rows are only counted.
+
+    Returns:
+        dict: Entity -> counts by action
+    """
+    c = conn.cursor()
+    c.execute('DROP TABLE IF EXISTS temp.preview_changes')
+    c.execute('CREATE TEMP TABLE preview_changes (entity, action, row_number, key, changed_columns)')
+    summary = {}
+
+    def record(sql, params=()):
+        c.execute(f'INSERT INTO preview_changes {sql}', params)
+        return c.rowcount
+
+    for entity, (batch, table, key) in KEYED_ENTITIES.items():
+        # Only the last row for each ID is applied by the import
+        stage = f'preview_stage_{batch}'
+        c.execute('DROP TABLE IF EXISTS temp.preview_latest')
+        c.execute(f'''
+            CREATE TEMP TABLE preview_latest AS SELECT * FROM {stage}
+            WHERE row_number IN (SELECT MAX(row_number) FROM {stage} GROUP BY {key})
+        ''')
+        c.execute('SELECT COUNT(*) FROM preview_latest')
+        total = c.fetchone()[0]
+
+        target_columns = _table_columns(c, table)
+        if not target_columns:
+            inserts = record(f"SELECT ?, 'insert', row_number, {key}, NULL FROM preview_latest", (entity,))
+            summary[entity] = {'insert': inserts, 'update': 0, 'unchanged': 0}
+            continue
+
+        # IDs not in the table are inserts (anti-join)
+        inserts = record(f'''
+            SELECT ?, 'insert', s.row_number, s.{key}, NULL
+            FROM preview_latest s
+            WHERE NOT EXISTS (SELECT 1 FROM {table} t WHERE t.{key} = s.{key})
+        ''', (entity,))
+
+        # Existing IDs (join) are updates of the columns that differ
+        compared = [column for column in STAGE_COLUMNS[batch] if column != key and column in target_columns]
+        changed = ' || '.join(
+            f"CASE WHEN s.{column} IS NOT t.{column} THEN '{column},' ELSE '' END" for column in compared
+        ) or "''"
+        updates = record(f'''
+            SELECT ?, 'update', row_number, key, RTRIM(changed, ',')
+            FROM (
+                SELECT s.row_number AS row_number, s.{key} AS key, {changed} AS changed
+                FROM preview_latest s JOIN {table} t ON t.{key} = s.{key}
+            )
+            WHERE changed <> ''
+        ''', (entity,))
+        summary[entity] = {'insert': inserts, 'update': updates, 'unchanged': total - inserts - updates}
+    c.execute('DROP TABLE IF EXISTS temp.preview_latest')
+
+    for entity, (batch, table, match_columns, label) in APPENDED_ENTITIES.items():
+        c.execute(f'SELECT COUNT(*) FROM preview_stage_{batch}')
+        total = c.fetchone()[0]
+
+        target_columns = _table_columns(c, table)
+        if any(column not in target_columns for column in STAGE_COLUMNS[batch]):
+            # The import's insert names a column the table lacks (for example
+            # yeast_orf_position before its position_type migration) and fails
+            rejected = record(f"SELECT ?, 'rejected', s.row_number, {label}, NULL FROM preview_stage_{batch} s",
+                              (entity,))
+            summary[entity] = {'insert': 0, 'already_present': 0, 'rejected': rejected}
+            continue
+
+        # Anti-join against the distinct existing rows, which SQLite answers
+        # with an automatic index instead of a scan per staged row
+        inserts = record(f'''
+            SELECT ?, 'insert', s.row_number, {label}, NULL
+            FROM preview_stage_{batch} s
+            LEFT JOIN (SELECT DISTINCT {', '.join(match_columns)}, 1 AS present FROM {table}) t
+            ON {' AND '.join(f't.{column} IS s.{column}' for column in match_columns)}
+            WHERE t.present IS NULL
+        ''', (entity,))
+        summary[entity] = {'insert': inserts, 'already_present': total - inserts, 'rejected': 0}
+    return summary
+
+class ImportPreview:
+    """The computed changes of one previewed file"""
+
+    def __init__(self, filename, row_count, summary, changes, errors):
+        """
+        Args:
+            changes (list): (row, entity, action, key, changed_columns) tuples in sheet order
+        """
+        self.id = uuid.uuid4().hex
+        self.filename = filename
+        self.row_count = row_count
+        self.summary = summary
+        self.changes = changes
+        self.errors = errors
+        self.created_at = time.time()
+
+    def page(self, entity=None, action=None, offset=0, limit=DEFAULT_PAGE_SIZE):
+        """
+        One page of the inserts, updates and rejected rows, in sheet order.
+
+        Returns:
+            dict: changes, total (matching changes) and next_offset (None on the last page)
+        """
+        changes = self.changes
+        if entity is not None or action is not None:
+            changes = [change for change in changes
+                       if (entity is None or change[1] == entity) and (action is None or change[2] == action)]
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        offset = max(0, offset)
+        end = offset + limit
+        return {
+            'changes': [
+                {'row': row, 'entity': entity, 'action': action, 'key': key,
+                 'changed_columns': changed.split(',') if changed else []}
+                for row, entity, action, key, changed in changes[offset:end]
+            ],
+            'total': len(changes),
+            'next_offset': end if end < len(changes) else None,
+        }
+
+    def to_dict(self):
+        return {
+            'preview_id': self.id,
+            'filename': self.filename,
+            'row_count': self.row_count,
+            'summary': self.summary,
+            'error_count': len(self.errors),
+            'errors': error_messages(self.errors),
+            'created_at': self.created_at,
+        }
+
+_previews = {}
+_previews_lock = threading.Lock()
+
+def create_import_preview(db_path, filename, chunks, pack_sequences=False):
+    """
+    Preview a unified import.
+
+    Args:
+        db_path (str): Path to the SQLite database
+        filename (str): Name the file was uploaded as
+        chunks: DataFrames with mapped column names
+        pack_sequences (bool): Compare sequences in the form the import would store
+
+    Returns:
+        ImportPreview: The preview, kept for paging its changes
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        row_count, errors = stage_preview_rows(conn, chunks, pack_sequences)
+        summary = compute_changes(conn)
+        c = conn.cursor()
+        c.execute('SELECT row_number, entity, action, key, changed_columns FROM preview_changes')
+        changes = sorted(c.fetchall(), key=lambda change: change[0])
+    finally:
+        conn.close()
+
+    preview = ImportPreview(filename, row_count, summary, changes, errors)
+    with _previews_lock:
+        cutoff = time.time() - PREVIEW_RETENTION_SECONDS
+        for preview_id, old in list(_previews.items()):
+            if old.created_at < cutoff:
+                del _previews[preview_id]
+        _previews[preview.id] = preview
+    return preview
+
+def get_import_preview(preview_id):
+    """Get a preview by ID, or None"""
+    return _previews.get(preview_id)
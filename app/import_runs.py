@@ -0,0 +1,321 @@
+"""
+Checkpointed, resumable unified imports for the Reagent Database application.
+
+An all-or-nothing import is one write on the database writer, so a failure
+near the end of a large file (a lock timeout, a bad chunk, a restart) undoes
+everything and the file has to be imported again from the start. A
+checkpointed import commits one chunk at a time instead. Each commit also
+records the run's progress in import_runs: the rows committed so far, the
+running stats, and the errors of those rows in import_run_errors. The rows
+and their checkpoint are committed together, so the record never disagrees
+with the data.
+
+A run that fails or is cancelled keeps its uploaded file (under
+uploads/import_runs) and can be resumed. Resuming skips the committed rows
+and continues with the next chunk. The file is deleted once the run
+completes.
+
+A run is claimed in the database before it is imported: its status is
+switched to running, and its owner_pid set, by one conditional UPDATE, so two
+resume requests (from any worker process) can never both import it. A
+running run whose owner process is gone was interrupted, for example by a
+restart, and can be claimed again.
+
+The tables are created by setup_db.create_import_runs; on older databases
+run: python run_migration.py add_import_runs
+"""
+
+import os
+import json
+import uuid
+import shutil
+import sqlite3
+import hashlib
+import threading
+import logging
+
+from app import DB_PATH, UPLOAD_FOLDER
+from app.db_writer import run_write
+from app.unified_import import import_unified_chunks
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Uploaded files of unfinished runs, kept for resuming
+RUNS_FOLDER = os.path.join(UPLOAD_FOLDER, 'import_runs')
+
+# Statuses from which a run can be resumed; a running run only once its
+# owner process is gone
+RESUMABLE_STATUSES = ('running', 'failed', 'cancelled')
+
+# Columns of import_runs returned by get_run and list_runs
+RUN_COLUMNS = ['run_id', 'import_type', 'filename', 'file_hash', 'file_path', 'status', 'rows_committed',
+               'stats', 'message', 'started_at', 'updated_at', 'finished_at', 'owner_pid']
+
+class ImportRunError(Exception):
+    """A run cannot be started or resumed"""
+
+# Runs claimed by this process and not released yet; a running run owned by
+# this process but not in here was left behind by an earlier process with
+# the same PID
+_active_runs = set()
+_active_runs_lock = threading.Lock()
+
+def import_runs_exist(conn):
+    """Check whether the import_runs tables have been created, with the owner_pid and sheet columns"""
+    c = conn.cursor()
+    c.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='import_runs'")
+    if c.fetchone() is None:
+        return False
+    c.execute("PRAGMA table_info(import_runs)")
+    if 'owner_pid' not in [column[1] for column in c.fetchall()]:
+        return False
+    c.execute("PRAGMA table_info(import_run_errors)")
+    return 'sheet' in [column[1] for column in c.fetchall()]
+
+def file_hash(file_path):
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _owner_alive(run):
+    """Whether the process that claimed a run is still running it"""
+    pid = run['owner_pid']
+    if pid is None:
+        return False
+    if pid == os.getpid():
+        return run['run_id'] in _active_runs
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Exists, under another user
+        return True
+    return True
+
+def _run_dict(row):
+    run = dict(zip(RUN_COLUMNS, row))
+    run['stats'] = json.loads(run['stats']) if run['stats'] else {}
+    run['resumable'] = (run['status'] in RESUMABLE_STATUSES and run['run_id'] not in _active_runs
+                        and not (run['status'] == 'running' and _owner_alive(run)))
+    return run
+
+def get_run(run_id):
+    """Get an import run by ID, or None"""
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        if not import_runs_exist(conn):
+            return None
+        c = conn.cursor()
+        c.execute(f"SELECT {', '.join(RUN_COLUMNS)} FROM import_runs WHERE run_id = ?", (run_id,))
+        row = c.fetchone()
+        return _run_dict(row) if row else None
+    finally:
+        conn.close()
+
+def list_runs(limit=50):
+    """The most recent import runs, newest first"""
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        if not import_runs_exist(conn):
+            return []
+        c = conn.cursor()
+        c.execute(f"SELECT {', '.join(RUN_COLUMNS)} FROM import_runs ORDER BY started_at DESC, rowid DESC LIMIT ?",
+                  (limit,))
+        return [_run_dict(row) for row in c.fetchall()]
+    finally:
+        conn.close()
+
+def run_errors(run_id):
+    """(sheet, row_number, step, message) errors of a run's committed rows"""
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        c = conn.cursor()
+        c.execute('SELECT sheet, row_number, step, message FROM import_run_errors WHERE run_id = ?', (run_id,))
+        return c.fetchall()
+    finally:
+        conn.close()
+
+def run_file_path(filename):
+    """A new path in RUNS_FOLDER for a run's copy of an uploaded file"""
+    os.makedirs(RUNS_FOLDER, exist_ok=True)
+    return os.path.join(RUNS_FOLDER, f'{uuid.uuid4().hex}_{os.path.basename(filename)}')
+
+def _keep_file(file_path, kept_path):
+    """Give a run its own copy of a file: a hard link where possible, else a copy"""
+    try:
+        os.link(file_path, kept_path)
+    except OSError:
+        shutil.copyfile(file_path, kept_path)
+
+def start_run(import_type, filename, file_path, uploading=False):
+    """
+    Record a new run, claimed by this process, with a copy of its file in
+    RUNS_FOLDER that stays until the run completes. The caller keeps its
+    file. Release the run with release_run once the import is over.
+
+    Args:
+        uploading (bool): The file is a copy of an upload still arriving,
+            already written in RUNS_FOLDER (see run_file_path); its hash is
+            recorded by record_upload once the upload is over
+
+    Returns:
+        dict: The run
+    """
+    run_id = uuid.uuid4().hex
+    if uploading:
+        kept_path, kept_hash = file_path, ''
+    else:
+        kept_path = run_file_path(filename)
+        _keep_file(file_path, kept_path)
+        kept_hash = file_hash(kept_path)
+
+    def record(conn):
+        conn.execute('''
+            INSERT INTO import_runs (run_id, import_type, filename, file_hash, file_path, status, stats, owner_pid)
+            VALUES (?, ?, ?, ?, ?, 'running', '{}', ?)
+        ''', (run_id, import_type, filename, kept_hash, kept_path, os.getpid()))
+    with _active_runs_lock:
+        run_write(record)
+        _active_runs.add(run_id)
+    return get_run(run_id)
+
+def record_upload(run_id, sha256):
+    """
+    Record the end of the upload of a run started while its file was still
+    arriving: the file's hash, or, if the upload was interrupted (sha256 is
+    None), that the run has no complete file to resume from
+    """
+    if sha256 is None:
+        run = get_run(run_id)
+        if run and run['file_path'] and os.path.exists(run['file_path']):
+            os.unlink(run['file_path'])
+        run_write(lambda conn: conn.execute('UPDATE import_runs SET file_path = NULL WHERE run_id = ?', (run_id,)))
+    else:
+        run_write(lambda conn: conn.execute('UPDATE import_runs SET file_hash = ? WHERE run_id = ?',
+                                            (sha256, run_id)))
+
+def resume_run(run_id):
+    """
+    Check that a run can be resumed and claim it for this process. Release
+    the run with release_run once the import is over.
+
+    The claim is one UPDATE conditional on the run still being as it was
+    read: failed or cancelled, or running for the same gone owner. If another
+    request or process claimed it in between, nothing is updated.
+
+    Returns:
+        dict: The run
+
+    Raises:
+        ImportRunError: Unknown run, finished or active run, run claimed by
+        someone else, or missing or changed file
+    """
+    run = get_run(run_id)
+    if run is None:
+        raise ImportRunError(f'Unknown import run: {run_id}')
+    if not run['resumable']:
+        raise ImportRunError(f"Import run {run_id} is {run['status']} and cannot be resumed")
+    if not run['file_path'] or not os.path.exists(run['file_path']):
+        raise ImportRunError(f'The file of import run {run_id} is no longer available')
+    if not run['file_hash']:
+        raise ImportRunError(f'The file of import run {run_id} is still being uploaded')
+    if file_hash(run['file_path']) != run['file_hash']:
+        raise ImportRunError(f'The file of import run {run_id} has changed since the run started')
+
+    def claim(conn):
+        return conn.execute('''
+            UPDATE import_runs
+            SET status = 'running', owner_pid = ?, message = NULL, updated_at = CURRENT_TIMESTAMP
+            WHERE run_id = ? AND status = ? AND owner_pid IS ?
+        ''', (os.getpid(), run_id, run['status'], run['owner_pid'])).rowcount
+
+    # The lock keeps two requests in this process from both claiming a run
+    # this process's PID already owns
+    with _active_runs_lock:
+        if run_id in _active_runs or not run_write(claim):
+            raise ImportRunError(f'Import run {run_id} is already being resumed')
+        _active_runs.add(run_id)
+    run.update(status='running', owner_pid=os.getpid(), resumable=False)
+    return run
+
+def release_run(run):
+    """Release a run claimed by start_run or resume_run once its import is over"""
+    with _active_runs_lock:
+        _active_runs.discard(run['run_id'])
+
+def _record_checkpoint(conn, run_id, rows_committed, stats, errors):
+    """Record a committed chunk; runs in the same write as the chunk itself"""
+    conn.execute('''
+        UPDATE import_runs SET rows_committed = ?, stats = ?, updated_at = CURRENT_TIMESTAMP
+        WHERE run_id = ?
+    ''', (rows_committed, json.dumps(stats), run_id))
+    conn.executemany(
+        'INSERT INTO import_run_errors (run_id, sheet, row_number, step, message) VALUES (?, ?, ?, ?, ?)',
+        # Row numbers may be numpy integers, which sqlite3 would store as blobs
+        [(run_id, sheet, int(row_number), step, message) for sheet, row_number, step, message in errors]
+    )
+
+def finish_run(run, status, message):
+    """Record the end of a run; a completed run's file is deleted"""
+    run_write(lambda conn: conn.execute('''
+        UPDATE import_runs
+        SET status = ?, message = ?, updated_at = CURRENT_TIMESTAMP,
+            finished_at = CASE WHEN ? = 'completed' THEN CURRENT_TIMESTAMP END
+        WHERE run_id = ?
+    ''', (status, message, status, run['run_id'])))
+    if status == 'completed' and run['file_path'] and os.path.exists(run['file_path']):
+        os.unlink(run['file_path'])
+
+def import_checkpointed(run, chunks, stats, pack_sequences=False, progress=None):
+    """
+    Import unified rows one chunk per commit, recording a checkpoint with
+    each. The chunks must start after the run's committed rows.
+
+    Args:
+        run (dict): The run, from start_run or resume_run
+        chunks: DataFrames with mapped column names
+        stats (dict): Counters, starting from the run's stats when resuming
+        pack_sequences (bool): Store sequences in the packed form where it is smaller
+        progress: As for import_unified_chunks, with row counts of the whole file
+
+    Returns:
+        int: Rows committed in total, including those of earlier attempts
+
+    Raises:
+        Exception: Whatever stopped the import; the chunk being written is
+        rolled back, the chunks before it stay committed
+    """
+    run_id = run['run_id']
+    rows_committed = run['rows_committed']
+    errors = []
+
+    if run_id not in _active_runs:
+        raise ImportRunError(f'Import run {run_id} has not been claimed by this process')
+    for chunk in chunks:
+        if chunk.empty:
+            continue
+        chunk_stats = dict(stats)
+        chunk_errors = []
+
+        def chunk_progress(rows_parsed, rows_written, progress_stats, progress_errors, done=rows_committed):
+            progress(done + rows_parsed, done + rows_written, progress_stats, errors + progress_errors)
+
+        def write_chunk(conn, chunk=chunk, chunk_stats=chunk_stats, chunk_errors=chunk_errors,
+                        done=rows_committed):
+            import_unified_chunks(conn, [chunk], chunk_stats, chunk_errors, pack_sequences,
+                                  chunk_progress if progress else None)
+            _record_checkpoint(conn, run_id, done + len(chunk), chunk_stats, chunk_errors)
+
+        # Counters only move on once the chunk and its checkpoint are committed
+        run_write(write_chunk)
+        stats.update(chunk_stats)
+        errors.extend(chunk_errors)
+        rows_committed += len(chunk)
+        logger.info(f"Import run {run_id}: {rows_committed} rows committed")
+    return rows_committed
+
@@ -0,0 +1,304 @@
+"""
+Validate-only (dry run) checks of import sheets for the Reagent Database application.
+
+Importing reports at most a handful of errors, and only after writing the
+rows it could. validate_chunks instead checks a whole sheet without writing
+anything, and lists every problem found with its row, column and value:
+
+- required columns and values;
+- ID formats, including numeric IDs that a spreadsheet turned into "672.0";
+- Entrez and UniProt ID formats;
+- position strings that cannot be split into plate and well;
+- the sequence alphabet (IUPAC nucleotide codes) and orf_length_bp;
+- yes/no columns with unrecognized values;
+- organisms, freezers and plasmids referenced by a row but neither in the
+  database nor described by the sheet;
+- IDs repeated in organism, freezer and plasmid sheets.
+
+Every check is a whole-column pandas operation. The database is only read to
+load the ID sets of the referenced tables, one query per table, before the
+first row is checked.
+
+Each problem has a severity: an error means the row or value would be
+rejected or stored wrongly, a warning that it would be imported but is
+probably not what was meant.
+"""
+
+import pandas as pd
+
+from canonical_ids import canonical_entrez_id
+from sequence_codec import SEQUENCE_PATTERN
+from app.unified_import import TEMPLATE_ORF_IDS, TRUE_VALUES, text_column, parse_positions
+
+# Spellings of false in yes/no columns; anything else is imported as false with a warning
+FALSE_VALUES = ['no', 'false', '0', 'n', 'f', '']
+
+# IDs are one token without whitespace
+ID_PATTERN = r'\S+'
+
+# A numeric ID that a spreadsheet stored as a decimal ("672.0")
+DECIMAL_ID_PATTERN = r'\d+\.0+'
+
+# UniProt accession format (https://www.uniprot.org/help/accession_numbers)
+UNIPROT_PATTERN = r'[OPQ][0-9][A-Z0-9]{3}[0-9]|[A-NR-Z][0-9](?:[A-Z][A-Z0-9]{2}[0-9]){1,2}'
+
+# Referenced tables: key set name -> (table, key column)
+KEY_SETS = {
+    'organisms': ('organisms', 'organism_id'),
+    'freezers': ('freezer', 'freezer_id'),
+    'plasmids': ('plasmid', 'plasmid_id'),
+}
+
+UNIFIED_RULES = {
+    'required_columns': ['orf_id', 'orf_name', 'source_name'],
+    'required_values': ['orf_id', 'orf_name'],
+    'template_ids': TEMPLATE_ORF_IDS,
+    'id_columns': ['orf_id', 'orf_organism_id', 'organism_id', 'freezer_id', 'plasmid_id'],
+    'position_columns': ['entry_position', 'yeast_ad_position', 'yeast_db_position'],
+    'boolean_columns': ['orf_with_stop', 'orf_open'],
+    'sequence': True,
+    # Referencing column -> (key set, severity when the ID is unknown). The
+    # import adds a freezer or plasmid for any ID a row names, so an unknown
+    # one only loses its details
+    'references': {
+        'orf_organism_id': ('organisms', 'error'),
+        'freezer_id': ('freezers', 'warning'),
+        'plasmid_id': ('plasmids', 'warning'),
+    },
+    # Key set -> (key column, detail columns): rows of the sheet that describe
+    # an organism, freezer or plasmid, which satisfy references to it
+    'defines': {
+        'organisms': ('organism_id', ['organism_name', 'organism_genus', 'organism_species']),
+        'freezers': ('freezer_id', ['freezer_location', 'freezer_condition']),
+        'plasmids': ('plasmid_id', ['plasmid_name', 'plasmid_type', 'plasmid_description']),
+    },
+}
+
+# FASTA files give only ORF sequences (see fasta_reader.py); their
+# orf_length_bp and yes/no values are computed, so need no checks
+FASTA_RULES = {
+    'required_columns': ['orf_id', 'orf_name'],
+    'required_values': ['orf_id', 'orf_name'],
+    # Dropped by the unified import whatever the file type
+    'template_ids': TEMPLATE_ORF_IDS,
+    'id_columns': ['orf_id'],
+    'sequence': True,
+}
+
+# Checks for each import type (see create_template_dataframe for the columns)
+VALIDATION_RULES = {
+    'unified_position': UNIFIED_RULES,
+    'fasta': FASTA_RULES,
+    # Older import types use the unified template
+    'orf_sequence': UNIFIED_RULES,
+    'orf_position': UNIFIED_RULES,
+    'yeast_orf_position': UNIFIED_RULES,
+    'orf_sources': UNIFIED_RULES,
+    'plasmid': {
+        'required_columns': ['plasmid_id', 'plasmid_name'],
+        'required_values': ['plasmid_id', 'plasmid_name'],
+        'template_ids': ['Required'],
+        'id_columns': ['plasmid_id'],
+        'unique': 'plasmid_id',
+    },
+    'organism': {
+        'required_columns': ['organism_id', 'organism_name'],
+        'required_values': ['organism_id', 'organism_name'],
+        'template_ids': ['Required'],
+        'id_columns': ['organism_id'],
+        'unique': 'organism_id',
+    },
+    'freezer': {
+        'required_columns': ['freezer_id', 'freezer_location'],
+        'required_values': ['freezer_id', 'freezer_location'],
+        'template_ids': ['Required'],
+        'id_columns': ['freezer_id'],
+        'unique': 'freezer_id',
+    },
+}
+
+# Columns of the validation report
+REPORT_COLUMNS = ['row', 'severity', 'column', 'value', 'message']
+
+def missing_columns(import_type, columns):
+    """Required columns of an import type that are not among `columns`"""
+    return [column for column in VALIDATION_RULES[import_type]['required_columns'] if column not in columns]
+
+def load_key_sets(conn, import_type):
+    """
+    Load the IDs of the tables an import type references, one query per table.
+
+    Returns:
+        dict: Key set name -> set of IDs (empty if the table does not exist)
+    """
+    names = {name for name, _ in VALIDATION_RULES[import_type].get('references', {}).values()}
+    c = conn.cursor()
+    key_sets = {}
+    for name in names:
+        table, key_column = KEY_SETS[name]
+        c.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'view') AND name = ?", (table,))
+        if c.fetchone():
+            c.execute(f'SELECT {key_column} FROM {table}')
+            key_sets[name] = {str(row[0]).strip() for row in c.fetchall() if row[0] is not None}
+        else:
+            key_sets[name] = set()
+    return key_sets
+
+def _issues(row_numbers, mask, severity, column, values, messages):
+    """Report rows for the masked rows; messages is a string or a Series"""
+    if not mask.any():
+        return None
+    if isinstance(messages, str):
+        messages = pd.Series(messages, index=row_numbers.index)
+    return pd.DataFrame({
+        'row': row_numbers[mask],
+        'severity': severity,
+        'column': column,
+        'value': values[mask],
+        'message': messages[mask],
+    })
+
+def _check_chunk(rules, df, issues, references, definitions, seen):
+    """Add the issues of one chunk; collect its references and definitions for the end"""
+    row_numbers = pd.Series(df.index + 2, index=df.index)
+    key = rules['required_values'][0]
+
+    # Template example rows and repeated header rows are skipped by imports
+    keys = df[key]
+    template = keys.isin(rules['template_ids']) | (keys.astype(str).str.lower() == key)
+    df = df[~template]
+    row_numbers = row_numbers[df.index]
+    text = {column: text_column(df, column) for column in df.columns}
+
+    def add(mask, severity, column, values, messages):
+        found = _issues(row_numbers, mask, severity, column, values, messages)
+        if found is not None:
+            issues.append(found)
+
+    for column in rules['required_values']:
+        add(text[column] == '', 'error', column, text[column], f'Missing required value ({column})')
+
+    for column in rules['id_columns']:
+        if column not in text:
+            continue
+        values = text[column]
+        present = values != ''
+        add(present & ~values.str.fullmatch(ID_PATTERN), 'error', column, values, 'ID contains whitespace')
+        add(present & values.str.fullmatch(DECIMAL_ID_PATTERN), 'warning', column, values,
+            'Numeric ID stored as a decimal; the spreadsheet probably converted it to a number')
+
+    if 'unique' in rules:
+        column = rules['unique']
+        values = text[column]
+        present = values != ''
+        repeated = present & (values.duplicated() | values.isin(seen))
+        add(repeated, 'warning', column, values, 'ID already appears on an earlier row; this row overwrites it')
+        seen.update(values[present])
+
+    if 'orf_entrez_id' in text:
+        values = text['orf_entrez_id']
+        canonical = values.map(canonical_entrez_id)
+        add((values != '') & ~canonical.str.fullmatch(r'\d+'), 'error', 'orf_entrez_id', values,
+            'Entrez Gene ID is not a whole number')
+    if 'orf_uniprot_id' in text:
+        values = text['orf_uniprot_id']
+        add((values != '') & ~values.str.upper().str.fullmatch(UNIPROT_PATTERN), 'error', 'orf_uniprot_id',
+            values, 'Not a UniProt accession')
+
+    for column in rules.get('position_columns', []):
+        if column not in text:
+            continue
+        values = text[column]
+        parsed = parse_positions(values)
+        incomplete = (values != '') & ((parsed['plate'] == '') | (parsed['well'] == ''))
+        add(incomplete, 'error', column, values, 'Position is not in Plate-Well format and will be skipped')
+
+    for column in rules.get('boolean_columns', []):
+        if column not in text:
+            continue
+        values = text[column]
+        normalized = values.str.lower()
+        add(~normalized.isin(TRUE_VALUES + FALSE_VALUES), 'warning', column, values,
+            'Not a yes/no value; it will be imported as no')
+
+    if rules.get('sequence') and 'orf_sequence' in text:
+        sequences = text['orf_sequence']
+        add(~sequences.str.fullmatch(SEQUENCE_PATTERN), 'error', 'orf_sequence', sequences,
+            'Sequence contains characters that are not IUPAC nucleotide codes')
+        if 'orf_length_bp' in text:
+            lengths = text['orf_length_bp']
+            numbers = pd.to_numeric(lengths, errors='coerce')
+            # Imports only read the length of rows with a sequence
+            add((sequences != '') & (lengths != '') & numbers.isna(), 'error', 'orf_length_bp', lengths,
+                'Length is not a number; the sequence will not be imported')
+            mismatch = (sequences != '') & numbers.notna() & (numbers != sequences.str.len())
+            add(mismatch, 'warning', 'orf_length_bp', lengths,
+                'Length differs from the sequence length (' + sequences.str.len().astype(str) + ' bp)')
+
+    for column, (name, severity) in rules.get('references', {}).items():
+        if column in text:
+            present = text[column] != ''
+            references.append(pd.DataFrame({
+                'row': row_numbers[present], 'column': column, 'value': text[column][present],
+                'key_set': name, 'severity': severity,
+            }))
+    for name, (column, details) in rules.get('defines', {}).items():
+        if column in text:
+            described = pd.Series(False, index=df.index)
+            for detail in details:
+                if detail in text:
+                    described |= text[detail] != ''
+            definitions.setdefault(name, set()).update(text[column][(text[column] != '') & described])
+
+def validate_chunks(import_type, chunks, key_sets):
+    """
+    Check the rows of an import sheet without writing anything.
+
+    Args:
+        import_type (str): Import type from the import form
+        chunks: DataFrames with mapped column names (see map_column_names);
+            their index gives the sheet row numbers (index + 2)
+        key_sets (dict): IDs in the database, from load_key_sets
+
+    Returns:
+        tuple: (row_count, report), report being a DataFrame with
+        REPORT_COLUMNS in sheet order
+    """
+    rules = VALIDATION_RULES[import_type]
+    issues, references, definitions, seen = [], [], {}, set()
+    row_count = 0
+    for chunk in chunks:
+        row_count += len(chunk)
+        _check_chunk(rules, chunk, issues, references, definitions, seen)
+
+    # References can be satisfied by rows further down the sheet, so they are
+    # resolved once every chunk has been read
+    if references:
+        references = pd.concat(references)
+        for name, group in references.groupby('key_set'):
+            known = key_sets.get(name, set()) | definitions.get(name, set())
+            unknown = group[~group['value'].isin(known)]
+            if len(unknown):
+                label = KEY_SETS[name][0].rstrip('s').capitalize()
+                issues.append(pd.DataFrame({
+                    'row': unknown['row'], 'severity': unknown['severity'], 'column': unknown['column'],
+                    'value': unknown['value'],
+                    'message': f'{label} is neither in the database nor described in the sheet',
+                }))
+
+    if not issues:
+        return row_count, pd.DataFrame(columns=REPORT_COLUMNS)
+    report = pd.concat(issues, ignore_index=True)
+    report = report.sort_values('row', kind='stable').reset_index(drop=True)
+    return row_count, report[REPORT_COLUMNS]
+
+def report_summary(row_count, report):
+    """Counts of a validation report"""
+    severities = report['severity'].value_counts()
+    return {
+        'row_count': row_count,
+        'error_count': int(severities.get('error', 0)),
+        'warning_count': int(severities.get('warning', 0)),
+        'rows_with_errors': int(report.loc[report['severity'] == 'error', 'row'].nunique()),
+        'valid': int(severities.get('error', 0)) == 0,
+    }
@@ -0,0 +1,258 @@
+"""
+Materialized ORF documents for the Reagent Database application.
+
+Search results and the ORF detail pages show the same assembled view of an
+ORF: its fields with organism and HGNC symbol, its entry positions with
+freezer and plasmid names, its yeast AD/DB positions and its sources.
+Assembling that takes five or six queries per ORF, so it is stored as JSON in
+orf_document (see setup_db.create_orf_documents). Triggers mark a document
+dirty whenever anything in it changes and a background refresher rebuilds
+dirty documents through the database writer.
+
+Reads use a document only while it is clean; a dirty or missing document is
+assembled from the underlying tables instead, so results are never stale.
+Documents never include the sequence payload.
+"""
+
+import json
+import threading
+import time
+import logging
+
+from app.db_writer import run_write
+from app.dimension_cache import add_dimension_fields
+from app.utils import format_database_ids, orf_display_columns, orf_metadata_table
+from setup_db import ORF_SEQUENCE_PAYLOAD_COLUMNS
+from sequence_codec import unpack_orf_sequence
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Number of dirty documents rebuilt per write
+REFRESH_BATCH_SIZE = 200
+
+# Maximum number of orf_ids per IN (...) lookup
+LOOKUP_BATCH_SIZE = 500
+
+def orf_documents_exist(conn):
+    """Check whether the orf_document table has been created"""
+    c = conn.cursor()
+    c.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='orf_document'")
+    return c.fetchone() is not None
+
+def _fetch_dicts(c):
+    """Rows of the last query as dicts, whatever the connection's row_factory"""
+    columns = [column[0] for column in c.description]
+    return [dict(zip(columns, row)) for row in c.fetchall()]
+
+def _table_exists(c, table_name):
+    c.execute("SELECT name FROM sqlite_master WHERE type='table' AND name=?", (table_name,))
+    return c.fetchone() is not None
+
+def add_orf_children(conn, orf_data):
+    """
+    Attach positions, yeast positions and sources to an ORF record in place.
+
+    Args:
+        conn: sqlite3 connection
+        orf_data (dict): ORF record with at least orf_id
+
+    Returns:
+        dict: The same dict, for chaining
+    """
+    c = conn.cursor()
+    orf_id = str(orf_data['orf_id'])
+
+    # Freezer and plasmid fields come from the dimension cache rather than joins
+    c.execute('SELECT * FROM orf_position WHERE orf_id = ?', (orf_id,))
+    positions = _fetch_dicts(c)
+    add_dimension_fields(conn, positions, 'freezers', 'freezer_id')
+    add_dimension_fields(conn, positions, 'plasmids', 'plasmid_id')
+    orf_data['positions'] = positions
+
+    yeast_positions = []
+    if _table_exists(c, 'yeast_orf_position'):
+        # Positions from before the AD/DB split are AD positions
+        c.execute("PRAGMA table_info(yeast_orf_position)")
+        columns = [column[1] for column in c.fetchall()]
+        position_type = '' if 'position_type' in columns else ", 'AD' as position_type"
+        c.execute(f'''
+            SELECT *{position_type} FROM yeast_orf_position
+            WHERE orf_id = ?
+        ''', (orf_id,))
+        yeast_positions = _fetch_dicts(c)
+    orf_data['yeast_positions'] = yeast_positions
+
+    sources = []
+    if _table_exists(c, 'orf_sources'):
+        c.execute('''
+            SELECT * FROM orf_sources
+            WHERE orf_id = ?
+            ORDER BY submission_date DESC
+        ''', (orf_id,))
+        sources = _fetch_dicts(c)
+    orf_data['sources'] = sources
+
+    return orf_data
+
+def build_orf_document(conn, orf_id):
+    """
+    Assemble the document of an ORF from the underlying tables.
+
+    The ORF fields are the ones gene search returns: display names where the
+    database has them, otherwise the stored names run through
+    format_database_ids.
+
+    Returns:
+        dict: The document, or None if the ORF does not exist
+    """
+    c = conn.cursor()
+    orf_table = orf_metadata_table(conn)
+    human_gene_table_exists = _table_exists(c, 'human_gene_data')
+    display_columns = orf_display_columns(conn, orf_table)
+
+    if display_columns:
+        columns = f"{display_columns}, {'hgd.hgnc_approved_symbol' if human_gene_table_exists else 'NULL'} as hgnc_approved_symbol"
+    elif human_gene_table_exists:
+        columns = '''os.*, COALESCE(hgd.hgnc_approved_symbol, os.orf_name) as display_name,
+                     hgd.hgnc_approved_symbol, os.orf_name as original_name'''
+    else:
+        columns = 'os.*, os.orf_name as display_name, NULL as hgnc_approved_symbol, os.orf_name as original_name'
+
+    query = f'SELECT {columns} FROM {orf_table} os'
+    if human_gene_table_exists:
+        query += ' LEFT JOIN human_gene_data hgd ON os.orf_id = hgd.orf_id'
+    c.execute(query + ' WHERE os.orf_id = ?', (str(orf_id),))
+    rows = _fetch_dicts(c)
+    if not rows:
+        return None
+
+    document = rows[0]
+    for column in ORF_SEQUENCE_PAYLOAD_COLUMNS:
+        document.pop(column, None)
+    if not display_columns:
+        document = format_database_ids(document)
+    add_dimension_fields(conn, [document], 'organisms', 'orf_organism_id')
+    return add_orf_children(conn, document)
+
+def get_orf_documents(conn, orf_ids):
+    """
+    Fetch the clean documents of a set of ORFs.
+
+    Returns:
+        dict: Documents by orf_id; ORFs whose document is dirty or missing
+        are left out
+    """
+    orf_ids = list(dict.fromkeys(str(orf_id) for orf_id in orf_ids))
+    if not orf_ids or not orf_documents_exist(conn):
+        return {}
+
+    c = conn.cursor()
+    documents = {}
+    for start in range(0, len(orf_ids), LOOKUP_BATCH_SIZE):
+        batch = orf_ids[start:start + LOOKUP_BATCH_SIZE]
+        c.execute(f'''
+            SELECT orf_id, document FROM orf_document
+            WHERE orf_id IN ({','.join(['?'] * len(batch))}) AND dirty = 0
+        ''', batch)
+        for orf_id, document in c.fetchall():
+            documents[orf_id] = json.loads(document)
+    return documents
+
+def get_orf_document(conn, orf_id):
+    """Get the document of one ORF, assembling it if it is dirty; None if the ORF does not exist"""
+    document = get_orf_documents(conn, [orf_id]).get(str(orf_id))
+    if document is None:
+        document = build_orf_document(conn, orf_id)
+    return document
+
+def add_orf_sequence(conn, orf_data):
+    """Add the decoded sequence of an ORF record, which documents leave out"""
+    c = conn.cursor()
+    table_name = 'orf_sequence_blob' if _table_exists(c, 'orf_sequence_blob') else 'orf_sequence'
+    c.execute(f'SELECT * FROM {table_name} WHERE orf_id = ?', (str(orf_data['orf_id']),))
+    rows = _fetch_dicts(c)
+    payload = {column: rows[0].get(column) if rows else None for column in ORF_SEQUENCE_PAYLOAD_COLUMNS}
+    orf_data.update(unpack_orf_sequence(payload))
+    return orf_data
+
+def hydrate_orf_results(conn, results):
+    """
+    Complete gene search results with organism fields, positions and sources.
+
+    Each result whose document is clean is replaced by it; the others get
+    organism fields from the dimension cache and their positions and sources
+    queried directly.
+
+    Args:
+        conn: sqlite3 connection
+        results (list): ORF records from a gene search
+
+    Returns:
+        list: The hydrated results, in the same order
+    """
+    documents = get_orf_documents(conn, [result['orf_id'] for result in results])
+    add_dimension_fields(
+        conn, [result for result in results if str(result['orf_id']) not in documents],
+        'organisms', 'orf_organism_id'
+    )
+    hydrated = []
+    for result in results:
+        document = documents.get(str(result['orf_id']))
+        hydrated.append(dict(document) if document is not None else add_orf_children(conn, result))
+    return hydrated
+
+def refresh_orf_documents(conn, limit=REFRESH_BATCH_SIZE):
+    """
+    Rebuild up to `limit` dirty documents. The caller commits; run it through
+    the database writer so no write can land between a build and its save.
+
+    Returns:
+        int: Number of documents rebuilt or removed
+    """
+    c = conn.cursor()
+    c.execute('SELECT orf_id FROM orf_document WHERE dirty = 1 LIMIT ?', (limit,))
+    orf_ids = [row[0] for row in c.fetchall()]
+
+    for orf_id in orf_ids:
+        document = build_orf_document(conn, orf_id)
+        if document is None:
+            # The ORF was deleted, or a child row names an ORF that does not exist
+            c.execute('DELETE FROM orf_document WHERE orf_id = ?', (orf_id,))
+        else:
+            c.execute('''
+                UPDATE orf_document
+                SET document = ?, dirty = 0, refreshed_at = CURRENT_TIMESTAMP
+                WHERE orf_id = ?
+            ''', (json.dumps(document), orf_id))
+    return len(orf_ids)
+
+_refresher_started = False
+
+def start_orf_document_refresher(interval):
+    """Rebuild dirty documents every `interval` seconds on a daemon thread"""
+    global _refresher_started
+    if _refresher_started or not interval:
+        return
+    _refresher_started = True
+
+    def refresh(conn):
+        return refresh_orf_documents(conn) if orf_documents_exist(conn) else 0
+
+    def run():
+        while True:
+            time.sleep(interval)
+            try:
+                # Short batches keep other writes from queueing behind a large backlog
+                refreshed = total = run_write(refresh)
+                while refreshed == REFRESH_BATCH_SIZE:
+                    refreshed = run_write(refresh)
+                    total += refreshed
+                if total:
+                    logger.info(f"Refreshed {total} ORF documents")
+            except Exception as e:
+                logger.error(f"Error refreshing ORF documents: {str(e)}")
+
+    thread = threading.Thread(target=run, name='orf-document-refresher')
+    thread.daemon = True
+    thread.start()
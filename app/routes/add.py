@@ -1,6 +1,8 @@
 from flask import render_template, request, jsonify
-import sqlite3
-from app import app, DB_PATH
+from app import app, PACK_SEQUENCES
+from app.db_writer import run_write
+from canonical_ids import canonical_accession, canonical_entrez_id
+from sequence_codec import pack_for_storage
 
 @app.route('/add', methods=['GET'])
 def add_entry():
@@ -11,107 +13,118 @@ def add_form_entry():
     # Handle form submission for adding entries
     entry_type = request.form.get('entry_type')
     
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
+    # The request is not available on the writer thread, so pass a copy of the form
+    form = request.form.to_dict()
     
     try:
-        if entry_type == 'orf':
-            # Add new ORF entry
-            orf_id = request.form.get('orf_id')
-            orf_name = request.form.get('orf_name')
-            orf_annotation = request.form.get('orf_annotation')
-            orf_sequence = request.form.get('orf_sequence')
-            orf_with_stop = 1 if request.form.get('orf_with_stop') == 'on' else 0
-            orf_open = 1 if request.form.get('orf_open') == 'on' else 0
-            orf_organism_id = request.form.get('orf_organism_id')
-            orf_length_bp = request.form.get('orf_length_bp', 0)
-            orf_entrez_id = request.form.get('orf_entrez_id', '')
-            orf_ensembl_id = request.form.get('orf_ensembl_id', '')
-            orf_uniprot_id = request.form.get('orf_uniprot_id', '')
-            orf_ref_url = request.form.get('orf_ref_url', '')
-            
-            # Insert ORF sequence
+        run_write(lambda conn: insert_form_entry(conn.cursor(), entry_type, form))
+        message = f'{entry_type.upper()} entry added successfully'
+        success = True
+    except Exception as e:
+        message = f'Error: {str(e)}'
+        success = False
+    
+    return jsonify({'success': success, 'message': message})
+
+def insert_form_entry(c, entry_type, form):
+    """Insert an entry submitted on the add form; runs on the database writer"""
+    if entry_type == 'orf':
+        # Add new ORF entry
+        orf_id = form.get('orf_id')
+        orf_name = form.get('orf_name')
+        orf_annotation = form.get('orf_annotation')
+        orf_sequence = form.get('orf_sequence')
+        orf_with_stop = 1 if form.get('orf_with_stop') == 'on' else 0
+        orf_open = 1 if form.get('orf_open') == 'on' else 0
+        orf_organism_id = form.get('orf_organism_id')
+        orf_length_bp = form.get('orf_length_bp', 0)
+        orf_entrez_id = canonical_entrez_id(form.get('orf_entrez_id', ''))
+        orf_ensembl_id = canonical_accession(form.get('orf_ensembl_id', ''))
+        orf_uniprot_id = canonical_accession(form.get('orf_uniprot_id', ''))
+        orf_ref_url = form.get('orf_ref_url', '')
+        
+        # Store the sequence packed if enabled in the configuration
+        orf_sequence, orf_sequence_packed = pack_for_storage(orf_sequence, PACK_SEQUENCES)
+        
+        # Insert ORF sequence; orf_sequence_packed is NULL when the sequence is
+        # stored as text, and is left out of a legacy orf_sequence table that
+        # predates the column
+        columns = [
+            'orf_id', 'orf_name', 'orf_annotation', 'orf_sequence', 'orf_sequence_packed', 'orf_with_stop', 'orf_open',
+            'orf_organism_id', 'orf_length_bp', 'orf_entrez_id', 'orf_ensembl_id', 'orf_uniprot_id', 'orf_ref_url'
+        ]
+        values = [
+            orf_id, orf_name, orf_annotation, orf_sequence, orf_sequence_packed, orf_with_stop, orf_open,
+            orf_organism_id, orf_length_bp, orf_entrez_id, orf_ensembl_id, orf_uniprot_id, orf_ref_url
+        ]
+        c.execute('PRAGMA table_info(orf_sequence)')
+        if orf_sequence_packed is None and 'orf_sequence_packed' not in [column[1] for column in c.fetchall()]:
+            del values[columns.index('orf_sequence_packed')]
+            columns.remove('orf_sequence_packed')
+        c.execute(f'''
+            INSERT INTO orf_sequence ({', '.join(columns)})
+            VALUES ({', '.join('?' * len(columns))})
+        ''', values)
+        
+        # Insert ORF position if provided
+        plate = form.get('plate', '')
+        well = form.get('well', '')
+        freezer_id = form.get('freezer_id', '')
+        plasmid_id = form.get('plasmid_id', '')
+        orf_create_date = form.get('orf_create_date', '')
+        
+        if plate and well:
             c.execute('''
-                INSERT INTO orf_sequence (
-                    orf_id, orf_name, orf_annotation, orf_sequence, orf_with_stop, orf_open,
-                    orf_organism_id, orf_length_bp, orf_entrez_id, orf_ensembl_id, orf_uniprot_id, orf_ref_url
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                INSERT INTO orf_position (
+                    orf_id, plate, well, freezer_id, plasmid_id, orf_create_date
+                ) VALUES (?, ?, ?, ?, ?, ?)
             ''', (
-                orf_id, orf_name, orf_annotation, orf_sequence, orf_with_stop, orf_open,
-                orf_organism_id, orf_length_bp, orf_entrez_id, orf_ensembl_id, orf_uniprot_id, orf_ref_url
+                orf_id, plate, well, freezer_id, plasmid_id, orf_create_date
             ))
-            
-            # Insert ORF position if provided
-            plate = request.form.get('plate', '')
-            well = request.form.get('well', '')
-            freezer_id = request.form.get('freezer_id', '')
-            plasmid_id = request.form.get('plasmid_id', '')
-            orf_create_date = request.form.get('orf_create_date', '')
-            
-            if plate and well:
-                c.execute('''
-                    INSERT INTO orf_position (
-                        orf_id, plate, well, freezer_id, plasmid_id, orf_create_date
-                    ) VALUES (?, ?, ?, ?, ?, ?)
-                ''', (
-                    orf_id, plate, well, freezer_id, plasmid_id, orf_create_date
-                ))
+    
+    elif entry_type == 'plasmid':
+        # Add new plasmid entry
+        plasmid_id = form.get('plasmid_id')
+        plasmid_name = form.get('plasmid_name')
+        plasmid_type = form.get('plasmid_type', '')
+        plasmid_express_organism = form.get('plasmid_express_organism', '')
+        plasmid_description = form.get('plasmid_description', '')
         
-        elif entry_type == 'plasmid':
-            # Add new plasmid entry
-            plasmid_id = request.form.get('plasmid_id')
-            plasmid_name = request.form.get('plasmid_name')
-            plasmid_type = request.form.get('plasmid_type', '')
-            plasmid_express_organism = request.form.get('plasmid_express_organism', '')
-            plasmid_description = request.form.get('plasmid_description', '')
-            
-            c.execute('''
-                INSERT INTO plasmid (
-                    plasmid_id, plasmid_name, plasmid_type, plasmid_express_organism, plasmid_description
-                ) VALUES (?, ?, ?, ?, ?)
-            ''', (
+        c.execute('''
+            INSERT INTO plasmid (
                 plasmid_id, plasmid_name, plasmid_type, plasmid_express_organism, plasmid_description
-            ))
+            ) VALUES (?, ?, ?, ?, ?)
+        ''', (
+            plasmid_id, plasmid_name, plasmid_type, plasmid_express_organism, plasmid_description
+        ))
+    
+    elif entry_type == 'organism':
+        # Add new organism entry
+        organism_id = form.get('organism_id')
+        organism_name = form.get('organism_name')
+        organism_genus = form.get('organism_genus', '')
+        organism_species = form.get('organism_species', '')
+        organism_strain = form.get('organism_strain', '')
         
-        elif entry_type == 'organism':
-            # Add new organism entry
-            organism_id = request.form.get('organism_id')
-            organism_name = request.form.get('organism_name')
-            organism_genus = request.form.get('organism_genus', '')
-            organism_species = request.form.get('organism_species', '')
-            organism_strain = request.form.get('organism_strain', '')
-            
-            c.execute('''
-                INSERT INTO organisms (
-                    organism_id, organism_name, organism_genus, organism_species, organism_strain
-                ) VALUES (?, ?, ?, ?, ?)
-            ''', (
+        c.execute('''
+            INSERT INTO organisms (
                 organism_id, organism_name, organism_genus, organism_species, organism_strain
-            ))
+            ) VALUES (?, ?, ?, ?, ?)
+        ''', (
+            organism_id, organism_name, organism_genus, organism_species, organism_strain
+        ))
+    
+    elif entry_type == 'freezer':
+        # Add new freezer entry
+        freezer_id = form.get('freezer_id')
+        freezer_location = form.get('freezer_location')
+        freezer_condition = form.get('freezer_condition', '')
+        freezer_date = form.get('freezer_date', '')
         
-        elif entry_type == 'freezer':
-            # Add new freezer entry
-            freezer_id = request.form.get('freezer_id')
-            freezer_location = request.form.get('freezer_location')
-            freezer_condition = request.form.get('freezer_condition', '')
-            freezer_date = request.form.get('freezer_date', '')
-            
-            c.execute('''
-                INSERT INTO freezer (
-                    freezer_id, freezer_location, freezer_condition, freezer_date
-                ) VALUES (?, ?, ?, ?)
-            ''', (
+        c.execute('''
+            INSERT INTO freezer (
                 freezer_id, freezer_location, freezer_condition, freezer_date
-            ))
-        
-        conn.commit()
-        message = f'{entry_type.upper()} entry added successfully'
-        success = True
-    except Exception as e:
-        conn.rollback()
-        message = f'Error: {str(e)}'
-        success = False
-    finally:
-        conn.close()
-    
-    return jsonify({'success': success, 'message': message})
+            ) VALUES (?, ?, ?, ?)
+        ''', (
+            freezer_id, freezer_location, freezer_condition, freezer_date
+        ))
@@ -1,59 +1,116 @@
-from flask import jsonify
+from flask import jsonify, request
 import sqlite3
 from app import app, DB_PATH
+from app.utils import orf_metadata_table
+from app.change_log import change_log_exists, current_change_seq, get_changes
+from app.dimension_cache import cached_rows
+from app.http_cache import conditional_get
+from app.catalog_listing import listing_requested, catalog_listing
 
 @app.route('/api/organisms', methods=['GET'])
+@conditional_get('organisms')
 def get_organisms():
+    if listing_requested():
+        return catalog_listing('organisms')
+    
     conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    c = conn.cursor()
     
-    c.execute('SELECT * FROM organisms')
-    organisms = [dict(row) for row in c.fetchall()]
+    # Served from the in-process cache until organisms changes
+    organisms = cached_rows(conn, 'organisms', 'SELECT * FROM organisms', ['organisms'])
     
     conn.close()
     
     return jsonify({'organisms': organisms})
 
 @app.route('/api/plasmids', methods=['GET'])
+@conditional_get('plasmids')
 def get_plasmids():
+    if listing_requested():
+        return catalog_listing('plasmids')
+    
     conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    c = conn.cursor()
     
-    c.execute('SELECT * FROM plasmid')
-    plasmids = [dict(row) for row in c.fetchall()]
+    # Served from the in-process cache until plasmid changes
+    plasmids = cached_rows(conn, 'plasmid', 'SELECT * FROM plasmid', ['plasmid'])
     
     conn.close()
     
     return jsonify({'plasmids': plasmids})
 
 @app.route('/api/freezers', methods=['GET'])
+@conditional_get('freezers')
 def get_freezers():
+    if listing_requested():
+        return catalog_listing('freezers')
+    
     conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    c = conn.cursor()
     
-    c.execute('SELECT * FROM freezer')
-    freezers = [dict(row) for row in c.fetchall()]
+    # Served from the in-process cache until freezer changes
+    freezers = cached_rows(conn, 'freezer', 'SELECT * FROM freezer', ['freezer'])
     
     conn.close()
     
     return jsonify({'freezers': freezers})
 
 @app.route('/api/orfs', methods=['GET'])
+@conditional_get('orfs')
 def get_orfs():
+    """
+    Return all ORFs, or one page of them with limit/after/updated_since,
+    or stream them with format=ndjson (see app/catalog_listing.py)
+    """
+    if listing_requested():
+        return catalog_listing('orfs')
+    
     conn = sqlite3.connect(DB_PATH)
     conn.row_factory = sqlite3.Row
     c = conn.cursor()
     
-    c.execute('SELECT orf_id, orf_name, orf_annotation FROM orf_sequence')
+    c.execute(f'SELECT orf_id, orf_name, orf_annotation FROM {orf_metadata_table(conn)}')
     orfs = [dict(row) for row in c.fetchall()]
     
     conn.close()
     
     return jsonify({'orfs': orfs})
 
+@app.route('/api/changes', methods=['GET'])
+def get_change_feed():
+    """
+    Return writes recorded in change_log after a sequence number.
+    
+    Query parameters:
+        since: Last sequence number the caller has processed (default 0)
+        limit: Maximum number of changes to return (default 1000, max 10000)
+        table: Optional comma-separated list of tables to filter on
+    """
+    try:
+        since = int(request.args.get('since', 0))
+        limit = min(int(request.args.get('limit', 1000)), 10000)
+    except ValueError:
+        return jsonify({'success': False, 'message': 'since and limit must be integers'}), 400
+    tables = [t.strip() for t in request.args.get('table', '').split(',') if t.strip()]
+    
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        if not change_log_exists(conn):
+            return jsonify({
+                'success': False,
+                'message': 'Change log is not enabled. Run: python run_migration.py add_change_log'
+            }), 404
+        
+        changes = get_changes(conn, since, limit, tables)
+        current_seq = current_change_seq(conn)
+    finally:
+        conn.close()
+    
+    return jsonify({
+        'success': True,
+        'changes': changes,
+        'last_seq': changes[-1]['seq'] if changes else max(since, 0),
+        'current_seq': current_seq,
+        'has_more': len(changes) == limit
+    })
+
 # Note: The search_examples and stats endpoints have been moved to other files
 # to avoid route conflicts:
 # - get_search_examples() is now in search.py
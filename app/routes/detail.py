@@ -1,89 +1,24 @@
 from flask import render_template, jsonify
 import sqlite3
 from app import app, DB_PATH
-from app.utils import format_database_ids
+from app.utils import orf_metadata_table
+from app.orf_documents import add_orf_sequence, get_orf_document
 
 @app.route('/view/orf/<orf_id>')
 def view_orf(orf_id):
     """View details for a specific ORF"""
     conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    c = conn.cursor()
-    
-    # Check if human_gene_data table exists
-    c.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='human_gene_data'")
-    human_gene_table_exists = c.fetchone()
-    
-    if human_gene_table_exists:
-        # Get ORF details with HGNC data
-        c.execute('''
-            SELECT os.*, o.organism_name, o.organism_genus, o.organism_species, o.organism_strain,
-                   hgd.hgnc_approved_symbol as hgnc_symbol
-            FROM orf_sequence os
-            LEFT JOIN organisms o ON os.orf_organism_id = o.organism_id
-            LEFT JOIN human_gene_data hgd ON os.orf_id = hgd.orf_id
-            WHERE os.orf_id = ?
-        ''', (str(orf_id),))
-    else:
-        # Get ORF details without HGNC data
-        c.execute('''
-            SELECT os.*, o.organism_name, o.organism_genus, o.organism_species, o.organism_strain,
-                   NULL as hgnc_symbol
-            FROM orf_sequence os
-            LEFT JOIN organisms o ON os.orf_organism_id = o.organism_id
-            WHERE os.orf_id = ?
-        ''', (str(orf_id),))
     
-    orf_data = c.fetchone()
+    # The assembled ORF with positions and sources, from its materialized
+    # document where it is clean
+    orf_data = get_orf_document(conn, orf_id)
     
     if not orf_data:
         conn.close()
         return render_template('error.html', message='ORF not found')
     
-    orf_data = format_database_ids(dict(orf_data))
-    
-    # Get position information - ensure string comparison for text IDs
-    c.execute('''
-        SELECT op.*, f.freezer_location, f.freezer_condition, p.plasmid_name, p.plasmid_type
-        FROM orf_position op
-        LEFT JOIN freezer f ON op.freezer_id = f.freezer_id
-        LEFT JOIN plasmid p ON op.plasmid_id = p.plasmid_id
-        WHERE op.orf_id = ?
-    ''', (str(orf_id),))
-    
-    positions = [dict(row) for row in c.fetchall()]
-    orf_data['positions'] = positions
-    
-    # Check if yeast_orf_position table exists
-    c.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='yeast_orf_position'")
-    yeast_table_exists = c.fetchone()
-    
-    yeast_positions = []
-    if yeast_table_exists:
-        # Get yeast position information
-        c.execute('''
-            SELECT * FROM yeast_orf_position
-            WHERE orf_id = ?
-        ''', (str(orf_id),))
-        
-        yeast_positions = [dict(row) for row in c.fetchall()]
-    orf_data['yeast_positions'] = yeast_positions
-    
-    # Check if orf_sources table exists
-    c.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='orf_sources'")
-    sources_table_exists = c.fetchone()
-    
-    sources = []
-    if sources_table_exists:
-        # Get source information
-        c.execute('''
-            SELECT * FROM orf_sources
-            WHERE orf_id = ?
-            ORDER BY submission_date DESC
-        ''', (str(orf_id),))
-        
-        sources = [dict(row) for row in c.fetchall()]
-    orf_data['sources'] = sources
+    orf_data['hgnc_symbol'] = orf_data.get('hgnc_approved_symbol')
+    orf_data = add_orf_sequence(conn, orf_data)
     
     conn.close()
     return render_template('detail_orf.html', data=orf_data)
@@ -112,11 +47,11 @@ def view_plasmid(plasmid_id):
     plasmid_data = dict(plasmid_data)
     
     # Get associated ORFs - ensure string comparison for text IDs
-    c.execute('''
+    c.execute(f'''
         SELECT os.orf_id, os.orf_name, os.orf_annotation, op.plate, op.well, 
                f.freezer_location, f.freezer_id
         FROM orf_position op
-        JOIN orf_sequence os ON op.orf_id = os.orf_id
+        JOIN {orf_metadata_table(conn)} os ON op.orf_id = os.orf_id
         LEFT JOIN freezer f ON op.freezer_id = f.freezer_id
         WHERE op.plasmid_id = ?
     ''', (str(plasmid_id),))
@@ -151,10 +86,10 @@ def view_freezer(freezer_id):
     freezer_data = dict(freezer_data)
     
     # Get contents of this freezer - ensure string comparison for text IDs
-    c.execute('''
+    c.execute(f'''
         SELECT op.plate, op.well, os.orf_id, os.orf_name, p.plasmid_id, p.plasmid_name
         FROM orf_position op
-        LEFT JOIN orf_sequence os ON op.orf_id = os.orf_id
+        LEFT JOIN {orf_metadata_table(conn)} os ON op.orf_id = os.orf_id
         LEFT JOIN plasmid p ON op.plasmid_id = p.plasmid_id
         WHERE op.freezer_id = ?
         ORDER BY op.plate, op.well
@@ -190,9 +125,9 @@ def view_organism(organism_id):
     organism_data = dict(organism_data)
     
     # Get ORFs for this organism - ensure string comparison for text IDs
-    c.execute('''
+    c.execute(f'''
         SELECT os.orf_id, os.orf_name, os.orf_annotation, os.orf_length_bp
-        FROM orf_sequence os
+        FROM {orf_metadata_table(conn)} os
         WHERE os.orf_organism_id = ?
     ''', (str(organism_id),))
     
@@ -207,67 +142,17 @@ def view_organism(organism_id):
 def api_detail_orf(orf_id):
     """API endpoint for ORF details"""
     conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    c = conn.cursor()
     
-    # Check if human_gene_data table exists
-    c.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='human_gene_data'")
-    human_gene_table_exists = c.fetchone()
-    
-    if human_gene_table_exists:
-        # Get ORF details with HGNC data
-        c.execute('''
-            SELECT os.*, o.organism_name, o.organism_genus, o.organism_species,
-                   hgd.hgnc_approved_symbol as hgnc_symbol
-            FROM orf_sequence os
-            LEFT JOIN organisms o ON os.orf_organism_id = o.organism_id
-            LEFT JOIN human_gene_data hgd ON os.orf_id = hgd.orf_id
-            WHERE os.orf_id = ?
-        ''', (str(orf_id),))
-    else:
-        # Get ORF details without HGNC data
-        c.execute('''
-            SELECT os.*, o.organism_name, o.organism_genus, o.organism_species,
-                   NULL as hgnc_symbol
-            FROM orf_sequence os
-            LEFT JOIN organisms o ON os.orf_organism_id = o.organism_id
-            WHERE os.orf_id = ?
-        ''', (str(orf_id),))
-    
-    orf_data = c.fetchone()
+    # The assembled ORF with positions and sources, from its materialized
+    # document where it is clean
+    orf_data = get_orf_document(conn, orf_id)
     
     if not orf_data:
         conn.close()
         return jsonify({'success': False, 'message': 'ORF not found'})
     
-    orf_data = dict(orf_data)
-    
-    # Get position information - ensure string comparison for text IDs
-    c.execute('''
-        SELECT op.*, f.freezer_location, p.plasmid_name
-        FROM orf_position op
-        LEFT JOIN freezer f ON op.freezer_id = f.freezer_id
-        LEFT JOIN plasmid p ON op.plasmid_id = p.plasmid_id
-        WHERE op.orf_id = ?
-    ''', (str(orf_id),))
-    
-    positions = [dict(row) for row in c.fetchall()]
-    orf_data['positions'] = positions
-    
-    # Check if yeast_orf_position table exists
-    c.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='yeast_orf_position'")
-    yeast_table_exists = c.fetchone()
-    
-    yeast_positions = []
-    if yeast_table_exists:
-        # Get yeast position information
-        c.execute('''
-            SELECT * FROM yeast_orf_position
-            WHERE orf_id = ?
-        ''', (str(orf_id),))
-        
-        yeast_positions = [dict(row) for row in c.fetchall()]
-    orf_data['yeast_positions'] = yeast_positions
+    orf_data['hgnc_symbol'] = orf_data.get('hgnc_approved_symbol')
+    orf_data = add_orf_sequence(conn, orf_data)
     
     conn.close()
     return jsonify({'success': True, 'data': orf_data})
@@ -1,14 +1,36 @@
-from flask import render_template, request, jsonify, send_from_directory
+from flask import render_template, request, jsonify, send_from_directory, url_for, Response
 import sqlite3
 import os
+import uuid
+from functools import partial
+import re
+import io
 import csv
 import pandas as pd
 import numpy as np
-from datetime import datetime
 from werkzeug.utils import secure_filename
+from werkzeug.http import parse_options_header
 
-from app import app, DB_PATH
+from app import app, DB_PATH, PACK_SEQUENCES, IMPORT_CHUNK_SIZE, IMPORT_SHEET_WORKERS, FASTA_HEADER_PATTERN
+from app.db_writer import run_write
 from app.utils import allowed_file, create_template_dataframe
+from app.unified_import import unified_csv_chunks, import_unified_chunks, error_messages
+from app.import_jobs import submit_import_job, get_import_job, list_import_jobs, ImportCancelled
+from app.upload_stream import receive_form, UploadFile, UploadPipe, UploadInterrupted
+from app.import_runs import (
+    ImportRunError, import_runs_exist, start_run, resume_run, release_run, finish_run, import_checkpointed,
+    get_run, list_runs, run_errors, run_file_path, record_upload
+)
+from app.import_validation import VALIDATION_RULES, load_key_sets, validate_chunks, report_summary
+from app.import_validation import missing_columns as missing_import_columns
+from app.import_preview import create_import_preview, get_import_preview, KEYED_ENTITIES, APPENDED_ENTITIES
+from app.import_preview import DEFAULT_PAGE_SIZE as PREVIEW_PAGE_SIZE
+from sequence_codec import sequence_text
+from xlsx_reader import sheet_headers, workbook_chunks
+from fasta_reader import is_fasta_file, fasta_chunks, FASTA_COLUMNS
+from parquet_io import (
+    is_parquet_file, parquet_header, parquet_chunks, export_schema, write_parquet, EXPORT_COLUMNS, EXPORT_BATCH_ROWS
+)
 
 def map_column_names(df, import_type):
     """Map alternate column names to expected column names"""
@@ -91,96 +113,603 @@ def map_column_names(df, import_type):
     # Add mappings for other import types if needed
     return df
 
+# Sheet names that mark a sheet of a multi-sheet workbook as one import type
+SHEET_IMPORT_TYPES = {
+    'orf_data': 'unified_position', 'orfs': 'unified_position', 'unified': 'unified_position',
+    'unified_position': 'unified_position',
+    'plasmid': 'plasmid', 'plasmids': 'plasmid',
+    'organism': 'organism', 'organisms': 'organism',
+    'freezer': 'freezer', 'freezers': 'freezer',
+}
+
+def select_import_sheets(file_path, import_type, skipped=None):
+    """
+    Choose the sheets of a workbook to import as `import_type`.
+    
+    A sheet named after `import_type` (see SHEET_IMPORT_TYPES) is imported;
+    a sheet named after another import type is not, as it has to be
+    uploaded as that type. Any other sheet is imported if it has the type's
+    required columns. A workbook with no such sheet imports its first sheet,
+    so the missing columns are reported as before.
+    
+    Args:
+        skipped (list): If given, (sheet name, reason) of each sheet that is
+            not imported is appended to it
+    
+    Returns:
+        list: (sheet name, mapped column names) in workbook order
+    """
+    sheets = []
+    for sheet_name, header in sheet_headers(file_path).items():
+        columns = list(map_column_names(pd.DataFrame(columns=header), import_type).columns)
+        sheets.append((sheet_name, columns))
+    
+    selected, reasons = [], []
+    for sheet_name, columns in sheets:
+        sheet_type = SHEET_IMPORT_TYPES.get(re.sub(r'[\s-]+', '_', sheet_name.strip().lower()))
+        if sheet_type == import_type or (sheet_type is None and not missing_import_columns(import_type, columns)):
+            selected.append((sheet_name, columns))
+        elif sheet_type is not None:
+            reasons.append((sheet_name, f'named for {sheet_type} imports'))
+        else:
+            reasons.append((sheet_name, 'missing required columns'))
+    if not selected:
+        selected = sheets[:1]
+        reasons = reasons[1:]
+    if skipped is not None:
+        skipped.extend(reasons)
+    return selected
+
+def with_skipped_sheets(message, skipped):
+    """A result message followed by a sentence naming the sheets of a workbook that were not imported"""
+    if not skipped:
+        return message
+    if not message.endswith('.'):
+        message += '.'
+    return message + ' Sheets not imported: ' + '; '.join(f"'{sheet_name}' ({reason})"
+                                                           for sheet_name, reason in skipped) + '.'
+
+def read_import_file(file_path, import_type, skip_rows=0, skipped_sheets=None):
+    """
+    Read the header of an import file and map its column names, without
+    reading the rows yet.
+    
+    Args:
+        skip_rows (int): Data rows to leave out of the chunks (see unified_csv_chunks)
+        skipped_sheets (list): For a workbook, (sheet name, reason) of each
+            sheet that is not imported is appended to it (see select_import_sheets)
+    
+    Returns:
+        tuple: (columns, chunks): the mapped column names, and the rows as
+        IMPORT_CHUNK_SIZE-row chunks. For a workbook with several sheets to
+        import, the columns are those every sheet has and the chunks are
+        those of each sheet in turn (see xlsx_reader.workbook_chunks). A
+        FASTA file gives one row per record (see fasta_reader.fasta_chunks)
+    
+    Raises:
+        ValueError: The file is not CSV, Excel, Parquet or FASTA, or it is
+        Parquet and pyarrow is not installed
+    """
+    if is_fasta_file(file_path):
+        return FASTA_COLUMNS, fasta_chunks(file_path, IMPORT_CHUNK_SIZE, skip_rows, FASTA_HEADER_PATTERN)
+    elif file_path.endswith('.csv'):
+        df = pd.read_csv(file_path, nrows=0)
+        
+        # Apply column name mapping to handle alternate column names
+        df = map_column_names(df, import_type)
+        columns = list(df.columns)
+        return columns, unified_csv_chunks(file_path, columns, IMPORT_CHUNK_SIZE, skip_rows)
+    elif file_path.endswith('.xlsx'):
+        # Excel files are streamed sheet by sheet instead of read whole
+        sheets = select_import_sheets(file_path, import_type, skipped_sheets)
+        columns = [column for column in sheets[0][1] if all(column in other for _, other in sheets[1:])]
+        return columns, workbook_chunks(file_path, sheets, IMPORT_CHUNK_SIZE, skip_rows, IMPORT_SHEET_WORKERS)
+    elif is_parquet_file(file_path):
+        # Parquet files are read a batch at a time, with their column types
+        columns = list(map_column_names(pd.DataFrame(columns=parquet_header(file_path)), import_type).columns)
+        return columns, parquet_chunks(file_path, columns, IMPORT_CHUNK_SIZE, skip_rows)
+    else:
+        raise ValueError("Unsupported file format. Please upload a CSV, Excel, Parquet or FASTA file.")
+
+def read_import_stream(stream, import_type, filename):
+    """
+    Read the header of a CSV file as it is uploaded and map its column
+    names, leaving the rows to be read as they arrive. FASTA files are
+    read record by record as they arrive.
+    
+    Args:
+        stream: Binary file object, e.g. an UploadPipe
+        filename (str): Name of the uploaded file, giving its format
+    
+    Returns:
+        tuple: (columns, chunks) as for read_import_file
+    """
+    if is_fasta_file(filename):
+        return FASTA_COLUMNS, fasta_chunks(stream, IMPORT_CHUNK_SIZE, header_pattern=FASTA_HEADER_PATTERN)
+    
+    text = io.TextIOWrapper(io.BufferedReader(stream), encoding='utf-8-sig', newline='')
+    header = text.readline()
+    while header and not header.strip():
+        header = text.readline()
+    
+    # The header line is parsed as read_csv parses a file's header, so
+    # columns are named the same either way
+    df = map_column_names(pd.read_csv(io.StringIO(header), nrows=0), import_type)
+    columns = list(df.columns)
+    return columns, unified_csv_chunks(text, columns, IMPORT_CHUNK_SIZE, header=False)
+
+def upload_path(filename):
+    """A new path for an uploaded file, under a unique name in the upload folder"""
+    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+    return os.path.join(app.config['UPLOAD_FOLDER'], f'{uuid.uuid4().hex}_{secure_filename(filename)}')
+
+def save_upload(file):
+    """Save an uploaded file under a unique name in the upload folder and return its path"""
+    file_path = upload_path(file.filename)
+    file.save(file_path)
+    return file_path
+
 @app.route('/import', methods=['GET'])
 def import_form():
     return render_template('import.html')
 
+# Import types accepted by /import_file
+IMPORT_TYPES = ['orf_sequence', 'orf_position', 'yeast_orf_position', 'unified_position',
+                'orf_sources', 'plasmid', 'organism', 'freezer', 'fasta']
+
+def run_import(import_type, file_path, progress=None, **options):
+    """
+    Import a saved file.
+    
+    Args:
+        import_type (str): One of IMPORT_TYPES
+        file_path (str): Path to the CSV, Excel, Parquet or FASTA file
+        progress: Progress callback for imports that report it (see
+            app/unified_import.import_unified_chunks)
+        options: all_or_nothing, run, filename and upload for unified
+            imports (see import_unified_positions_handler)
+    
+    Returns:
+        tuple: (success, message)
+    """
+    # Streamed uploads and resumed runs have no saved file; both are unified imports
+    if file_path and is_parquet_file(file_path) and import_type not in ('unified_position', 'fasta'):
+        return False, 'Parquet files can only be imported as ORF data (unified)'
+    if import_type == 'orf_sequence':
+        return import_orf_sequences(file_path)
+    elif import_type == 'orf_position':
+        return import_orf_positions(file_path)
+    elif import_type == 'yeast_orf_position':
+        return import_yeast_orf_positions(file_path)
+    elif import_type in ('unified_position', 'fasta'):
+        # Call the new unified positions import; FASTA files give sequence-only rows
+        return import_unified_positions_handler(file_path, progress, **options)
+    elif import_type == 'orf_sources':
+        return import_orf_sources(file_path)
+    elif import_type == 'plasmid':
+        return import_plasmids(file_path)
+    elif import_type == 'organism':
+        return import_organisms(file_path)
+    elif import_type == 'freezer':
+        return import_freezers(file_path)
+    return False, f'Unknown import type: {import_type}'
+
+def form_flag(value):
+    """A checkbox or flag form field as a bool"""
+    return (value or '').lower() in ('1', 'true', 'yes', 'on')
+
 @app.route('/import_file', methods=['POST'])
 def import_file():
-    """Handle file uploads for data import"""
-    import_type = request.form.get('import_type')
+    """
+    Handle file uploads for data import.
     
-    if 'file' not in request.files:
+    The file is imported by a background job (see app/import_jobs.py) and the
+    response gives its ID; follow it at /api/jobs/<job_id>. With wait=1 the
+    request waits for the job and returns its result instead.
+    
+    The request body is read as it arrives (see app/upload_stream.py). An
+    ORF data (unified) CSV file or a FASTA file is parsed by its job while it
+    is still being uploaded, if it is imported checkpointed; the fields sent
+    before the file (import_type, all_or_nothing) apply to it. Other files,
+    and all-or-nothing imports, are written straight to the upload folder and
+    imported once they have arrived.
+    """
+    if request.mimetype != 'multipart/form-data':
         return jsonify({'success': False, 'message': 'No file part'})
     
+    upload = {}
+    
+    def open_file(fields, name, filename):
+        # Only the first file part is imported, and only if it can be
+        if name != 'file' or 'filename' in upload:
+            return None
+        upload['filename'] = filename
+        if not filename or not allowed_file(filename):
+            return None
+        
+        import_type = fields.get('import_type')
+        upload['filename'] = secure_filename(filename)
+        if import_type in ('unified_position', 'fasta') and (upload['filename'].lower().endswith('.csv')
+                                                           or is_fasta_file(upload['filename'])):
+            # A checkpointed import parses the file as it arrives, each chunk
+            # its own write, and records a run, which needs a copy of the file
+            # to resume from. An all-or-nothing import is one write, which
+            # must not wait on the network while it holds the database
+            # writer, so its file is saved first like any other
+            conn = sqlite3.connect(DB_PATH)
+            try:
+                streamed = not form_flag(fields.get('all_or_nothing')) and import_runs_exist(conn)
+            finally:
+                conn.close()
+            if streamed:
+                pipe = UploadPipe(run_file_path(upload['filename']))
+                upload['job'] = submit_import_job(
+                    import_type, upload['filename'], None,
+                    partial(run_import, filename=upload['filename'], upload=pipe),
+                    upload=pipe
+                )
+                return pipe
+        
+        # Jobs run side by side, so each upload gets its own file; the job
+        # deletes it when it is done
+        upload['file_path'] = upload_path(upload['filename'])
+        return UploadFile(upload['file_path'])
+    
+    boundary = parse_options_header(request.content_type)[1].get('boundary', '')
+    try:
+        form = receive_form(request.stream, boundary.encode(), open_file)
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Error receiving upload: {str(e)}'}), 400
+    
+    import_type = form.get('import_type')
+    job = upload.get('job')
+    if job is None:
+        error = None
+        if 'filename' not in upload:
+            error = 'No file part'
+        elif not upload['filename']:
+            error = 'No selected file'
+        elif import_type not in IMPORT_TYPES:
+            error = f'Unknown import type: {import_type}'
+        elif 'file_path' not in upload:
+            error = 'Invalid file format. Please upload a CSV, Excel, Parquet or FASTA file.'
+        if error:
+            if upload.get('file_path') and os.path.exists(upload['file_path']):
+                os.unlink(upload['file_path'])
+            return jsonify({'success': False, 'message': error})
+        
+        job = submit_import_job(import_type, upload['filename'], upload['file_path'],
+                                partial(run_import, all_or_nothing=form_flag(form.get('all_or_nothing')),
+                                        filename=upload['filename']))
+    
+    if form_flag(form.get('wait')):
+        job.wait()
+        return jsonify({'success': job.success, 'message': job.message, 'job_id': job.id})
+    
+    return jsonify({
+        'success': True,
+        'job_id': job.id,
+        'status_url': url_for('get_import_job_status', job_id=job.id),
+        'message': f'Import of {upload["filename"]} started'
+    }), 202
+
+@app.route('/api/jobs', methods=['GET'])
+def list_import_job_statuses():
+    """List the import jobs of this process, newest first"""
+    return jsonify({'success': True, 'jobs': [job.to_dict() for job in list_import_jobs()]})
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_import_job_status(job_id):
+    """Return the status and progress of an import job"""
+    job = get_import_job(job_id)
+    if job is None:
+        return jsonify({'success': False, 'message': f'Unknown job: {job_id}'}), 404
+    return jsonify(dict(job.to_dict(), success=True, import_success=job.success))
+
+@app.route('/api/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_import_job(job_id):
+    """Cancel an import job; what it has not committed is rolled back"""
+    job = get_import_job(job_id)
+    if job is None:
+        return jsonify({'success': False, 'message': f'Unknown job: {job_id}'}), 404
+    if not job.cancel():
+        return jsonify({'success': False, 'message': f'Job already {job.status}', 'status': job.status}), 409
+    return jsonify({'success': True, 'message': 'Cancellation requested', 'status': job.status})
+
+@app.route('/api/import_runs', methods=['GET'])
+def list_import_run_statuses():
+    """List recent checkpointed import runs, newest first"""
+    return jsonify({'success': True, 'runs': list_runs(request.args.get('limit', 50, type=int))})
+
+@app.route('/api/import_runs/<run_id>', methods=['GET'])
+def get_import_run_status(run_id):
+    """Return an import run with the errors of its committed rows"""
+    run = get_run(run_id)
+    if run is None:
+        return jsonify({'success': False, 'message': f'Unknown import run: {run_id}'}), 404
+    return jsonify(dict(run, success=True, errors=error_messages(run_errors(run_id))))
+
+@app.route('/api/import_runs/<run_id>/resume', methods=['POST'])
+def resume_import_run(run_id):
+    """
+    Resume a failed, cancelled or interrupted import run from its last
+    checkpoint, as a background job. With wait=1 the request waits for the
+    job and returns its result instead.
+    """
+    if get_run(run_id) is None:
+        return jsonify({'success': False, 'message': f'Unknown import run: {run_id}'}), 404
+    
+    # Claimed here, so a second request for the same run is turned away
+    # instead of starting a second job
+    try:
+        run = resume_run(run_id)
+    except ImportRunError as e:
+        run = get_run(run_id)
+        return jsonify({'success': False, 'message': str(e), 'status': run['status'] if run else None}), 409
+    
+    # The run keeps its own file, so the job has no upload to delete
+    job = submit_import_job(run['import_type'], run['filename'], None, partial(run_import, run=run))
+    
+    if request.form.get('wait', '').lower() in ('1', 'true', 'yes'):
+        job.wait()
+        return jsonify({'success': job.success, 'message': job.message, 'job_id': job.id})
+    
+    return jsonify({
+        'success': True,
+        'job_id': job.id,
+        'status_url': url_for('get_import_job_status', job_id=job.id),
+        'message': f"Resuming import of {run['filename']} after row {run['rows_committed']}"
+    }), 202
+
+@app.route('/validate_file', methods=['POST'])
+def validate_file():
+    """
+    Check an import file without importing it (dry run).
+    
+    Returns every problem found with its row, column, value and severity (see
+    app/import_validation.py), as JSON or, with format=csv, as a CSV report.
+    """
+    import_type = request.form.get('import_type')
+    
+    if 'file' not in request.files or request.files['file'].filename == '':
+        return jsonify({'success': False, 'message': 'No selected file'})
+    
+    if import_type not in VALIDATION_RULES:
+        return jsonify({'success': False, 'message': f'Unknown import type: {import_type}'})
+    
     file = request.files['file']
+    if not allowed_file(file.filename):
+        return jsonify({'success': False, 'message': 'Invalid file format. Please upload a CSV, Excel, Parquet or FASTA file.'})
+    
+    filename = secure_filename(file.filename)
+    file_path = save_upload(file)
+    # FASTA files are checked as the sequence rows they import as
+    if import_type in ('unified_position', 'orf_sequence') and is_fasta_file(file_path):
+        import_type = 'fasta'
     
-    if file.filename == '':
+    try:
+        # Check the header before reading any rows, as the import does
+        skipped_sheets = []
+        columns, chunks = read_import_file(file_path, import_type, skipped_sheets=skipped_sheets)
+        missing = missing_import_columns(import_type, columns)
+        if missing:
+            return jsonify({'success': True, 'valid': False,
+                            'message': f"Missing required columns: {', '.join(missing)}",
+                            'missing_columns': missing, 'issues': []})
+        
+        # The database is only read for the ID sets of referenced tables
+        conn = sqlite3.connect(DB_PATH)
+        try:
+            key_sets = load_key_sets(conn, import_type)
+        finally:
+            conn.close()
+        
+        row_count, report = validate_chunks(import_type, chunks, key_sets)
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Error reading file: {str(e)}'})
+    finally:
+        if os.path.exists(file_path):
+            os.unlink(file_path)
+    
+    if request.form.get('format') == 'csv':
+        report_name = f'{os.path.splitext(filename)[0]}_validation.csv'
+        return Response(report.to_csv(index=False), mimetype='text/csv',
+                        headers={'Content-Disposition': f'attachment; filename={report_name}'})
+    
+    summary = report_summary(row_count, report)
+    if summary['valid']:
+        message = f"{row_count} rows checked: no errors, {summary['warning_count']} warnings"
+    else:
+        message = (f"{row_count} rows checked: {summary['error_count']} errors in "
+                   f"{summary['rows_with_errors']} rows, {summary['warning_count']} warnings")
+    message = with_skipped_sheets(message, skipped_sheets)
+    return jsonify(dict(summary, success=True, message=message, issues=report.to_dict('records')))
+
+@app.route('/preview_file', methods=['POST'])
+def preview_file():
+    """
+    Preview the changes a unified import would make, without importing it.
+    
+    Returns the number of organisms, freezers, plasmids and ORFs the file
+    would insert, update or leave unchanged, and of positions and sources it
+    would add, with the first page of the per-row changes. Further pages are
+    read from /api/previews/<preview_id>. See app/import_preview.py.
+    """
+    import_type = request.form.get('import_type', 'unified_position')
+    
+    if 'file' not in request.files or request.files['file'].filename == '':
         return jsonify({'success': False, 'message': 'No selected file'})
     
-    if file and allowed_file(file.filename):
-        filename = secure_filename(file.filename)
-        file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+    if import_type not in ('unified_position', 'orf_sequence', 'orf_position', 'yeast_orf_position', 'orf_sources',
+                           'fasta'):
+        return jsonify({'success': False, 'message': 'Previews are only available for ORF data (unified) imports'})
+    
+    file = request.files['file']
+    if not allowed_file(file.filename):
+        return jsonify({'success': False, 'message': 'Invalid file format. Please upload a CSV, Excel, Parquet or FASTA file.'})
+    
+    filename = secure_filename(file.filename)
+    file_path = save_upload(file)
+    
+    try:
+        # FASTA files are previewed as the sequence rows they import as
+        import_type = 'fasta' if is_fasta_file(file_path) else 'unified_position'
+        columns, chunks = read_import_file(file_path, import_type)
+        missing = missing_import_columns(import_type, columns)
+        if missing:
+            return jsonify({'success': False, 'message': f"Missing required columns: {', '.join(missing)}"})
         
-        # Create upload directory if it doesn't exist
-        os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+        preview = create_import_preview(DB_PATH, filename, chunks, PACK_SEQUENCES)
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Error reading file: {str(e)}'})
+    finally:
+        if os.path.exists(file_path):
+            os.unlink(file_path)
+    
+    return jsonify(dict(preview.to_dict(), **preview.page(), success=True))
+
+@app.route('/api/previews/<preview_id>', methods=['GET'])
+def get_import_preview_page(preview_id):
+    """
+    Page through the changes of a preview.
+    
+    Query parameters:
+        entity: Only changes of this entity (organisms, orfs, entry_positions, ...)
+        action: Only changes with this action (insert, update, unchanged, already_present, rejected)
+        offset: Number of changes to skip
+        limit: Page size (default 100, max 1000)
+    """
+    preview = get_import_preview(preview_id)
+    if preview is None:
+        return jsonify({'success': False, 'message': f'Unknown preview: {preview_id}'}), 404
+    
+    entity = request.args.get('entity')
+    if entity is not None and entity not in KEYED_ENTITIES and entity not in APPENDED_ENTITIES:
+        return jsonify({'success': False, 'message': f'Unknown entity: {entity}'}), 400
+    try:
+        offset = int(request.args.get('offset', 0))
+        limit = int(request.args.get('limit', PREVIEW_PAGE_SIZE))
+    except ValueError:
+        return jsonify({'success': False, 'message': 'offset and limit must be integers'}), 400
+    
+    page = preview.page(entity, request.args.get('action'), offset, limit)
+    return jsonify(dict(page, success=True, preview_id=preview.id, summary=preview.summary))
+
+def import_result_message(stats, errors):
+    """
+    Summarize a unified import.
+    
+    Args:
+        stats (dict): Record counters
+        errors (list): Error messages in sheet order
+    
+    Returns:
+        tuple: (success, message)
+    """
+    # Check if we have successfully imported anything
+    total_imports = sum([stats['sequences'], stats['entry_positions'], 
+                       stats['yeast_ad_positions'], stats['yeast_db_positions'], 
+                       stats['sources'], stats['organisms'], stats['freezers'], 
+                       stats['plasmids']])
+    
+    if total_imports > 0:
+        # Generate success message
+        success_details = []
+        if stats['sequences'] > 0:
+            success_details.append(f"{stats['sequences']} ORF sequences")
+        if stats['entry_positions'] > 0:
+            success_details.append(f"{stats['entry_positions']} entry positions")
+        if stats['yeast_ad_positions'] > 0:
+            success_details.append(f"{stats['yeast_ad_positions']} yeast AD positions")
+        if stats['yeast_db_positions'] > 0:
+            success_details.append(f"{stats['yeast_db_positions']} yeast DB positions")
+        if stats['organisms'] > 0:
+            success_details.append(f"{stats['organisms']} organisms")
+        if stats['freezers'] > 0:
+            success_details.append(f"{stats['freezers']} freezers")
+        if stats['plasmids'] > 0:
+            success_details.append(f"{stats['plasmids']} plasmids")
+        if stats['sources'] > 0:
+            success_details.append(f"{stats['sources']} source records")
         
-        # Save the uploaded file
-        file.save(file_path)
+        success_message = f"Successfully imported {', '.join(success_details)}"
+        if stats.get('unchanged'):
+            success_message += f" and skipped {stats['unchanged']} unchanged records"
         
-        try:
-            # Handle different import types
-            if import_type == 'orf_sequence':
-                success, message = import_orf_sequences(file_path)
-            elif import_type == 'orf_position':
-                success, message = import_orf_positions(file_path)
-            elif import_type == 'yeast_orf_position':
-                success, message = import_yeast_orf_positions(file_path)
-            elif import_type == 'unified_position':
-                # Call the new unified positions import
-                success, message = import_unified_positions_handler(file_path)
-            elif import_type == 'orf_sources':
-                success, message = import_orf_sources(file_path)
-            elif import_type == 'plasmid':
-                success, message = import_plasmids(file_path)
-            elif import_type == 'organism':
-                success, message = import_organisms(file_path)
-            elif import_type == 'freezer':
-                success, message = import_freezers(file_path)
+        # Add warning about errors if any occurred
+        if errors:
+            error_count = len(errors)
+            success_message += f". Warning: {error_count} error(s) occurred during import."
+            if error_count <= 5:
+                success_message += " Errors: " + "; ".join(errors)
             else:
-                return jsonify({'success': False, 'message': f'Unknown import type: {import_type}'})
-            
-            return jsonify({'success': success, 'message': message})
-            
-        except Exception as e:
-            app.logger.error(f"Error during import: {str(e)}")
-            app.logger.error(traceback.format_exc())
-            return jsonify({'success': False, 'message': f'Error during import: {str(e)}'})
+                success_message += " First 5 errors: " + "; ".join(errors[:5]) + "..."
         
-        finally:
-            # Clean up the uploaded file
-            if os.path.exists(file_path):
-                os.unlink(file_path)
+        return True, success_message
+    elif stats.get('unchanged'):
+        message = f"No changes: all {stats['unchanged']} records are unchanged since they were last imported"
+        if errors:
+            message += f". Warning: {len(errors)} error(s) occurred during import. First errors: " + "; ".join(errors[:5])
+        return True, message
+    else:
+        return False, f"No records were imported. Check for errors: {'; '.join(errors[:5])}"
+
+def import_unified_positions_handler(file_path, progress=None, all_or_nothing=False, run=None, filename=None,
+                                     upload=None):
+    """
+    Import unified ORF data (sequences, positions, sources, and related entities)
+    
+    FASTA files are imported the same way, one row per record with the ORF
+    fields taken from its header (see fasta_reader.py).
+    
+    Rows are read and written IMPORT_CHUNK_SIZE at a time. By default each
+    chunk is committed with a checkpoint in import_runs, so a failed or
+    cancelled import keeps what it committed and can be resumed (see
+    app/import_runs.py); with all_or_nothing the whole file is one write.
+    progress, if given, is called with (rows_parsed, rows_written, stats,
+    errors) as each chunk is parsed and written (see import_unified_chunks).
     
-    return jsonify({'success': False, 'message': 'Invalid file format. Please upload a CSV or Excel file.'})
+    Args:
+        file_path (str): Path to the CSV, Excel, Parquet or FASTA file; ignored when resuming
+            or reading an upload
+        all_or_nothing (bool): Write the whole file or nothing
+        run (dict): Resume this import run, claimed with resume_run, from
+            its last checkpoint; it is released when the import is over
+        filename (str): Name the file was uploaded as, recorded with the run
+        upload (UploadPipe): A CSV or FASTA file being uploaded, read as it
+            arrives by a checkpointed import; its copy is the run's file
+    """
+    try:
+        return _import_unified(file_path, progress, all_or_nothing, run, filename, upload)
+    finally:
+        if run is not None:
+            release_run(run)
 
-def import_unified_positions_handler(file_path):
-    """Import unified ORF data (sequences, positions, sources, and related entities)"""
-    # Load the file as a DataFrame
+def _import_unified(file_path, progress, all_or_nothing, run, filename, upload):
+    """import_unified_positions_handler, which releases the run when it is over"""
+    resuming = run is not None
+    if resuming:
+        file_path = run['file_path']
+    
+    if upload is None and not (file_path.endswith(('.csv', '.xlsx')) or is_fasta_file(file_path)
+                               or is_parquet_file(file_path)):
+        return False, "Unsupported file format. Please upload a CSV, Excel, Parquet or FASTA file."
+    # FASTA files only have the sequence columns, checked by their own rules
+    import_type = 'fasta' if is_fasta_file(filename if upload is not None else file_path) else 'unified_position'
+    
+    # Check the header before reading any rows
+    skipped_sheets = []
     try:
-        if file_path.endswith('.csv'):
-            df = pd.read_csv(file_path)
-        elif file_path.endswith('.xlsx'):
-            df = pd.read_excel(file_path)
+        if upload is not None:
+            columns, chunks = read_import_stream(upload, import_type, filename)
         else:
-            return False, "Unsupported file format. Please upload a CSV or Excel file."
-        
-        # Apply column name mapping to handle alternate column names
-        df = map_column_names(df, 'unified_position')
+            columns, chunks = read_import_file(file_path, import_type, skipped_sheets=skipped_sheets)
         
         # Validate at least minimal required columns
-        required_columns = ['orf_id', 'orf_name', 'source_name']
-        missing_columns = [col for col in required_columns if col not in df.columns]
+        missing_columns = missing_import_columns(import_type, columns)
         if missing_columns:
             return False, f"Missing required columns: {', '.join(missing_columns)}"
         
-        # Connect to the database
-        conn = sqlite3.connect(DB_PATH)
-        c = conn.cursor()
-        
-        # Start a transaction
-        c.execute('BEGIN TRANSACTION')
-        
         # Processing stats
         stats = {
             'sequences': 0,
@@ -191,341 +720,128 @@ def import_unified_positions_handler(file_path):
             'organisms': 0,
             'freezers': 0,
             'plasmids': 0,
-            'errors': []
+            'unchanged': 0
         }
         
+        conn = sqlite3.connect(DB_PATH)
         try:
-            # Process each row
-            for idx, row in df.iterrows():
-                # Skip template header rows
-                if row['orf_id'] == 'Required' or row['orf_id'] == 'ORF999' or \
-                   str(row['orf_id']).lower() == 'orf_id':
-                    continue
-                
-                orf_id = row['orf_id']
-                
-                # Verify each required field is present and not null
-                if pd.isna(row['orf_id']) or pd.isna(row['orf_name']):
-                    stats['errors'].append(f"Row {idx + 2}: Missing required value (orf_id, orf_name)")
-                    continue
-                
-                # Helper function to parse position string in "Plate-Well" format
-                def parse_position(position_str):
-                    if pd.isna(position_str) or not position_str.strip():
-                        return None, None
-                    
-                    position_str = position_str.strip()
-                    parts = position_str.split('-')
-                    
-                    if len(parts) != 2:
-                        # Try other common separators
-                        if ':' in position_str:
-                            parts = position_str.split(':')
-                        elif '_' in position_str:
-                            parts = position_str.split('_')
-                        elif ' ' in position_str:
-                            parts = position_str.split(' ', 1)
-                        else:
-                            # Try to intelligently split if no separator
-                            # Find the position of the first digit
-                            import re
-                            match = re.search(r'\d', position_str)
-                            if match:
-                                digit_pos = match.start()
-                                if digit_pos > 0:
-                                    parts = [position_str[:digit_pos].strip(), position_str[digit_pos:].strip()]
-                                else:
-                                    return position_str, ''
-                            else:
-                                return position_str, ''
-                    
-                    if len(parts) == 2:
-                        return parts[0].strip(), parts[1].strip()
-                    else:
-                        return position_str, ''
-                
-                # Helper function to safely get string value from DataFrame
-                def safe_get(column, default=''):
-                    if column in row and not pd.isna(row[column]):
-                        return str(row[column]).strip()
-                    return default
-                
-                # Helper function to parse boolean values
-                def parse_boolean(value):
-                    if pd.isna(value):
-                        return 0
-                    value = str(value).lower().strip()
-                    return 1 if value in ['yes', 'true', '1', 'y', 't'] else 0
-                
-                # Determine which record types to create
-                has_sequence = 'orf_sequence' in df.columns and not pd.isna(row.get('orf_sequence'))
-                
-                # Check if position fields are provided
-                entry_position = not pd.isna(row.get('entry_position', '')) and row.get('entry_position', '').strip() != ''
-                yeast_ad_position = not pd.isna(row.get('yeast_ad_position', '')) and row.get('yeast_ad_position', '').strip() != ''
-                yeast_db_position = not pd.isna(row.get('yeast_db_position', '')) and row.get('yeast_db_position', '').strip() != ''
-                
-                # Parse position data
-                entry_plate, entry_well = parse_position(row.get('entry_position', '')) if entry_position else (None, None)
-                ad_plate, ad_well = parse_position(row.get('yeast_ad_position', '')) if yeast_ad_position else (None, None)
-                db_plate, db_well = parse_position(row.get('yeast_db_position', '')) if yeast_db_position else (None, None)
-                
-                # Check for related entity data
-                has_source = safe_get('source_name') != ''
-                has_organism = safe_get('organism_id') != '' or safe_get('organism_name') != ''
-                has_freezer = safe_get('freezer_id') != '' or safe_get('freezer_location') != ''
-                has_plasmid = safe_get('plasmid_id') != '' or safe_get('plasmid_name') != ''
-                
-                # 1. Create/update organism if provided
-                organism_id = safe_get('organism_id')
-                if has_organism:
-                    try:
-                        if organism_id:
-                            # Check if organism exists
-                            c.execute("SELECT 1 FROM organisms WHERE organism_id = ?", (organism_id,))
-                            organism_exists = c.fetchone() is not None
-                            
-                            # Either update existing or create new
-                            organism_name = safe_get('organism_name')
-                            organism_genus = safe_get('organism_genus')
-                            organism_species = safe_get('organism_species')
-                            organism_strain = safe_get('organism_strain')
-                            
-                            if organism_exists:
-                                c.execute('''
-                                    UPDATE organisms 
-                                    SET organism_name = ?, organism_genus = ?, organism_species = ?, organism_strain = ?
-                                    WHERE organism_id = ?
-                                ''', (organism_name, organism_genus, organism_species, organism_strain, organism_id))
-                            else:
-                                c.execute('''
-                                    INSERT INTO organisms (organism_id, organism_name, organism_genus, organism_species, organism_strain)
-                                    VALUES (?, ?, ?, ?, ?)
-                                ''', (organism_id, organism_name, organism_genus, organism_species, organism_strain))
-                            stats['organisms'] += 1
-                    except Exception as e:
-                        stats['errors'].append(f"Row {idx + 2}: Error with organism data: {str(e)}")
-                
-                # 2. Create/update freezer if provided
-                freezer_id = safe_get('freezer_id')
-                if has_freezer:
-                    try:
-                        if freezer_id:
-                            # Check if freezer exists
-                            c.execute("SELECT 1 FROM freezer WHERE freezer_id = ?", (freezer_id,))
-                            freezer_exists = c.fetchone() is not None
-                            
-                            # Either update existing or create new
-                            freezer_location = safe_get('freezer_location')
-                            freezer_condition = safe_get('freezer_condition')
-                            freezer_date = safe_get('freezer_date', datetime.now().strftime('%Y-%m-%d'))
-                            
-                            if freezer_exists:
-                                c.execute('''
-                                    UPDATE freezer 
-                                    SET freezer_location = ?, freezer_condition = ?, freezer_date = ?
-                                    WHERE freezer_id = ?
-                                ''', (freezer_location, freezer_condition, freezer_date, freezer_id))
-                            else:
-                                c.execute('''
-                                    INSERT INTO freezer (freezer_id, freezer_location, freezer_condition, freezer_date)
-                                    VALUES (?, ?, ?, ?)
-                                ''', (freezer_id, freezer_location, freezer_condition, freezer_date))
-                            stats['freezers'] += 1
-                    except Exception as e:
-                        stats['errors'].append(f"Row {idx + 2}: Error with freezer data: {str(e)}")
-                
-                # 3. Create/update plasmid if provided
-                plasmid_id = safe_get('plasmid_id')
-                if has_plasmid:
-                    try:
-                        if plasmid_id:
-                            # Check if plasmid exists
-                            c.execute("SELECT 1 FROM plasmid WHERE plasmid_id = ?", (plasmid_id,))
-                            plasmid_exists = c.fetchone() is not None
-                            
-                            # Either update existing or create new
-                            plasmid_name = safe_get('plasmid_name')
-                            plasmid_type = safe_get('plasmid_type')
-                            plasmid_express_organism = safe_get('plasmid_express_organism')
-                            plasmid_description = safe_get('plasmid_description')
-                            
-                            if plasmid_exists:
-                                c.execute('''
-                                    UPDATE plasmid 
-                                    SET plasmid_name = ?, plasmid_type = ?, plasmid_express_organism = ?, plasmid_description = ?
-                                    WHERE plasmid_id = ?
-                                ''', (plasmid_name, plasmid_type, plasmid_express_organism, plasmid_description, plasmid_id))
-                            else:
-                                c.execute('''
-                                    INSERT INTO plasmid (plasmid_id, plasmid_name, plasmid_type, plasmid_express_organism, plasmid_description)
-                                    VALUES (?, ?, ?, ?, ?)
-                                ''', (plasmid_id, plasmid_name, plasmid_type, plasmid_express_organism, plasmid_description))
-                            stats['plasmids'] += 1
-                    except Exception as e:
-                        stats['errors'].append(f"Row {idx + 2}: Error with plasmid data: {str(e)}")
-                
-                # 4. Insert/update ORF sequence if provided
-                if has_sequence:
-                    try:
-                        orf_sequence = row['orf_sequence']
-                        orf_name = row['orf_name']
-                        orf_annotation = safe_get('orf_annotation')
-                        
-                        # Handle boolean fields
-                        orf_with_stop = parse_boolean(row.get('orf_with_stop', 0))
-                        orf_open = parse_boolean(row.get('orf_open', 0))
-                        
-                        # Handle potentially missing fields
-                        orf_organism_id = safe_get('organism_id')
-                        orf_length_bp = int(row.get('orf_length_bp', 0)) if not pd.isna(row.get('orf_length_bp', 0)) else 0
-                        orf_entrez_id = safe_get('orf_entrez_id')
-                        orf_ensembl_id = safe_get('orf_ensembl_id')
-                        orf_uniprot_id = safe_get('orf_uniprot_id')
-                        orf_ref_url = safe_get('orf_ref_url')
-                        
-                        # Insert or update the sequence
-                        c.execute('''
-                            INSERT OR REPLACE INTO orf_sequence (
-                                orf_id, orf_name, orf_annotation, orf_sequence, orf_with_stop, orf_open,
-                                orf_organism_id, orf_length_bp, orf_entrez_id, orf_ensembl_id, orf_uniprot_id, orf_ref_url
-                            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                        ''', (
-                            orf_id, orf_name, orf_annotation, orf_sequence, 
-                            orf_with_stop, orf_open, orf_organism_id, orf_length_bp, 
-                            orf_entrez_id, orf_ensembl_id, orf_uniprot_id, orf_ref_url
-                        ))
-                        stats['sequences'] += 1
-                    except Exception as e:
-                        stats['errors'].append(f"Row {idx + 2}: Error inserting sequence: {str(e)}")
-                
-                # 5. Insert entry position if provided
-                if entry_position and entry_plate and entry_well:
-                    try:
-                        c.execute('''
-                            INSERT INTO orf_position (
-                                orf_id, plate, well, freezer_id, plasmid_id, orf_create_date
-                            ) VALUES (?, ?, ?, ?, ?, ?)
-                        ''', (
-                            orf_id, entry_plate, entry_well, freezer_id, plasmid_id, 
-                            datetime.now().strftime('%Y-%m-%d')
-                        ))
-                        stats['entry_positions'] += 1
-                    except sqlite3.IntegrityError:
-                        stats['errors'].append(f"Row {idx + 2}: Entry position already exists (orf_id: {orf_id}, plate: {entry_plate}, well: {entry_well})")
-                    except Exception as e:
-                        stats['errors'].append(f"Row {idx + 2}: Error inserting entry position: {str(e)}")
-                
-                # 6. Insert yeast AD position if provided
-                if yeast_ad_position and ad_plate and ad_well:
-                    try:
-                        c.execute('''
-                            INSERT INTO yeast_orf_position (
-                                orf_id, plate, well, position_type
-                            ) VALUES (?, ?, ?, ?)
-                        ''', (
-                            orf_id, ad_plate, ad_well, 'AD'
-                        ))
-                        stats['yeast_ad_positions'] += 1
-                    except sqlite3.IntegrityError:
-                        stats['errors'].append(f"Row {idx + 2}: Yeast AD position already exists (orf_id: {orf_id}, plate: {ad_plate}, well: {ad_well})")
-                    except Exception as e:
-                        stats['errors'].append(f"Row {idx + 2}: Error inserting yeast AD position: {str(e)}")
-                
-                # 7. Insert yeast DB position if provided
-                if yeast_db_position and db_plate and db_well:
-                    try:
-                        c.execute('''
-                            INSERT INTO yeast_orf_position (
-                                orf_id, plate, well, position_type
-                            ) VALUES (?, ?, ?, ?)
-                        ''', (
-                            orf_id, db_plate, db_well, 'DB'
-                        ))
-                        stats['yeast_db_positions'] += 1
-                    except sqlite3.IntegrityError:
-                        stats['errors'].append(f"Row {idx + 2}: Yeast DB position already exists (orf_id: {orf_id}, plate: {db_plate}, well: {db_well})")
-                    except Exception as e:
-                        stats['errors'].append(f"Row {idx + 2}: Error inserting yeast DB position: {str(e)}")
-                
-                # 8. Insert source information for traceability
-                if has_source:
-                    try:
-                        source_name = safe_get('source_name', 'Unknown Source')
-                        source_details = safe_get('source_details')
-                        source_url = safe_get('source_url')
-                        submission_date = safe_get('submission_date', datetime.now().strftime('%Y-%m-%d'))
-                        submitter = safe_get('submitter')
-                        notes = safe_get('notes')
-                        
-                        # Create a source attribution
-                        c.execute('''
-                            INSERT INTO orf_sources (
-                                orf_id, source_name, source_details, source_url, submission_date, submitter, notes
-                            ) VALUES (?, ?, ?, ?, ?, ?, ?)
-                        ''', (
-                            orf_id, source_name, source_details, source_url, submission_date, submitter, notes
-                        ))
-                        stats['sources'] += 1
-                    except Exception as e:
-                        stats['errors'].append(f"Row {idx + 2}: Error inserting source information: {str(e)}")
+            checkpointed = not all_or_nothing and import_runs_exist(conn)
+        finally:
+            conn.close()
+        # Only checkpointed imports read an upload as it arrives: the single
+        # write of an all-or-nothing import would hold the database writer
+        # while it waited on the network
+        if upload is not None and (not checkpointed or upload.copy_path is None):
+            return False, "An upload can only be imported as it arrives by a checkpointed import"
+        
+        if not checkpointed:
+            errors = []
             
-            # Check if we have successfully imported anything
-            total_imports = sum([stats['sequences'], stats['entry_positions'], 
-                               stats['yeast_ad_positions'], stats['yeast_db_positions'], 
-                               stats['sources'], stats['organisms'], stats['freezers'], 
-                               stats['plasmids']])
+            # All rows are written as one unit on the database writer; chunks are
+            # read, parsed column by column and written in batches one at a time
+            def write_rows(conn):
+                import_unified_chunks(conn, chunks, stats, errors, PACK_SEQUENCES, progress)
             
-            if total_imports > 0:
-                c.execute('COMMIT')
-                
-                # Generate success message
-                success_details = []
-                if stats['sequences'] > 0:
-                    success_details.append(f"{stats['sequences']} ORF sequences")
-                if stats['entry_positions'] > 0:
-                    success_details.append(f"{stats['entry_positions']} entry positions")
-                if stats['yeast_ad_positions'] > 0:
-                    success_details.append(f"{stats['yeast_ad_positions']} yeast AD positions")
-                if stats['yeast_db_positions'] > 0:
-                    success_details.append(f"{stats['yeast_db_positions']} yeast DB positions")
-                if stats['organisms'] > 0:
-                    success_details.append(f"{stats['organisms']} organisms")
-                if stats['freezers'] > 0:
-                    success_details.append(f"{stats['freezers']} freezers")
-                if stats['plasmids'] > 0:
-                    success_details.append(f"{stats['plasmids']} plasmids")
-                if stats['sources'] > 0:
-                    success_details.append(f"{stats['sources']} source records")
-                
-                success_message = f"Successfully imported {', '.join(success_details)}"
-                
-                # Add warning about errors if any occurred
-                if stats['errors']:
-                    error_count = len(stats['errors'])
-                    success_message += f". Warning: {error_count} error(s) occurred during import."
-                    if error_count <= 5:
-                        success_message += " Errors: " + "; ".join(stats['errors'])
-                    else:
-                        success_message += " First 5 errors: " + "; ".join(stats['errors'][:5]) + "..."
-                
-                return True, success_message
-            else:
-                c.execute('ROLLBACK')
-                return False, f"No records were imported. Check for errors: {'; '.join(stats['errors'][:5])}"
-                
+            try:
+                run_write(write_rows)
+            except ImportCancelled:
+                return False, 'Import cancelled; no changes were saved'
+            except Exception as e:
+                return False, f"Error during import: {str(e)}"
+            success, message = import_result_message(stats, error_messages(errors))
+            # Sheets of a workbook left out of the import are named in its result
+            return success, with_skipped_sheets(message, skipped_sheets)
+        
+        # Checkpointed: commit chunk by chunk, continuing after the committed
+        # rows when resuming
+        if upload is not None:
+            # The copy is written as the file arrives; the run can be resumed
+            # once all of it is there
+            run = start_run(import_type, filename, upload.copy_path, uploading=True)
+            upload.claim_copy(partial(record_upload, run['run_id']))
+        elif not resuming:
+            run = start_run(import_type, filename or os.path.basename(file_path), file_path)
+        
+        # The run is finished before it is released, so it is never free to
+        # be claimed while still marked running by this import
+        try:
+            if upload is None:
+                columns, chunks = read_import_file(run['file_path'], import_type, run['rows_committed'])
+            stats.update(run['stats'])
+            import_checkpointed(run, chunks, stats, PACK_SEQUENCES, progress)
+            success, message = import_result_message(stats, error_messages(run_errors(run['run_id'])))
+            message = with_skipped_sheets(message, skipped_sheets)
+            finish_run(run, 'completed', message)
+            return success, message
+        except ImportRunError as e:
+            # This import does not hold the run, so it must not finish it
+            return False, str(e)
         except Exception as e:
-            c.execute('ROLLBACK')
-            return False, f"Error during import: {str(e)}"
-            
+            rows_committed = get_run(run['run_id'])['rows_committed']
+            if isinstance(e, UploadInterrupted):
+                message = f"{str(e)}. The first {rows_committed} rows are saved; upload the file again to import the rest."
+            else:
+                reason = 'Import cancelled' if isinstance(e, ImportCancelled) else f'Error during import: {str(e)}'
+                message = (f"{reason}. The first {rows_committed} rows are saved; resume import run "
+                           f"{run['run_id']} to continue after sheet row {rows_committed + 1}.")
+                message = with_skipped_sheets(message, skipped_sheets)
+            finish_run(run, 'cancelled' if isinstance(e, ImportCancelled) else 'failed', message)
+            return False, message
         finally:
-            conn.close()
+            release_run(run)
             
     except Exception as e:
         return False, f"Error processing file: {str(e)}"
 
+def export_parquet_tables(conn, export_dir):
+    """
+    Export every table to <table>.parquet with its schema in
+    parquet_io.EXPORT_COLUMNS, reading EXPORT_BATCH_ROWS rows at a time.
+    Tables the database does not have yet are left out.
+    
+    Returns:
+        dict: Table -> rows written
+    """
+    c = conn.cursor()
+    c.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'view')")
+    tables = {row[0] for row in c.fetchall()}
+    
+    counts = {}
+    for table, columns in EXPORT_COLUMNS.items():
+        if table not in tables:
+            continue
+        c.execute(f"PRAGMA table_info({table})")
+        table_columns = [column[1] for column in c.fetchall()]
+        # Yeast positions from before position_type are AD positions, its default
+        select_list = [column if column in table_columns else ("'AD'" if column == 'position_type' else 'NULL')
+                       for column, _ in columns]
+        if table == 'orf_sequence':
+            # Packed sequences are decoded back to text after each batch
+            select_list.append('orf_sequence_packed' if 'orf_sequence_packed' in table_columns else 'NULL')
+        c.execute(f"SELECT {', '.join(select_list)} FROM {table}")
+        
+        def batches():
+            while True:
+                rows = c.fetchmany(EXPORT_BATCH_ROWS)
+                if not rows:
+                    break
+                if table == 'orf_sequence':
+                    rows = [row[:3] + (sequence_text(row[3], row[-1]),) + row[4:-1] for row in rows]
+                yield rows
+        
+        counts[table] = write_parquet(os.path.join(export_dir, f'{table}.parquet'), export_schema(table), batches())
+    return counts
+
 @app.route('/export', methods=['GET'])
 def export_data():
+    """
+    Export every table to the exports folder: as CSV files and one Excel
+    workbook, or with format=parquet as one Parquet file per table.
+    """
+    export_format = request.args.get('format', 'csv')
+    if export_format not in ('csv', 'parquet'):
+        return jsonify({'success': False, 'message': f'Unknown export format: {export_format}'})
+    
     conn = sqlite3.connect(DB_PATH)
     conn.row_factory = sqlite3.Row
     c = conn.cursor()
@@ -535,6 +851,21 @@ def export_data():
     if not os.path.exists(export_dir):
         os.makedirs(export_dir)
     
+    if export_format == 'parquet':
+        # Rows as plain tuples, which are converted to Arrow columns
+        conn.row_factory = None
+        try:
+            counts = export_parquet_tables(conn, export_dir)
+            return jsonify({
+                'success': True,
+                'message': f'Data exported successfully to Parquet files in {export_dir}',
+                'rows': counts,
+            })
+        except Exception as e:
+            return jsonify({'success': False, 'message': f'Error exporting data: {str(e)}'})
+        finally:
+            conn.close()
+    
     try:
         # Export freezer data
         c.execute('SELECT * FROM freezer')
@@ -563,9 +894,21 @@ def export_data():
             for row in plasmid_data:
                 writer.writerow(row)
         
-        # Export orf_sequence data
-        c.execute('SELECT * FROM orf_sequence')
-        orf_sequence_data = c.fetchall()
+        # Export orf_sequence data (packed sequences are decoded back to text)
+        c.execute("PRAGMA table_info(orf_sequence)")
+        has_packed_sequences = 'orf_sequence_packed' in [column[1] for column in c.fetchall()]
+        packed_column = 'orf_sequence_packed' if has_packed_sequences else 'NULL'
+        c.execute(f'''
+            SELECT orf_id, orf_name, orf_annotation, orf_sequence, {packed_column} AS orf_sequence_packed,
+                   orf_with_stop, orf_open, orf_organism_id, orf_length_bp, orf_entrez_id,
+                   orf_ensembl_id, orf_uniprot_id, orf_ref_url
+            FROM orf_sequence
+        ''')
+        orf_sequence_data = []
+        for row in c.fetchall():
+            row = list(row)
+            row[3] = sequence_text(row[3], row.pop(4))
+            orf_sequence_data.append(row)
         with open(os.path.join(export_dir, 'orf_sequence.csv'), 'w', newline='') as file:
             writer = csv.writer(file)
             writer.writerow(['orf_id', 'orf_name', 'orf_annotation', 'orf_sequence', 'orf_with_stop', 
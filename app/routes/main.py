@@ -2,6 +2,8 @@ from flask import render_template, jsonify
 import sqlite3
 
 from app import app, DB_PATH
+from app.utils import orf_metadata_table
+from app.http_cache import conditional_get
 
 def get_database_stats():
     """Get statistics about the database collections"""
@@ -16,8 +18,9 @@ def get_database_stats():
         columns = [column[1] for column in cursor.fetchall()]  # column[1] is the name
         has_orf_id = 'orf_id' in columns
         
-        # Count ORF sequences
-        cursor.execute('SELECT COUNT(*) FROM orf_sequence')
+        # Count ORF sequences (metadata only, sequence payloads are not needed)
+        orf_table = orf_metadata_table(conn)
+        cursor.execute(f'SELECT COUNT(*) FROM {orf_table}')
         stats['orf_sequences'] = cursor.fetchone()[0]
         
         # Include these for backward compatibility
@@ -41,7 +44,7 @@ def get_database_stats():
             stats['linked_organisms'] = cursor.fetchone()[0]
         else:
             # No orf_id column yet, use the reference in orf_sequence for now
-            cursor.execute('SELECT COUNT(DISTINCT orf_organism_id) FROM orf_sequence WHERE orf_organism_id IS NOT NULL')
+            cursor.execute(f'SELECT COUNT(DISTINCT orf_organism_id) FROM {orf_table} WHERE orf_organism_id IS NOT NULL')
             stats['linked_organisms'] = cursor.fetchone()[0]
         
         # Count unique freezers
@@ -139,6 +142,7 @@ def batch_search_page():
     return render_template('batch_search.html')
 
 @app.route('/api/stats')
+@conditional_get('stats')
 def api_stats():
     """API endpoint to get current database statistics"""
     try:
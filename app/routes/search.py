@@ -2,28 +2,30 @@ from flask import request, jsonify
 import sqlite3
 import re
 from app import app, DB_PATH
-from app.utils import format_database_ids
+from app.utils import exact_match_probes, format_database_ids, orf_display_columns, orf_metadata_table
+from app.orf_documents import hydrate_orf_results
+from app.dimension_cache import cached_rows
 
 @app.route('/api/search_organisms')
 def get_search_organisms():
     """Get all unique organisms in the database for search filtering"""
     conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    c = conn.cursor()
     
-    # Get distinct organisms (only unique organism names)
-    c.execute("""
+    # Get distinct organisms (only unique organism names), cached until organisms changes
+    organisms = cached_rows(conn, 'search_organisms', """
         SELECT organism_id, organism_name 
         FROM organisms 
         GROUP BY organism_name 
         ORDER BY organism_name
-    """)
-    organisms = [dict(row) for row in c.fetchall()]
+    """, ['organisms'])
     
     conn.close()
     
     return jsonify({'success': True, 'organisms': organisms})
 
+# Distinct source names for the source filters
+SOURCE_NAMES_QUERY = 'SELECT DISTINCT source_name FROM orf_sources ORDER BY source_name'
+
 @app.route('/api/search_sources')
 def get_search_sources():
     """Get all unique source names in the database for search filtering"""
@@ -37,13 +39,8 @@ def get_search_sources():
     
     sources = []
     if sources_table_exists:
-        # Get distinct source names
-        c.execute("""
-            SELECT DISTINCT source_name 
-            FROM orf_sources 
-            ORDER BY source_name
-        """)
-        sources = [{'source_name': row['source_name']} for row in c.fetchall()]
+        # Get distinct source names, cached until orf_sources changes
+        sources = cached_rows(conn, 'source_names', SOURCE_NAMES_QUERY, ['orf_sources'])
     
     conn.close()
     
@@ -60,15 +57,13 @@ def table_exists(conn, table_name):
 def get_orf_sources():
     conn = sqlite3.connect(DB_PATH)
     conn.row_factory = sqlite3.Row
-    c = conn.cursor()
-    
-    # Check if orf_sources table exists
-    if not table_exists(conn, 'orf_sources'):
-        return jsonify({'success': False, 'sources': [], 'message': 'ORF sources table does not exist'})
     
     try:
-        c.execute("SELECT DISTINCT source_name FROM orf_sources ORDER BY source_name")
-        sources = [dict(row) for row in c.fetchall()]
+        # Check if orf_sources table exists
+        if not table_exists(conn, 'orf_sources'):
+            return jsonify({'success': False, 'sources': [], 'message': 'ORF sources table does not exist'})
+        
+        sources = cached_rows(conn, 'source_names', SOURCE_NAMES_QUERY, ['orf_sources'])
         return jsonify({'success': True, 'sources': sources})
     except Exception as e:
         return jsonify({'success': False, 'sources': [], 'message': str(e)})
@@ -82,11 +77,15 @@ def search():
     match_type = request.form.get('match_type', 'partial')  # Default to partial matching
     organism_id = request.form.get('organism_id', '')  # Optional organism filter
     source_name = request.form.get('source_name', '')  # Optional source filter
+    ignore_case = request.form.get('ignore_case', '').lower() in ['1', 'true', 'on', 'yes']  # Case-insensitive exact match
     
     conn = sqlite3.connect(DB_PATH)
     conn.row_factory = sqlite3.Row
     c = conn.cursor()
     
+    # Query ORF metadata without dragging sequence payloads through the scan
+    orf_table = orf_metadata_table(conn)
+    
     results = []
     
     # Prepare search patterns based on match type
@@ -109,37 +108,54 @@ def search():
         c.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='orf_sources'")
         sources_table_exists = c.fetchone()
         
-        if human_gene_table_exists:
+        # Names and IDs resolved at write time, if the database has them
+        display_columns = orf_display_columns(conn, orf_table)
+        
+        if display_columns:
             query = f'''
-                SELECT DISTINCT os.*, o.organism_name, o.organism_genus, o.organism_species, o.organism_strain,
+                SELECT DISTINCT {display_columns},
+                       {'hgd.hgnc_approved_symbol' if human_gene_table_exists else 'NULL'} as hgnc_approved_symbol
+                FROM {orf_table} os
+            '''
+            if human_gene_table_exists:
+                query += ' LEFT JOIN human_gene_data hgd ON os.orf_id = hgd.orf_id'
+            if sources_table_exists and source_name:
+                query += ' LEFT JOIN orf_sources src ON os.orf_id = src.orf_id'
+        elif human_gene_table_exists:
+            query = f'''
+                SELECT DISTINCT os.*,
                        COALESCE(hgd.hgnc_approved_symbol, os.orf_name) as display_name, 
                        hgd.hgnc_approved_symbol, 
                        os.orf_name as original_name
-                FROM orf_sequence os
-                LEFT JOIN organisms o ON os.orf_organism_id = o.organism_id
+                FROM {orf_table} os
                 LEFT JOIN human_gene_data hgd ON os.orf_id = hgd.orf_id
             '''
             if sources_table_exists and source_name:
                 query += ' LEFT JOIN orf_sources src ON os.orf_id = src.orf_id'
-            
-            query += f' WHERE (os.orf_name {operator} ? OR os.orf_id {operator} ? OR COALESCE(hgd.hgnc_approved_symbol, \'\') {operator} ?)'
         else:
             query = f'''
-                SELECT DISTINCT os.*, o.organism_name, o.organism_genus, o.organism_species, o.organism_strain,
+                SELECT DISTINCT os.*,
                        os.orf_name as display_name, 
                        NULL as hgnc_approved_symbol, 
                        os.orf_name as original_name
-                FROM orf_sequence os
-                LEFT JOIN organisms o ON os.orf_organism_id = o.organism_id
+                FROM {orf_table} os
             '''
             if sources_table_exists and source_name:
                 query += ' LEFT JOIN orf_sources src ON os.orf_id = src.orf_id'
-            
-            query += f' WHERE (os.orf_name {operator} ? OR os.orf_id {operator} ?)'
         
-        if human_gene_table_exists:
+        if match_type == 'exact':
+            # One indexed probe per column; an OR across them scans the table
+            probe_sql, probe_count = exact_match_probes(conn, orf_table, ignore_case)
+            query += f' WHERE os.orf_id IN ({probe_sql})'
+            params = [search_pattern] * probe_count
+        elif display_columns:
+            query += f' WHERE (os.orf_name {operator} ? OR os.orf_id {operator} ? OR os.display_name {operator} ?)'
+            params = [search_pattern, search_pattern, search_pattern]
+        elif human_gene_table_exists:
+            query += f' WHERE (os.orf_name {operator} ? OR os.orf_id {operator} ? OR COALESCE(hgd.hgnc_approved_symbol, \'\') {operator} ?)'
             params = [search_pattern, search_pattern, search_pattern]
         else:
+            query += f' WHERE (os.orf_name {operator} ? OR os.orf_id {operator} ?)'
             params = [search_pattern, search_pattern]
         
         # Add organism filter if provided
@@ -154,64 +170,13 @@ def search():
         
         c.execute(query, params)
         
-        results = [format_database_ids(dict(row)) for row in c.fetchall()]
+        if display_columns:
+            results = [dict(row) for row in c.fetchall()]
+        else:
+            results = [format_database_ids(dict(row)) for row in c.fetchall()]
         
-        # For each ORF, get its position information
-        for result in results:
-            orf_id = result['orf_id']
-            c.execute('''
-                SELECT op.*, f.freezer_location, p.plasmid_name
-                FROM orf_position op
-                LEFT JOIN freezer f ON op.freezer_id = f.freezer_id
-                LEFT JOIN plasmid p ON op.plasmid_id = p.plasmid_id
-                WHERE op.orf_id = ?
-            ''', (orf_id,))
-            
-            position_data = [dict(row) for row in c.fetchall()]
-            result['positions'] = position_data
-            
-            # Check if yeast_orf_position table exists and has position_type
-            c.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='yeast_orf_position'")
-            yeast_table_exists = c.fetchone()
-            
-            c.execute("PRAGMA table_info(yeast_orf_position)")
-            columns = [column[1] for column in c.fetchall()]
-            has_position_type = 'position_type' in columns
-            
-            yeast_position_data = []
-            if yeast_table_exists:
-                # Get yeast positions information
-                if has_position_type:
-                    c.execute('''
-                        SELECT id, orf_id, plate, well, position_type 
-                        FROM yeast_orf_position
-                        WHERE orf_id = ?
-                    ''', (orf_id,))
-                else:
-                    c.execute('''
-                        SELECT id, orf_id, plate, well, 'AD' as position_type 
-                        FROM yeast_orf_position
-                        WHERE orf_id = ?
-                    ''', (orf_id,))
-                
-                yeast_position_data = [dict(row) for row in c.fetchall()]
-            result['yeast_positions'] = yeast_position_data
-            
-            # Check if orf_sources table exists
-            c.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='orf_sources'")
-            sources_table_exists = c.fetchone()
-            
-            source_data = []
-            if sources_table_exists:
-                # Get source information
-                c.execute('''
-                    SELECT * FROM orf_sources
-                    WHERE orf_id = ?
-                    ORDER BY submission_date DESC
-                ''', (orf_id,))
-                
-                source_data = [dict(row) for row in c.fetchall()]
-            result['sources'] = source_data
+        # Positions and sources, from the materialized documents where they are clean
+        results = hydrate_orf_results(conn, results)
     
     # [rest of the function remains the same]
     
@@ -226,6 +191,7 @@ def batch_search():
     match_type = request.form.get('match_type', 'partial')  # Default to partial
     organism_id = request.form.get('organism_id', '')  # Optional organism filter
     source_name = request.form.get('source_name', '')  # Optional source filter
+    ignore_case = request.form.get('ignore_case', '').lower() in ['1', 'true', 'on', 'yes']  # Case-insensitive exact match
     
     # Split the input by common separators (newline, comma, semicolon, tab)
     # Remove duplicates while preserving order
@@ -238,6 +204,16 @@ def batch_search():
     conn.row_factory = sqlite3.Row
     c = conn.cursor()
     
+    # Query ORF metadata without dragging sequence payloads through the scan
+    orf_table = orf_metadata_table(conn)
+    
+    # Names and IDs resolved at write time, if the database has them
+    display_columns = orf_display_columns(conn, orf_table)
+    
+    # Exact matches use one indexed probe per column; an OR across them scans the table
+    if match_type == 'exact':
+        probe_sql, probe_count = exact_match_probes(conn, orf_table, ignore_case)
+    
     results = []
     not_found = []
     
@@ -251,45 +227,48 @@ def batch_search():
         c.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='orf_sources'")
         sources_table_exists = c.fetchone()
         
-        if match_type == 'exact':
+        if display_columns:
+            query = f'''
+                SELECT DISTINCT {display_columns},
+                       {'hgd.hgnc_approved_symbol' if human_gene_table_exists else 'NULL'} as hgnc_approved_symbol
+                FROM {orf_table} os
+            '''
+            if human_gene_table_exists:
+                query += ' LEFT JOIN human_gene_data hgd ON os.orf_id = hgd.orf_id'
+            if sources_table_exists and source_name:
+                query += ' LEFT JOIN orf_sources src ON os.orf_id = src.orf_id'
+        elif match_type == 'exact':
             # For exact matches
             if human_gene_table_exists:
-                query = '''
-                    SELECT DISTINCT os.*, o.organism_name, o.organism_genus, o.organism_species, o.organism_strain,
+                query = f'''
+                    SELECT DISTINCT os.*,
                            COALESCE(hgd.hgnc_approved_symbol, os.orf_name) as display_name, 
                            hgd.hgnc_approved_symbol, 
                            os.orf_name as original_name
-                    FROM orf_sequence os
-                    LEFT JOIN organisms o ON os.orf_organism_id = o.organism_id
+                    FROM {orf_table} os
                     LEFT JOIN human_gene_data hgd ON os.orf_id = hgd.orf_id
                 '''
                 if sources_table_exists and source_name:
                     query += ' LEFT JOIN orf_sources src ON os.orf_id = src.orf_id'
-                
-                query += ' WHERE (os.orf_id = ? OR os.orf_name = ? OR COALESCE(hgd.hgnc_approved_symbol, \'\') = ?)'
             else:
-                query = '''
-                    SELECT DISTINCT os.*, o.organism_name, o.organism_genus, o.organism_species, o.organism_strain,
+                query = f'''
+                    SELECT DISTINCT os.*,
                            os.orf_name as display_name, 
                            NULL as hgnc_approved_symbol, 
                            os.orf_name as original_name
-                    FROM orf_sequence os
-                    LEFT JOIN organisms o ON os.orf_organism_id = o.organism_id
+                    FROM {orf_table} os
                 '''
                 if sources_table_exists and source_name:
                     query += ' LEFT JOIN orf_sources src ON os.orf_id = src.orf_id'
-                
-                query += ' WHERE (os.orf_id = ? OR os.orf_name = ?)'
         else:
             # For partial matches
             if human_gene_table_exists:
-                query = '''
-                    SELECT DISTINCT os.*, o.organism_name, o.organism_genus, o.organism_species, o.organism_strain,
+                query = f'''
+                    SELECT DISTINCT os.*,
                            COALESCE(hgd.hgnc_approved_symbol, os.orf_name) as display_name, 
                            hgd.hgnc_approved_symbol, 
                            os.orf_name as original_name
-                    FROM orf_sequence os
-                    LEFT JOIN organisms o ON os.orf_organism_id = o.organism_id
+                    FROM {orf_table} os
                     LEFT JOIN human_gene_data hgd ON os.orf_id = hgd.orf_id
                 '''
                 if sources_table_exists and source_name:
@@ -297,28 +276,27 @@ def batch_search():
                 
                 query += ' WHERE (os.orf_id LIKE ? OR os.orf_name LIKE ? OR COALESCE(hgd.hgnc_approved_symbol, \'\') LIKE ?)'
             else:
-                query = '''
-                    SELECT DISTINCT os.*, o.organism_name, o.organism_genus, o.organism_species, o.organism_strain,
+                query = f'''
+                    SELECT DISTINCT os.*,
                            os.orf_name as display_name, 
                            NULL as hgnc_approved_symbol, 
                            os.orf_name as original_name
-                    FROM orf_sequence os
-                    LEFT JOIN organisms o ON os.orf_organism_id = o.organism_id
+                    FROM {orf_table} os
                 '''
                 if sources_table_exists and source_name:
                     query += ' LEFT JOIN orf_sources src ON os.orf_id = src.orf_id'
                 
                 query += ' WHERE (os.orf_id LIKE ? OR os.orf_name LIKE ?)'
         
-        # Set parameters based on match type and table existence
+        # Set the condition and parameters based on match type and table existence
         if match_type == 'exact':
-            if human_gene_table_exists:
-                params = [term, term, term]
-            else:
-                params = [term, term]
+            query += f' WHERE os.orf_id IN ({probe_sql})'
+            params = [term] * probe_count
         else:
             search_pattern = f'%{term}%'
-            if human_gene_table_exists:
+            if display_columns:
+                query += ' WHERE (os.orf_id LIKE ? OR os.orf_name LIKE ? OR os.display_name LIKE ?)'
+            if display_columns or human_gene_table_exists:
                 params = [search_pattern, search_pattern, search_pattern]
             else:
                 params = [search_pattern, search_pattern]
@@ -334,70 +312,16 @@ def batch_search():
             params.append(source_name)
         
         c.execute(query, params)
-        matches = [format_database_ids(dict(row)) for row in c.fetchall()]
+        if display_columns:
+            matches = [dict(row) for row in c.fetchall()]
+        else:
+            matches = [format_database_ids(dict(row)) for row in c.fetchall()]
         
         if matches:
             results.extend(matches)
         else:
             not_found.append(term)
     
-    # For each ORF, get its position information
-    for result in results:
-        orf_id = result['orf_id']
-        c.execute('''
-            SELECT op.*, f.freezer_location, p.plasmid_name
-            FROM orf_position op
-            LEFT JOIN freezer f ON op.freezer_id = f.freezer_id
-            LEFT JOIN plasmid p ON op.plasmid_id = p.plasmid_id
-            WHERE op.orf_id = ?
-        ''', (orf_id,))
-        
-        position_data = [dict(row) for row in c.fetchall()]
-        result['positions'] = position_data
-        
-        # Check if yeast_orf_position table exists and has position_type
-        c.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='yeast_orf_position'")
-        yeast_table_exists = c.fetchone()
-        
-        c.execute("PRAGMA table_info(yeast_orf_position)")
-        columns = [column[1] for column in c.fetchall()]
-        has_position_type = 'position_type' in columns
-        
-        yeast_position_data = []
-        if yeast_table_exists:
-            # Get yeast positions information
-            if has_position_type:
-                c.execute('''
-                    SELECT id, orf_id, plate, well, position_type 
-                    FROM yeast_orf_position
-                    WHERE orf_id = ?
-                ''', (orf_id,))
-            else:
-                c.execute('''
-                    SELECT id, orf_id, plate, well, 'AD' as position_type 
-                    FROM yeast_orf_position
-                    WHERE orf_id = ?
-                ''', (orf_id,))
-            
-            yeast_position_data = [dict(row) for row in c.fetchall()]
-        result['yeast_positions'] = yeast_position_data
-        
-        # Check if orf_sources table exists
-        c.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='orf_sources'")
-        sources_table_exists = c.fetchone()
-        
-        source_data = []
-        if sources_table_exists:
-            # Get source information
-            c.execute('''
-                SELECT * FROM orf_sources
-                WHERE orf_id = ?
-                ORDER BY submission_date DESC
-            ''', (orf_id,))
-            
-            source_data = [dict(row) for row in c.fetchall()]
-        result['sources'] = source_data
-    
     # Use a set to track unique ORF IDs to prevent duplicate results
     unique_orf_ids = set()
     unique_results = []
@@ -407,6 +331,9 @@ def batch_search():
             unique_orf_ids.add(result['orf_id'])
             unique_results.append(result)
     
+    # Positions and sources, from the materialized documents where they are clean
+    unique_results = hydrate_orf_results(conn, unique_results)
+    
     conn.close()
     
     return jsonify({
@@ -427,6 +354,9 @@ def get_search_examples():
     conn.row_factory = sqlite3.Row
     c = conn.cursor()
     
+    # Query ORF metadata without dragging sequence payloads through the scan
+    orf_table = orf_metadata_table(conn)
+    
     examples = {
         'gene': [],
         'plasmid': [],
@@ -435,9 +365,9 @@ def get_search_examples():
     }
     
     # Get gene examples (including HGNC symbols)
-    c.execute('''
+    c.execute(f'''
         SELECT orf_name 
-        FROM orf_sequence 
+        FROM {orf_table} 
         ORDER BY RANDOM() 
         LIMIT 3
     ''')
@@ -484,6 +414,7 @@ def api_search():
     match_type = request.args.get('match', 'partial')  # Default to partial matching
     organism_id = request.args.get('organism', '')  # Optional organism filter
     source_name = request.args.get('source', '')  # Optional source filter
+    ignore_case = request.args.get('ignore_case', '').lower() in ['1', 'true', 'on', 'yes']  # Case-insensitive exact match
     
     # Debug logging
     print(f"API Search: type={query_type}, query={search_term}, match={match_type}, organism={organism_id}, source={source_name}")
@@ -492,6 +423,9 @@ def api_search():
     conn.row_factory = sqlite3.Row
     c = conn.cursor()
     
+    # Query ORF metadata without dragging sequence payloads through the scan
+    orf_table = orf_metadata_table(conn)
+    
     results = []
     
     # Prepare search patterns based on match type
@@ -515,33 +449,53 @@ def api_search():
             c.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='orf_sources'")
             sources_table_exists = c.fetchone()
             
-            if human_gene_table_exists:
+            # Names and IDs resolved at write time, if the database has them
+            display_columns = orf_display_columns(conn, orf_table)
+            
+            if display_columns:
+                query = f'''
+                    SELECT DISTINCT {display_columns},
+                           {'hgd.hgnc_approved_symbol' if human_gene_table_exists else 'NULL'} as hgnc_approved_symbol
+                    FROM {orf_table} os
+                '''
+                if human_gene_table_exists:
+                    query += ' LEFT JOIN human_gene_data hgd ON os.orf_id = hgd.orf_id'
+                if sources_table_exists and source_name:
+                    query += ' LEFT JOIN orf_sources src ON os.orf_id = src.orf_id'
+            elif human_gene_table_exists:
                 query = f'''
-                    SELECT DISTINCT os.*, o.organism_name, o.organism_genus, o.organism_species, o.organism_strain,
+                    SELECT DISTINCT os.*,
                            COALESCE(hgd.hgnc_approved_symbol, os.orf_name) as display_name, 
                            hgd.hgnc_approved_symbol, 
                            os.orf_name as original_name
-                    FROM orf_sequence os
-                    LEFT JOIN organisms o ON os.orf_organism_id = o.organism_id
+                    FROM {orf_table} os
                     LEFT JOIN human_gene_data hgd ON os.orf_id = hgd.orf_id
                 '''
                 if sources_table_exists and source_name:
                     query += ' LEFT JOIN orf_sources src ON os.orf_id = src.orf_id'
-                
-                query += f' WHERE (os.orf_name {operator} ? OR os.orf_id {operator} ? OR COALESCE(hgd.hgnc_approved_symbol, \'\') {operator} ?)'
-                params = [search_pattern, search_pattern, search_pattern]
             else:
                 query = f'''
-                    SELECT DISTINCT os.*, o.organism_name, o.organism_genus, o.organism_species, o.organism_strain,
+                    SELECT DISTINCT os.*,
                            os.orf_name as display_name, 
                            NULL as hgnc_approved_symbol, 
                            os.orf_name as original_name
-                    FROM orf_sequence os
-                    LEFT JOIN organisms o ON os.orf_organism_id = o.organism_id
+                    FROM {orf_table} os
                 '''
                 if sources_table_exists and source_name:
                     query += ' LEFT JOIN orf_sources src ON os.orf_id = src.orf_id'
-                
+            
+            if match_type == 'exact':
+                # One indexed probe per column; an OR across them scans the table
+                probe_sql, probe_count = exact_match_probes(conn, orf_table, ignore_case)
+                query += f' WHERE os.orf_id IN ({probe_sql})'
+                params = [search_pattern] * probe_count
+            elif display_columns:
+                query += f' WHERE (os.orf_name {operator} ? OR os.orf_id {operator} ? OR os.display_name {operator} ?)'
+                params = [search_pattern, search_pattern, search_pattern]
+            elif human_gene_table_exists:
+                query += f' WHERE (os.orf_name {operator} ? OR os.orf_id {operator} ? OR COALESCE(hgd.hgnc_approved_symbol, \'\') {operator} ?)'
+                params = [search_pattern, search_pattern, search_pattern]
+            else:
                 query += f' WHERE (os.orf_name {operator} ? OR os.orf_id {operator} ?)'
                 params = [search_pattern, search_pattern]
             
@@ -557,66 +511,15 @@ def api_search():
             
             c.execute(query, params)
             
-            # Only use format_database_ids for gene/orf search
-            results = [format_database_ids(dict(row)) for row in c.fetchall()]
+            # Only use format_database_ids for gene/orf search on databases
+            # that predate display_name
+            if display_columns:
+                results = [dict(row) for row in c.fetchall()]
+            else:
+                results = [format_database_ids(dict(row)) for row in c.fetchall()]
             
-            # For each ORF, get its position information
-            for result in results:
-                orf_id = result['orf_id']
-                c.execute('''
-                    SELECT op.*, f.freezer_location, p.plasmid_name
-                    FROM orf_position op
-                    LEFT JOIN freezer f ON op.freezer_id = f.freezer_id
-                    LEFT JOIN plasmid p ON op.plasmid_id = p.plasmid_id
-                    WHERE op.orf_id = ?
-                ''', (orf_id,))
-                
-                position_data = [dict(row) for row in c.fetchall()]
-                result['positions'] = position_data
-                
-                # Check if yeast_orf_position table exists and has position_type
-                c.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='yeast_orf_position'")
-                yeast_table_exists = c.fetchone()
-                
-                yeast_position_data = []
-                if yeast_table_exists:
-                    # Check if position_type column exists
-                    c.execute("PRAGMA table_info(yeast_orf_position)")
-                    columns = [column[1] for column in c.fetchall()]
-                    has_position_type = 'position_type' in columns
-                    
-                    # Get yeast positions information
-                    if has_position_type:
-                        c.execute('''
-                            SELECT id, orf_id, plate, well, position_type 
-                            FROM yeast_orf_position
-                            WHERE orf_id = ?
-                        ''', (orf_id,))
-                    else:
-                        c.execute('''
-                            SELECT id, orf_id, plate, well, 'AD' as position_type 
-                            FROM yeast_orf_position
-                            WHERE orf_id = ?
-                        ''', (orf_id,))
-                    
-                    yeast_position_data = [dict(row) for row in c.fetchall()]
-                result['yeast_positions'] = yeast_position_data
-                
-                # Check if orf_sources table exists
-                c.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='orf_sources'")
-                sources_table_exists = c.fetchone()
-                
-                source_data = []
-                if sources_table_exists:
-                    # Get source information
-                    c.execute('''
-                        SELECT * FROM orf_sources
-                        WHERE orf_id = ?
-                        ORDER BY submission_date DESC
-                    ''', (orf_id,))
-                    
-                    source_data = [dict(row) for row in c.fetchall()]
-                result['sources'] = source_data
+            # Positions and sources, from the materialized documents where they are clean
+            results = hydrate_orf_results(conn, results)
         
         # [rest of the function remains the same]
         
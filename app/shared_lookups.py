@@ -0,0 +1,443 @@
+"""
+Shared-memory lookup tables for the Reagent Database application.
+
+When the application runs as several worker processes, each would hold its
+own copy of the read-mostly lookup tables (the HGNC map and the organism,
+freezer and plasmid tables) and rebuild it after every change. With shared
+lookups enabled, one process (the publisher) builds each table into a
+multiprocessing.shared_memory segment and every worker maps the same
+segments, so memory stays constant as the number of workers grows.
+
+The dimension tables are read through app/dimension_cache.dimension, which
+only uses a published table while change_log shows no change to its source
+since the table was built, and otherwise reads the database as usual.
+
+Layout of a table segment (integers are uint32 in native byte order):
+
+    header          magic b'RDLT', layout version, row count n, slot count m,
+                    change_log sequence number the rows were read at (int64,
+                    -1 without change_log)
+    key offsets     n + 1 offsets into the key bytes
+    value offsets   n + 1 offsets into the value bytes
+    hash slots      m slots (a power of two, at least 2n) holding row
+                    number + 1, or 0 if empty; a key lives in the first
+                    free slot from crc32(key) & (m - 1) onwards
+    key bytes       UTF-8 keys, sorted bytewise
+    value bytes     UTF-8 values (JSON objects for multi-column tables)
+
+A small manifest segment holds the publisher's pid and the current version
+of every table. A refresh writes a complete new segment named after its
+version and only then stores the new version in the manifest, so readers
+switch from one consistent table to the next (an atomic version swap).
+Readers that still map the previous segment keep a valid view of it until
+they switch.
+"""
+
+import os
+import json
+import struct
+import hashlib
+import zlib
+import sqlite3
+import threading
+import time
+import atexit
+import logging
+from collections.abc import Mapping
+from multiprocessing import shared_memory
+
+from app.change_log import current_change_seq, has_changes_since
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+TABLE_MAGIC = b'RDLT'
+MANIFEST_MAGIC = b'RDLM'
+LAYOUT_VERSION = 3
+TABLE_HEADER = struct.Struct('=4sIIIq')
+MANIFEST_HEADER = struct.Struct('=4sI')
+
+# Attaching in a process other than the publisher must not register the
+# segment with the resource tracker (see _attach)
+_attach_lock = threading.Lock()
+
+def _hgnc_rows(conn):
+    c = conn.cursor()
+    c.execute("SELECT orf_id, hgnc_approved_symbol FROM human_gene_data WHERE hgnc_approved_symbol != ''")
+    return c.fetchall()
+
+def _dimension_rows(table_name, key):
+    """Rows of a dimension table, keyed by its ID, with the whole row as a JSON object"""
+    def rows(conn):
+        c = conn.cursor()
+        c.execute(f'SELECT * FROM {table_name}')
+        columns = [column[0] for column in c.description]
+        return [(row[columns.index(key)], json.dumps(dict(zip(columns, row)))) for row in c.fetchall()]
+    return rows
+
+# Published tables, in manifest slot order: (source table, rows function,
+# tables whose change_log entries invalidate the table, JSON values)
+LOOKUP_TABLES = {
+    'hgnc': ('human_gene_data', _hgnc_rows, ['human_gene_data'], False),
+    'organisms': ('organisms', _dimension_rows('organisms', 'organism_id'), ['organisms'], True),
+    'freezers': ('freezer', _dimension_rows('freezer', 'freezer_id'), ['freezer'], True),
+    'plasmids': ('plasmid', _dimension_rows('plasmid', 'plasmid_id'), ['plasmid'], True),
+}
+
+def _segment_prefix(db_path):
+    """Segment names are per database; POSIX limits them to about 30 characters"""
+    return 'rdb' + hashlib.sha1(os.path.abspath(db_path).encode('utf-8')).hexdigest()[:8]
+
+def _segment_name(prefix, slot, version):
+    return f'{prefix}_{slot}_{version}'
+
+def _attach(name):
+    """Map an existing segment without handing it to this process's resource tracker"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        pass
+    # Before Python 3.13 attaching registers the segment, and the tracker
+    # would unlink it for every process when this one exits
+    with _attach_lock:
+        register = shared_memory.resource_tracker.register
+        shared_memory.resource_tracker.register = lambda name, rtype: None
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            shared_memory.resource_tracker.register = register
+
+def encode_table(rows, change_seq=None):
+    """
+    Encode (key, value) rows in the segment layout.
+
+    Args:
+        rows: Iterable of (key, value); rows with a NULL key are skipped and
+            the last value wins for duplicate keys
+        change_seq (int): change_log sequence number read before the rows,
+            or None without change_log
+
+    Returns:
+        bytes: The segment contents
+    """
+    encoded = {}
+    for key, value in rows:
+        if key is None:
+            continue
+        encoded[str(key).encode('utf-8')] = b'' if value is None else str(value).encode('utf-8')
+    keys = sorted(encoded)
+
+    key_offsets = [0]
+    value_offsets = [0]
+    for key in keys:
+        key_offsets.append(key_offsets[-1] + len(key))
+        value_offsets.append(value_offsets[-1] + len(encoded[key]))
+
+    count = len(keys)
+    slot_count = 1
+    while slot_count < 2 * count:
+        slot_count *= 2
+    slots = [0] * slot_count
+    for index, key in enumerate(keys):
+        slot = zlib.crc32(key) & (slot_count - 1)
+        while slots[slot]:
+            slot = (slot + 1) & (slot_count - 1)
+        slots[slot] = index + 1
+
+    return b''.join([
+        TABLE_HEADER.pack(TABLE_MAGIC, LAYOUT_VERSION, count, slot_count, -1 if change_seq is None else change_seq),
+        struct.pack(f'={count + 1}I', *key_offsets),
+        struct.pack(f'={count + 1}I', *value_offsets),
+        struct.pack(f'={slot_count}I', *slots),
+        b''.join(keys),
+        b''.join(encoded[key] for key in keys),
+    ])
+
+class LookupTable(Mapping):
+    """Read-only mapping over a table segment, searched in place"""
+
+    def __init__(self, shm, json_values=False):
+        self._shm = shm
+        self._buf = shm.buf.toreadonly()
+        magic, layout_version, self._count, self._slot_count, change_seq = TABLE_HEADER.unpack_from(self._buf, 0)
+        if magic != TABLE_MAGIC or layout_version != LAYOUT_VERSION:
+            raise ValueError(f'{shm.name} is not a lookup table segment')
+        # change_log sequence number the rows were read at, or None
+        self.change_seq = None if change_seq < 0 else change_seq
+        self._json_values = json_values
+        offsets_end = TABLE_HEADER.size + 4 * (self._count + 1)
+        self._key_offsets = self._buf[TABLE_HEADER.size:offsets_end].cast('I')
+        self._value_offsets = self._buf[offsets_end:offsets_end + 4 * (self._count + 1)].cast('I')
+        slots_start = offsets_end + 4 * (self._count + 1)
+        self._slots = self._buf[slots_start:slots_start + 4 * self._slot_count].cast('I')
+        self._keys = slots_start + 4 * self._slot_count
+        self._values = self._keys + self._key_offsets[self._count]
+
+    def _key(self, index):
+        return bytes(self._buf[self._keys + self._key_offsets[index]:self._keys + self._key_offsets[index + 1]])
+
+    def _value(self, index):
+        value = bytes(self._buf[self._values + self._value_offsets[index]:self._values + self._value_offsets[index + 1]])
+        value = value.decode('utf-8')
+        return json.loads(value) if self._json_values else value
+
+    def _find(self, key):
+        """Probe the hash slots for a key, returning its row number or -1"""
+        target = str(key).encode('utf-8')
+        mask = self._slot_count - 1
+        slot = zlib.crc32(target) & mask
+        while True:
+            entry = self._slots[slot]
+            if not entry:
+                return -1
+            if self._key(entry - 1) == target:
+                return entry - 1
+            slot = (slot + 1) & mask
+
+    def __getitem__(self, key):
+        index = self._find(key)
+        if index < 0:
+            raise KeyError(key)
+        return self._value(index)
+
+    def get(self, key, default=None):
+        index = self._find(key)
+        return self._value(index) if index >= 0 else default
+
+    def __contains__(self, key):
+        return key is not None and self._find(key) >= 0
+
+    def __iter__(self):
+        for index in range(self._count):
+            yield self._key(index).decode('utf-8')
+
+    def __len__(self):
+        return self._count
+
+    def close(self):
+        for view in (self._key_offsets, self._value_offsets, self._slots, self._buf):
+            view.release()
+        self._shm.close()
+
+    def __del__(self):
+        # The view of the buffer has to go before the segment can be unmapped
+        try:
+            self.close()
+        except Exception:
+            pass
+
+class SharedLookups:
+    """A process's read-only view of the published tables"""
+
+    def __init__(self, db_path):
+        self.prefix = _segment_prefix(db_path)
+        self._manifest = None
+        self._tables = {}
+        self._lock = threading.Lock()
+
+    def _manifest_versions(self):
+        if self._manifest is None:
+            try:
+                self._manifest = _attach(f'{self.prefix}_m')
+            except FileNotFoundError:
+                return None
+        _, pid = MANIFEST_HEADER.unpack_from(self._manifest.buf, 0)
+        if not pid:
+            # The publisher has exited; look for a new manifest next time
+            self._manifest.close()
+            self._manifest = None
+            self._tables = {}
+            return None
+        return struct.unpack_from(f'={len(LOOKUP_TABLES)}Q', self._manifest.buf, MANIFEST_HEADER.size)
+
+    def table(self, name):
+        """
+        Get the current version of a published table.
+
+        Returns:
+            LookupTable: The table, or None if it has not been published
+        """
+        slot = list(LOOKUP_TABLES).index(name)
+        with self._lock:
+            versions = self._manifest_versions()
+            if not versions or not versions[slot]:
+                return None
+            version = versions[slot]
+
+            cached = self._tables.get(name)
+            if cached and cached[0] == version:
+                return cached[1]
+
+            try:
+                shm = _attach(_segment_name(self.prefix, slot, version))
+            except FileNotFoundError:
+                # Swapped again while we were attaching; keep the previous version
+                return cached[1] if cached else None
+            # The previous version is closed when the last caller holding it lets go
+            table = LookupTable(shm, json_values=LOOKUP_TABLES[name][3])
+            self._tables[name] = (version, table)
+            return table
+
+class LookupPublisher:
+    """Builds and versions the table segments; one per database"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.prefix = _segment_prefix(db_path)
+        self._segments = {}
+        self._built = {}
+        size = MANIFEST_HEADER.size + 8 * len(LOOKUP_TABLES)
+        try:
+            self._manifest = shared_memory.SharedMemory(name=f'{self.prefix}_m', create=True, size=size)
+            self._manifest.buf[:size] = bytes(size)
+        except FileExistsError:
+            self._manifest = _attach(f'{self.prefix}_m')
+            _, pid = MANIFEST_HEADER.unpack_from(self._manifest.buf, 0)
+            if _process_alive(pid):
+                self._manifest.close()
+                raise
+            # Left behind by a publisher that exited without cleaning up
+            logger.info(f"Taking over shared lookups from exited process {pid}")
+        MANIFEST_HEADER.pack_into(self._manifest.buf, 0, MANIFEST_MAGIC, os.getpid())
+
+    def _version(self, slot):
+        return struct.unpack_from('=Q', self._manifest.buf, MANIFEST_HEADER.size + 8 * slot)[0]
+
+    def publish(self, conn):
+        """
+        Rebuild every table whose source changed and swap in the new versions.
+
+        Returns:
+            list: Names of the tables that were republished
+        """
+        c = conn.cursor()
+        change_seq = current_change_seq(conn)
+        published = []
+        for slot, (name, (source_table, rows, change_tables, _)) in enumerate(LOOKUP_TABLES.items()):
+            if source_table:
+                c.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (source_table,))
+                if not c.fetchone():
+                    continue
+
+            built_seq, built_digest = self._built.get(name, (None, None))
+            if change_seq is not None and built_seq is not None and not has_changes_since(conn, built_seq, change_tables):
+                continue
+
+            data = encode_table(rows(conn), change_seq)
+            digest = hashlib.sha1(data).digest()
+            if digest != built_digest:
+                self._swap(slot, data)
+                published.append(name)
+            self._built[name] = (change_seq, digest)
+        return published
+
+    def _swap(self, slot, data):
+        version = self._version(slot) + 1
+        while True:
+            try:
+                shm = shared_memory.SharedMemory(
+                    name=_segment_name(self.prefix, slot, version), create=True, size=len(data)
+                )
+                break
+            except FileExistsError:
+                version += 1
+        shm.buf[:len(data)] = data
+
+        # Readers only ever see the version once its segment is complete
+        struct.pack_into('=Q', self._manifest.buf, MANIFEST_HEADER.size + 8 * slot, version)
+
+        previous = self._segments.pop(slot, None)
+        if previous:
+            previous.close()
+            previous.unlink()
+        self._segments[slot] = shm
+
+    def close(self):
+        """Unlink every segment this publisher created"""
+        for shm in self._segments.values():
+            shm.close()
+            shm.unlink()
+        self._segments = {}
+        # Tell readers that still map the manifest to go back to the database
+        self._manifest.buf[:] = bytes(len(self._manifest.buf))
+        self._manifest.close()
+        self._manifest.unlink()
+
+def _process_alive(pid):
+    if os.name != 'posix':
+        # Windows frees a segment with its last handle, so a manifest that
+        # still exists belongs to a running process
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+_lookups = None
+
+def get_lookup_table(name, conn=None):
+    """
+    Get a shared lookup table by name (see LOOKUP_TABLES).
+
+    Args:
+        name (str): Table name
+        conn: sqlite3 connection; if given, the table is only returned while
+            change_log shows no change to its source since it was built, so
+            it is as current as a database read
+
+    Returns:
+        LookupTable: Read-only mapping, or None if shared lookups are disabled
+        or the table has not been published yet (or, with conn, is out of
+        date); callers then query the database as usual
+    """
+    if _lookups is None:
+        return None
+    table = _lookups.table(name)
+    if table is None or conn is None:
+        return table
+    # Uncommitted changes in a transaction are not in the published table
+    if conn.in_transaction or table.change_seq is None:
+        return None
+    if has_changes_since(conn, table.change_seq, LOOKUP_TABLES[name][2]):
+        return None
+    return table
+
+def start_shared_lookups(db_path, interval):
+    """
+    Map the shared lookup tables in this process, and publish them if no other
+    process does. The publisher refreshes them every `interval` seconds.
+    """
+    global _lookups
+    if _lookups is not None:
+        return
+    _lookups = SharedLookups(db_path)
+
+    try:
+        publisher = LookupPublisher(db_path)
+    except FileExistsError:
+        logger.info("Shared lookups are published by another process")
+        return
+    atexit.register(publisher.close)
+
+    def run():
+        conn = sqlite3.connect(db_path)
+        last_data_version = None
+        while True:
+            try:
+                # data_version only moves when another connection commits
+                data_version = conn.execute('PRAGMA data_version').fetchone()[0]
+                if data_version != last_data_version:
+                    published = publisher.publish(conn)
+                    last_data_version = data_version
+                    if published:
+                        logger.info(f"Published shared lookups: {', '.join(published)}")
+            except Exception as e:
+                logger.error(f"Error publishing shared lookups: {str(e)}")
+            time.sleep(interval)
+
+    thread = threading.Thread(target=run, name='shared-lookup-publisher')
+    thread.daemon = True
+    thread.start()
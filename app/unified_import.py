@@ -0,0 +1,666 @@
+"""
+Column-wise unified position import for the Reagent Database application.
+
+A unified import sheet has one row per ORF clone: its sequence, entry and
+yeast AD/DB positions, source, and the organism, freezer and plasmid it
+refers to. prepare_unified_rows turns a DataFrame of such rows into parameter
+lists for each table with whole-column pandas operations (position strings are
+split with vectorized regular expressions, booleans normalized in one pass,
+template and invalid rows dropped with masks). write_unified_rows then writes
+each table in a few statements: organisms, freezers, plasmids and sequences
+are loaded into temp staging tables and applied with one INSERT ... ON
+CONFLICT DO UPDATE per table, positions and sources with executemany. A batch
+that fails is rolled back to a savepoint and written again row by row, so
+every bad row still gets its own "Row N: ..." error message.
+
+Every record also gets a content hash of its normalized values. The hashes of
+written records are kept in import_content_hashes, and records whose hash is
+already there are skipped, so re-importing a sheet with a few edits only
+writes the edited rows. Any other change to a row drops its hashes (see
+setup_db.create_content_hashes).
+
+CSV files are read in chunks with every cell as text (unified_csv_chunks), so
+memory use depends on the chunk size rather than the size of the file.
+"""
+
+import re
+import sqlite3
+import logging
+from datetime import datetime
+
+import pandas as pd
+from pandas.api.types import is_numeric_dtype
+
+from canonical_ids import canonical_accession, canonical_entrez_id
+from sequence_codec import SEQUENCE_PATTERN, pack_for_storage
+from setup_db import orf_metadata_table_name, resolved_display_name, CONTENT_HASH_ENTITIES
+from xlsx_reader import SHEET_ATTR, SHEET_INDEX_ATTR
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# orf_id values of the example rows in the import template
+TEMPLATE_ORF_IDS = ['Required', 'ORF999']
+
+# Spellings of true in boolean columns
+TRUE_VALUES = ['yes', 'true', '1', 'y', 't']
+
+# Order in which a row's records are written, used to keep errors in sheet order
+STEPS = ['row', 'organism', 'freezer', 'plasmid', 'sequence',
+         'entry_position', 'yeast_ad_position', 'yeast_db_position', 'source']
+
+# Dimension tables upserted from the sheet: batch -> (table, key column, columns)
+DIMENSION_UPSERTS = {
+    'organisms': ('organisms', 'organism_id',
+                  ['organism_name', 'organism_genus', 'organism_species', 'organism_strain']),
+    'freezers': ('freezer', 'freezer_id', ['freezer_location', 'freezer_condition', 'freezer_date']),
+    'plasmids': ('plasmid', 'plasmid_id',
+                 ['plasmid_name', 'plasmid_type', 'plasmid_express_organism', 'plasmid_description']),
+}
+
+# Batches matched on an ID, of which only the last row for each ID is applied
+KEYED_BATCHES = list(DIMENSION_UPSERTS) + ['sequences']
+
+# ORF sequence fields in the order prepare_unified_rows produces them
+SEQUENCE_STAGE_COLUMNS = ['orf_id', 'orf_name', 'orf_annotation', 'orf_sequence', 'orf_sequence_packed',
+                          'orf_with_stop', 'orf_open', 'orf_organism_id', 'orf_length_bp', 'orf_entrez_id',
+                          'orf_ensembl_id', 'orf_uniprot_id', 'orf_ref_url']
+
+def text_column(df, column, default=''):
+    """Values of a column as stripped strings, `default` where the column or the cell is missing"""
+    values = pd.Series(default, index=df.index, dtype=object)
+    if column in df.columns:
+        present = df[column].notna()
+        values[present] = df.loc[present, column].astype(str).str.strip()
+    return values
+
+def boolean_column(df, column):
+    """A yes/no column as 0/1; missing cells and unknown spellings are 0"""
+    if column not in df.columns:
+        return pd.Series(0, index=df.index)
+    values = df[column]
+    normalized = values.astype(str).str.lower().str.strip()
+    return (values.notna() & normalized.isin(TRUE_VALUES)).astype(int)
+
+def parse_positions(positions):
+    """
+    Split "Plate-Well" position strings into plate and well.
+
+    A single '-', ':' or '_' separates plate and well, tried in that order;
+    otherwise the first space, otherwise the first digit ("P1A01" is plate
+    "P", well "1A01"). Strings that cannot be split keep the whole string as
+    the plate and an empty well.
+
+    Args:
+        positions (Series): Stripped position strings, '' where absent
+
+    Returns:
+        DataFrame: plate and well columns, '' for absent positions
+    """
+    plate = positions.astype(object).copy()
+    well = pd.Series('', index=positions.index, dtype=object)
+    remaining = positions != ''
+
+    def split(mask, pattern):
+        parts = positions[mask].str.extract(pattern)
+        matched = parts[0].notna()
+        index = parts.index[matched]
+        plate[index] = parts.loc[matched, 0].str.strip()
+        well[index] = parts.loc[matched, 1].str.strip()
+        return pd.Series(matched, index=parts.index).reindex(positions.index, fill_value=False)
+
+    for separator in ['-', ':', '_']:
+        has_separator = remaining & positions.str.contains(separator, regex=False)
+        sep = re.escape(separator)
+        matched = split(has_separator, f'^([^{sep}]*){sep}([^{sep}]*)$')
+        # A '-' that does not split in two falls through to the other
+        # separators; any other separator is final
+        remaining &= ~(matched if separator == '-' else has_separator)
+
+    has_space = remaining & positions.str.contains(' ', regex=False)
+    split(has_space, r'(?s)^([^ ]*) (.*)$')
+    remaining &= ~has_space
+
+    split(remaining, r'(?s)^(\D+)(\d.*)$')
+    return pd.DataFrame({'plate': plate, 'well': well})
+
+def _content_hashes(columns):
+    """64-bit hash of each row of the given Series, as signed integers for SQLite"""
+    frame = pd.DataFrame({position: column.astype(str) for position, column in enumerate(columns)})
+    return pd.util.hash_pandas_object(frame, index=False).to_numpy().view('int64').tolist()
+
+def _content_hash_keys(values):
+    """Row keys joining each row's identity values with a unit separator, as the content hash triggers do"""
+    keys = values[0].astype(str)
+    if len(values) > 1:
+        keys = keys.str.cat([value.astype(str) for value in values[1:]], sep='\x1f')
+    return keys.tolist()
+
+def _length_values(df):
+    """orf_length_bp as ints ("12" and "12.0" are 12), and error messages for cells that are not numbers"""
+    if 'orf_length_bp' not in df.columns:
+        return pd.Series(0, index=df.index, dtype=object), {}
+    values = df['orf_length_bp']
+    if is_numeric_dtype(values):
+        return values.fillna(0).astype('int64').astype(object), {}
+
+    lengths = pd.Series(0, index=df.index, dtype=object)
+    errors = {}
+    for index, value in values[values.notna()].items():
+        try:
+            lengths[index] = int(value)
+        except (TypeError, ValueError) as e:
+            try:
+                lengths[index] = int(float(value))
+            except (TypeError, ValueError, OverflowError):
+                errors[index] = str(e)
+    return lengths, errors
+
+def prepare_unified_rows(df, pack_sequences=False, today=None):
+    """
+    Turn unified import rows into per-table parameter lists.
+
+    Args:
+        df (DataFrame): Rows with mapped column names (see map_column_names);
+            its index gives the sheet row numbers (index + 2)
+        pack_sequences (bool): Store sequences in the packed form where it is smaller
+        today (str): Default date for freezers and sources
+
+    Returns:
+        tuple: (batches, errors). batches maps a batch name to a list of
+        (row_number, params) in sheet order, and 'content_hashes' to the
+        (row_key, content_hash) of each batch's records in the same order;
+        errors is a list
+        of (row_number, step, message).
+    """
+    today = today or datetime.now().strftime('%Y-%m-%d')
+    errors = []
+    row_numbers = pd.Series(df.index + 2, index=df.index)
+
+    # Template example rows, then rows without the required values
+    orf_ids = df['orf_id']
+    template = orf_ids.isin(TEMPLATE_ORF_IDS) | (orf_ids.astype(str).str.lower() == 'orf_id')
+    missing = ~template & (orf_ids.isna() | df['orf_name'].isna())
+    for row_number in row_numbers[missing]:
+        errors.append((row_number, STEPS.index('row'),
+                       f"Row {row_number}: Missing required value (orf_id, orf_name)"))
+    rows = df[~template & ~missing]
+    row_numbers = row_numbers[rows.index]
+    orf_ids = rows['orf_id'].astype(object)
+
+    text = {column: text_column(rows, column) for column in [
+        'organism_id', 'organism_name', 'organism_genus', 'organism_species', 'organism_strain',
+        'freezer_id', 'freezer_location', 'freezer_condition',
+        'plasmid_id', 'plasmid_name', 'plasmid_type', 'plasmid_express_organism', 'plasmid_description',
+        'orf_annotation', 'orf_entrez_id', 'orf_ensembl_id', 'orf_uniprot_id', 'orf_ref_url',
+        'entry_position', 'yeast_ad_position', 'yeast_db_position',
+        'source_name', 'source_details', 'source_url', 'submitter', 'notes',
+    ]}
+    # Dates as entered: hashes leave out today's date filled in for blank
+    # cells, so a sheet imported again on another day is still unchanged
+    entered = {column: text_column(rows, column) for column in ['freezer_date', 'submission_date']}
+    text['freezer_date'] = text_column(rows, 'freezer_date', today)
+    text['submission_date'] = text_column(rows, 'submission_date', today)
+
+    def column_values(column):
+        return column if isinstance(column, pd.Series) else orf_ids if column == 'orf_id' else text[column]
+
+    def records(mask, columns):
+        """(row_number, params) for the masked rows; columns are names or Series"""
+        values = [column_values(column)[mask] for column in columns]
+        return list(zip(row_numbers[mask].tolist(), zip(*[value.tolist() for value in values])))
+
+    def hashed(batch, mask, columns):
+        """(row_key, content_hash) of the masked rows; dates are hashed as entered"""
+        values = [column_values(entered.get(column, column) if isinstance(column, str) else column)[mask]
+                  for column in columns]
+        identity = len(CONTENT_HASH_ENTITIES[batch][1])
+        return list(zip(_content_hash_keys(values[:identity]), _content_hashes(values)))
+
+    batches = {}
+    hashes = {}
+
+    # Organisms, freezers and plasmids are written only when the row names their ID
+    for batch, (_, key, columns) in DIMENSION_UPSERTS.items():
+        batches[batch] = records(text[key] != '', [key] + columns)
+        hashes[batch] = hashed(batch, text[key] != '', [key] + columns)
+
+    # Sequences, for rows that have one
+    if 'orf_sequence' in rows.columns:
+        has_sequence = rows['orf_sequence'].notna()
+    else:
+        has_sequence = pd.Series(False, index=rows.index)
+    lengths, length_errors = _length_values(rows)
+    for index, message in length_errors.items():
+        if has_sequence[index]:
+            row_number = row_numbers[index]
+            errors.append((row_number, STEPS.index('sequence'),
+                           f"Row {row_number}: Error inserting sequence: {message}"))
+            has_sequence[index] = False
+    # Sequences are stored as given, so one that is not nucleotides is rejected
+    if has_sequence.any():
+        nucleotides = rows['orf_sequence'].fillna('').astype(str).str.fullmatch(SEQUENCE_PATTERN)
+        for index in rows.index[has_sequence & ~nucleotides]:
+            row_number = row_numbers[index]
+            errors.append((row_number, STEPS.index('sequence'),
+                           f"Row {row_number}: Error inserting sequence: "
+                           f"Sequence contains characters that are not IUPAC nucleotide codes"))
+            has_sequence[index] = False
+
+    sequences = []
+    sequence_hashes = []
+    sequence_rows = rows[has_sequence]
+    if len(sequence_rows):
+        stored = [pack_for_storage(sequence, pack_sequences)
+                  for sequence in sequence_rows['orf_sequence'].tolist()]
+        columns = [
+            'orf_id', rows['orf_name'].astype(object), 'orf_annotation',
+            boolean_column(rows, 'orf_with_stop'), boolean_column(rows, 'orf_open'), 'organism_id', lengths,
+            text['orf_entrez_id'].map(canonical_entrez_id), text['orf_ensembl_id'].map(canonical_accession),
+            text['orf_uniprot_id'].map(canonical_accession), 'orf_ref_url'
+        ]
+        for position, (row_number, values) in enumerate(records(has_sequence, columns)):
+            orf_sequence, orf_sequence_packed = stored[position]
+            sequences.append((row_number, values[:3] + (orf_sequence, orf_sequence_packed) + values[3:]))
+        # The sequence as given, whether or not it is stored packed
+        sequence_hashes = hashed('sequences', has_sequence, columns + [rows['orf_sequence'].astype(object)])
+    batches['sequences'] = sequences
+    hashes['sequences'] = sequence_hashes
+
+    # Positions with both a plate and a well
+    for batch, column in [('entry_positions', 'entry_position'),
+                          ('yeast_ad_positions', 'yeast_ad_position'),
+                          ('yeast_db_positions', 'yeast_db_position')]:
+        parsed = parse_positions(text[column])
+        complete = (parsed['plate'] != '') & (parsed['well'] != '')
+        if batch == 'entry_positions':
+            # The creation date is always today's, so it is not hashed
+            extra = ['freezer_id', 'plasmid_id']
+            created = [pd.Series(today, index=rows.index)]
+        else:
+            extra = [pd.Series('AD' if batch == 'yeast_ad_positions' else 'DB', index=rows.index)]
+            created = []
+        batches[batch] = records(complete, ['orf_id', parsed['plate'], parsed['well']] + extra + created)
+        hashes[batch] = hashed(batch, complete, ['orf_id', parsed['plate'], parsed['well']] + extra)
+
+    source_columns = ['orf_id', 'source_name', 'source_details', 'source_url', 'submission_date', 'submitter', 'notes']
+    batches['sources'] = records(text['source_name'] != '', source_columns)
+    hashes['sources'] = hashed('sources', text['source_name'] != '', source_columns)
+    batches['content_hashes'] = hashes
+    return batches, errors
+
+def _write_batch(c, statements, rows, on_error, bulk=None):
+    """
+    Write a batch of rows with executemany, or with `bulk` if given. If the
+    batch fails it is undone and the rows are written one by one with the
+    statements, reporting each failure.
+
+    Args:
+        c: sqlite3 cursor
+        statements (list): (sql, params function) pairs run for each row; a
+            params function returning None skips its statement for that row
+        rows (list): (row_number, values) pairs
+        on_error: Called with (row_number, values, exception) for each failed row
+        bulk: Function writing all rows at once, called with (c, rows)
+
+    Returns:
+        int: Number of rows written
+    """
+    if not rows:
+        return 0
+    c.execute('SAVEPOINT import_batch')
+    try:
+        if bulk:
+            bulk(c, rows)
+        else:
+            for sql, params in statements:
+                c.executemany(sql, [p for p in (params(values) for _, values in rows) if p is not None])
+        c.execute('RELEASE import_batch')
+        return len(rows)
+    except Exception:
+        c.execute('ROLLBACK TO import_batch')
+        c.execute('RELEASE import_batch')
+
+    written = 0
+    for row_number, values in rows:
+        try:
+            for sql, params in statements:
+                row_params = params(values)
+                if row_params is not None:
+                    c.execute(sql, row_params)
+            written += 1
+        except Exception as e:
+            on_error(row_number, values, e)
+    return written
+
+def _stage_rows(c, name, columns, rows):
+    """
+    Load rows into a temp staging table, emptied first.
+
+    Returns:
+        str: Name of the staging table; row_number holds each row's sheet row
+    """
+    stage = f'import_stage_{name}'
+    c.execute(f"CREATE TEMP TABLE IF NOT EXISTS {stage} (row_number INTEGER, {', '.join(columns)})")
+    c.execute(f'DELETE FROM {stage}')
+    c.executemany(
+        f"INSERT INTO {stage} VALUES ({', '.join(['?'] * (len(columns) + 1))})",
+        [(row_number,) + tuple(values) for row_number, values in rows]
+    )
+    return stage
+
+def _upsert_staged(c, stage, table, key, columns, changed=None, derived=None):
+    """
+    Apply staged rows to a table in one INSERT ... ON CONFLICT DO UPDATE.
+    Only the last staged row for each key is applied, as if each row had
+    updated the one before it.
+
+    Args:
+        changed (str): Optional condition an existing row must meet to be updated
+        derived (dict): Optional further columns, each with the SQL expression
+            over the staged row that computes it
+    """
+    derived = derived or {}
+    selected = [key] + columns + [f'{expression} AS {column}' for column, expression in derived.items()]
+    updated = columns + list(derived)
+    sql = f'''
+        INSERT INTO {table} ({key}, {', '.join(updated)})
+        SELECT {', '.join(selected)} FROM {stage}
+        WHERE row_number IN (SELECT MAX(row_number) FROM {stage} GROUP BY {key})
+        ON CONFLICT ({key}) DO UPDATE SET {', '.join(f'{column} = excluded.{column}' for column in updated)}
+    '''
+    if changed:
+        sql += f' WHERE {changed}'
+    c.execute(sql)
+
+def _upsert_dimension(batch):
+    """Bulk writer for organisms, freezers or plasmids, see DIMENSION_UPSERTS"""
+    table, key, columns = DIMENSION_UPSERTS[batch]
+
+    def bulk(c, rows):
+        _upsert_staged(c, _stage_rows(c, batch, [key] + columns, rows), table, key, columns)
+    return bulk
+
+def _upsert_sequences(c, rows):
+    """Bulk writer for ORF sequences, into the split tables or the legacy orf_sequence table"""
+    stage = _stage_rows(c, 'sequences', SEQUENCE_STAGE_COLUMNS, rows)
+    payload_columns = ['orf_sequence', 'orf_sequence_packed']
+
+    if orf_metadata_table_name(c) == 'orf_metadata':
+        # orf_sequence is a view, which cannot be upserted; write its tables.
+        # The payload row is only rewritten when the sequence changed.
+        metadata_columns = [column for column in SEQUENCE_STAGE_COLUMNS[1:] if column not in payload_columns]
+        _upsert_staged(c, stage, 'orf_metadata', 'orf_id', metadata_columns, derived=_display_name(c, 'orf_metadata', stage))
+        _upsert_staged(c, stage, 'orf_sequence_blob', 'orf_id', payload_columns, changed=(
+            'orf_sequence IS NOT excluded.orf_sequence '
+            'OR orf_sequence_packed IS NOT excluded.orf_sequence_packed'
+        ))
+        return
+
+    c.execute('PRAGMA table_info(orf_sequence)')
+    table_columns = [column[1] for column in c.fetchall()]
+    columns = SEQUENCE_STAGE_COLUMNS[1:]
+    if 'orf_sequence_packed' not in table_columns:
+        if any(values[4] is not None for _, values in rows):
+            raise sqlite3.OperationalError('table orf_sequence has no column named orf_sequence_packed')
+        columns = [column for column in columns if column != 'orf_sequence_packed']
+    _upsert_staged(c, stage, 'orf_sequence', 'orf_id', columns, derived=_display_name(c, 'orf_sequence', stage))
+
+def _display_name(c, table, stage):
+    """
+    display_name of the staged ORFs, written with them so the display name
+    triggers have nothing left to do; empty if the table has no such column
+    """
+    c.execute(f'PRAGMA table_info({table})')
+    if 'display_name' not in [column[1] for column in c.fetchall()]:
+        return {}
+    return {'display_name': resolved_display_name(f'{stage}.orf_id', f'{stage}.orf_name')}
+
+def content_hashes_exist(c):
+    """Check whether the import_content_hashes table has been created"""
+    c.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='import_content_hashes'")
+    return c.fetchone() is not None
+
+def _skip_unchanged(c, batch, rows, hashes):
+    """
+    Drop the records whose content hash is already recorded, comparing the
+    whole batch with one join.
+
+    Args:
+        hashes (list): (row_key, content_hash) of each row, see prepare_unified_rows
+
+    Returns:
+        tuple: (rows, row_keys, row_hashes) of the records to write, and the
+        number of records skipped
+    """
+    keys = [key for key, _ in hashes]
+    row_hashes = [row_hash for _, row_hash in hashes]
+    c.execute('CREATE TEMP TABLE IF NOT EXISTS import_hash_stage (position INTEGER, row_key TEXT, content_hash INTEGER)')
+    c.execute('DELETE FROM import_hash_stage')
+    c.executemany('INSERT INTO import_hash_stage VALUES (?, ?, ?)',
+                  [(position, key, row_hash) for position, (key, row_hash) in enumerate(hashes)])
+    c.execute('''
+        SELECT s.position FROM import_hash_stage s
+        JOIN import_content_hashes h
+        ON h.entity = ? AND h.row_key = s.row_key AND h.content_hash = s.content_hash
+    ''', (batch,))
+    unchanged = {position for (position,) in c.fetchall()}
+    if batch in KEYED_BATCHES:
+        # Only the last row for each ID is applied, so it decides for all of them
+        last = {key: position for position, key in enumerate(keys)}
+        unchanged = {position for position, key in enumerate(keys) if last[key] in unchanged}
+
+    kept = [position for position in range(len(rows)) if position not in unchanged]
+    return [rows[p] for p in kept], [keys[p] for p in kept], [row_hashes[p] for p in kept], len(unchanged)
+
+def _record_content_hashes(c, batch, rows, keys, row_hashes, failed):
+    """Record the hashes of the written records; failed holds the row numbers that were not written"""
+    if batch in KEYED_BATCHES:
+        # One hash per ID, the last row's, unless that row failed
+        latest = {}
+        for (row_number, _), key, row_hash in zip(rows, keys, row_hashes):
+            latest[key] = None if row_number in failed else row_hash
+        c.executemany('DELETE FROM import_content_hashes WHERE entity = ? AND row_key = ?',
+                      [(batch, key) for key in latest])
+        recorded = [(batch, key, row_hash) for key, row_hash in latest.items() if row_hash is not None]
+    else:
+        recorded = [(batch, key, row_hash) for (row_number, _), key, row_hash in zip(rows, keys, row_hashes)
+                    if row_number not in failed]
+    c.executemany('INSERT OR IGNORE INTO import_content_hashes (entity, row_key, content_hash) VALUES (?, ?, ?)',
+                  recorded)
+
+def write_unified_rows(conn, batches, stats, errors):
+    """
+    Write prepared unified import rows. The caller commits; run it through
+    the database writer.
+
+    Args:
+        conn: sqlite3 connection
+        batches (dict): From prepare_unified_rows
+        stats (dict): Counters to add the written rows to, and the skipped
+            unchanged records to stats['unchanged']
+        errors (list): (row_number, step, message) list to add failures to
+    """
+    c = conn.cursor()
+    hashes = batches.get('content_hashes', {}) if content_hashes_exist(c) else {}
+
+    def write(batch, statements, on_error, bulk=None):
+        """Write a batch, skipping its unchanged records and recording the hashes of those written"""
+        rows = batches.get(batch, [])
+        if batch not in hashes:
+            return _write_batch(c, statements, rows, on_error, bulk)
+
+        rows, keys, row_hashes, unchanged = _skip_unchanged(c, batch, rows, hashes[batch])
+        stats['unchanged'] = stats.get('unchanged', 0) + unchanged
+        failed = set()
+
+        def on_row_error(row_number, values, e):
+            failed.add(row_number)
+            on_error(row_number, values, e)
+
+        written = _write_batch(c, statements, rows, on_row_error, bulk)
+        _record_content_hashes(c, batch, rows, keys, row_hashes, failed)
+        return written
+
+    def report(step, describe):
+        def on_error(row_number, values, e):
+            errors.append((row_number, STEPS.index(step), f"Row {row_number}: {describe(values, e)}"))
+        return on_error
+
+    # Staged and applied with one upsert per table; if that fails the rows
+    # are written one at a time to find the bad ones
+    for batch, (table, key, columns) in DIMENSION_UPSERTS.items():
+        statements = [
+            (f"UPDATE {table} SET {', '.join(f'{column} = ?' for column in columns)} WHERE {key} = ?",
+             lambda values: values[1:] + values[:1]),
+            (f"INSERT OR IGNORE INTO {table} ({key}, {', '.join(columns)}) VALUES ({', '.join(['?'] * (len(columns) + 1))})",
+             lambda values: values),
+        ]
+        step = batch[:-1]
+        on_error = report(step, lambda values, e, step=step: f"Error with {step} data: {str(e)}")
+        stats[batch] += write(batch, statements, on_error, bulk=_upsert_dimension(batch))
+
+    packed_columns = SEQUENCE_STAGE_COLUMNS
+    text_columns = [column for column in SEQUENCE_STAGE_COLUMNS if column != 'orf_sequence_packed']
+    stats['sequences'] += write('sequences', [
+        (f"INSERT OR REPLACE INTO orf_sequence ({', '.join(packed_columns)}) VALUES ({', '.join(['?'] * len(packed_columns))})",
+         lambda values: values if values[4] is not None else None),
+        (f"INSERT OR REPLACE INTO orf_sequence ({', '.join(text_columns)}) VALUES ({', '.join(['?'] * len(text_columns))})",
+         lambda values: values[:4] + values[5:] if values[4] is None else None),
+    ], report('sequence', lambda values, e: f"Error inserting sequence: {str(e)}"), bulk=_upsert_sequences)
+
+    def position_error(label):
+        def describe(values, e):
+            if isinstance(e, sqlite3.IntegrityError):
+                return f"{label} position already exists (orf_id: {values[0]}, plate: {values[1]}, well: {values[2]})"
+            return f"Error inserting {label[0].lower() + label[1:]} position: {str(e)}"
+        return describe
+
+    stats['entry_positions'] += write('entry_positions', [(
+        '''INSERT INTO orf_position (
+               orf_id, plate, well, freezer_id, plasmid_id, orf_create_date
+           ) VALUES (?, ?, ?, ?, ?, ?)''',
+        lambda values: values
+    )], report('entry_position', position_error('Entry')))
+
+    for batch, label in [('yeast_ad_positions', 'Yeast AD'), ('yeast_db_positions', 'Yeast DB')]:
+        stats[batch] += write(batch, [(
+            'INSERT INTO yeast_orf_position (orf_id, plate, well, position_type) VALUES (?, ?, ?, ?)',
+            lambda values: values
+        )], report(batch[:-1], position_error(label)))
+
+    stats['sources'] += write('sources', [(
+        '''INSERT INTO orf_sources (
+               orf_id, source_name, source_details, source_url, submission_date, submitter, notes
+           ) VALUES (?, ?, ?, ?, ?, ?, ?)''',
+        lambda values: values
+    )], report('source', lambda values, e: f"Error inserting source information: {str(e)}"))
+
+def unified_csv_chunks(file_path, columns, chunk_size, skip_rows=0, header=True):
+    """
+    Read a unified import CSV in chunks, every cell as text.
+
+    Reading all cells as text keeps chunks consistent: per-chunk type
+    inference would read the same column as numbers in one chunk and as text
+    in the next.
+
+    Args:
+        file_path: Path to the CSV file, or a file object
+        columns (list): Column names to give the chunks (the file's header
+            after map_column_names)
+        chunk_size (int): Rows per chunk
+        skip_rows (int): Data rows to skip, e.g. those a resumed import has
+            already committed
+        header (bool): False for a file object already read past its header
+
+    Yields:
+        DataFrame: Consecutive chunks; the index continues across chunks and
+        counts the skipped rows, so row numbers stay those of the sheet
+    """
+    # Skipped lines are counted after the header line, if there is one
+    skip = range(int(header), skip_rows + int(header)) if skip_rows else None
+    # Without the header, the number of columns is fixed from the given names
+    options = {} if header else {'header': None, 'names': range(len(columns))}
+    with pd.read_csv(file_path, dtype=str, chunksize=chunk_size, skiprows=skip, **options) as reader:
+        for chunk in reader:
+            chunk.columns = columns
+            if skip_rows:
+                chunk.index += skip_rows
+            yield chunk
+
+def import_unified_chunks(conn, chunks, stats, errors, pack_sequences=False, progress=None):
+    """
+    Prepare and write unified import rows one chunk at a time. The caller
+    commits; run it through the database writer so the whole import is still
+    one transaction.
+
+    Each chunk is written in its own savepoint. A chunk that fails for a
+    reason other than a bad row is rolled back and the error raised, which
+    rolls back the whole import.
+
+    Args:
+        conn: sqlite3 connection
+        chunks: Iterable of DataFrames, see unified_csv_chunks
+        stats (dict): Counters to add the written rows to
+        errors (list): (sheet, row_number, step, message) list to add failures
+            to (see sheet_errors)
+        pack_sequences (bool): Store sequences in the packed form where it is smaller
+        progress: Called with (rows_parsed, rows_written, stats, errors)
+            after each chunk is parsed and after it is written; an exception
+            it raises stops the import and rolls it back
+
+    Returns:
+        int: Number of rows read
+    """
+    rows_read = 0
+    for chunk in chunks:
+        if chunk.empty:
+            continue
+        sheet = chunk.attrs.get(SHEET_ATTR)
+        batches, chunk_errors = prepare_unified_rows(chunk, pack_sequences)
+        errors.extend(sheet_errors(chunk, chunk_errors))
+        if progress:
+            progress(rows_read + len(chunk), rows_read, stats, errors)
+
+        conn.execute('SAVEPOINT import_chunk')
+        try:
+            write_errors = []
+            write_unified_rows(conn, batches, stats, write_errors)
+            errors.extend(sheet_errors(chunk, write_errors))
+            conn.execute('RELEASE import_chunk')
+        except Exception:
+            logger.error(f"Import failed in rows {chunk.index[0] + 2}-{chunk.index[-1] + 2}"
+                         + (f" of sheet {sheet}" if sheet else ''))
+            conn.execute('ROLLBACK TO import_chunk')
+            conn.execute('RELEASE import_chunk')
+            raise
+
+        rows_read += len(chunk)
+        logger.info(f"Unified import: {rows_read} rows processed")
+        if progress:
+            progress(rows_read, rows_read, stats, errors)
+    return rows_read
+
+def sheet_errors(chunk, errors):
+    """
+    The (row_number, step, message) errors of a chunk's rows as (sheet,
+    row_number, step, message), sheet being the position of the chunk's sheet
+    among those read (0 unless it comes from a multi-sheet workbook). Errors
+    of a multi-sheet workbook name the sheet in their row labels, since each
+    sheet numbers its rows from 2
+    """
+    sheet = chunk.attrs.get(SHEET_ATTR)
+    if not sheet:
+        return [(0, row_number, step, message) for row_number, step, message in errors]
+    position = chunk.attrs.get(SHEET_INDEX_ATTR, 0)
+    return [(position, row_number, step,
+             re.sub(r'^Row (\d+):', lambda match: f"Sheet '{sheet}' row {match.group(1)}:", message))
+            for row_number, step, message in errors]
+
+def error_order(error):
+    """Sort key of (sheet, row_number, step, message) errors: sheet order, then row order, then write order"""
+    return error[:3]
+
+def error_messages(errors):
+    """Error messages in sheet order, and for each row in the order its records are written"""
+    return [error[3] for error in sorted(errors, key=error_order)]
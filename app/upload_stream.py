@@ -0,0 +1,228 @@
+"""
+Uploads read as they arrive, for the Reagent Database application.
+
+Reading request.files makes Werkzeug receive the whole multipart body before
+the view runs, spooling a large file to a temporary file, which /import_file
+then copied into the upload folder for the import to read back. Instead the
+body is decoded part by part as it is read from the request stream
+(receive_form), and each file part goes straight to where it is needed:
+
+- UploadPipe hands the bytes to an import running on another thread, so a
+  CSV file is parsed while the rest of it is still arriving. It can also
+  write one copy of the file, for an import run that may have to be resumed.
+- UploadFile writes the file to disk, for formats that need random access
+  (Excel) and imports that read a saved file.
+"""
+
+import io
+import os
+import queue
+import hashlib
+import threading
+
+from werkzeug.sansio.multipart import MultipartDecoder, Field, File, Data, Epilogue, NeedData
+
+# Bytes read from the request stream at a time
+BLOCK_SIZE = 64 * 1024
+
+# Blocks an UploadPipe holds for its reader (16 MB); while it is full, the
+# upload waits for the import to catch up
+PIPE_BLOCKS = 256
+
+# Largest form field kept in memory
+MAX_FIELD_SIZE = 1024 * 1024
+
+class UploadInterrupted(Exception):
+    """The upload ended before the whole file had arrived"""
+
+def receive_form(stream, boundary, open_file):
+    """
+    Read a multipart/form-data body, handing each file part to a sink as it
+    arrives.
+
+    Args:
+        stream: The request body (request.stream)
+        boundary (bytes): Multipart boundary from the Content-Type header
+        open_file: Called with (fields, name, filename) when a file part
+            begins, fields being the form fields received before it; returns
+            a sink with write(data), finish() and abort(error), or None to
+            skip the part
+
+    Returns:
+        dict: Form fields, name -> value; files are left to their sinks
+
+    Raises:
+        Exception: The body could not be read or decoded; the open sink is
+        aborted first
+    """
+    decoder = MultipartDecoder(boundary, MAX_FIELD_SIZE)
+    fields = {}
+    part = sink = None
+    value = []
+    try:
+        while True:
+            event = decoder.next_event()
+            if isinstance(event, NeedData):
+                data = stream.read(BLOCK_SIZE)
+                # An empty read ends the body
+                decoder.receive_data(data or None)
+            elif isinstance(event, Epilogue):
+                return fields
+            elif isinstance(event, Field):
+                part, sink, value = event, None, []
+            elif isinstance(event, File):
+                part, value = event, []
+                sink = open_file(fields, event.name, event.filename)
+            elif isinstance(event, Data):
+                if isinstance(part, Field):
+                    value.append(event.data)
+                    if not event.more_data:
+                        fields[part.name] = b''.join(value).decode('utf-8', 'replace')
+                elif sink is not None:
+                    sink.write(event.data)
+                    if not event.more_data:
+                        sink.finish()
+                        sink = None
+    except Exception as e:
+        if sink is not None:
+            sink.abort(e)
+        raise
+
+class UploadFile:
+    """Sink writing a file part to disk"""
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self._file = open(file_path, 'wb')
+
+    def write(self, data):
+        self._file.write(data)
+
+    def finish(self):
+        self._file.close()
+
+    def abort(self, error):
+        self._file.close()
+        os.unlink(self.file_path)
+
+class UploadPipe(io.RawIOBase):
+    """
+    Sink passing a file part to a reader on another thread.
+
+    The request thread writes the blocks as they arrive; the import reads
+    them as a file object, waiting when it gets ahead of the upload. If the
+    reader stops early, for example because the import failed, the rest of
+    the upload is still received (and copied), but no longer queued.
+
+    With copy_path every block is also written to that file. A reader that
+    needs the copy once the upload is over claims it (claim_copy); an
+    unclaimed copy is deleted once both the upload and the reader are done.
+    """
+
+    def __init__(self, copy_path=None, max_blocks=PIPE_BLOCKS):
+        super().__init__()
+        self.copy_path = copy_path
+        self._copy = open(copy_path, 'wb') if copy_path else None
+        self._digest = hashlib.sha256()
+        self._blocks = queue.Queue(maxsize=max_blocks)
+        self._pending = memoryview(b'')
+        self._at_end = False
+        self._reader_closed = threading.Event()
+        self._lock = threading.Lock()
+        self._upload_done = False
+        self._sha256 = None
+        self._claimed = False
+        self._on_done = None
+
+    # Request thread
+
+    def write(self, data):
+        if self._copy:
+            self._copy.write(data)
+            self._digest.update(data)
+        self._put(data)
+
+    def finish(self):
+        """The whole file has arrived"""
+        if self._copy:
+            self._copy.close()
+        self._sha256 = self._digest.hexdigest()
+        with self._lock:
+            self._upload_done = True
+        self._put(None)
+        self._settle()
+
+    def abort(self, error):
+        """The upload broke off"""
+        if self._copy:
+            self._copy.close()
+        with self._lock:
+            self._upload_done = True
+        self._put(UploadInterrupted('The upload was interrupted before the whole file had arrived'))
+        self._settle()
+
+    def _put(self, item):
+        # Once the reader is gone nothing is queued; close() empties the queue
+        # after setting the flag, so a put already waiting still gets a slot
+        if not self._reader_closed.is_set():
+            self._blocks.put(item)
+
+    # Reader thread
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if not self._pending:
+            if self._at_end:
+                return 0
+            item = self._blocks.get()
+            if isinstance(item, Exception):
+                self._at_end = True
+                raise item
+            if item is None:
+                self._at_end = True
+                return 0
+            self._pending = memoryview(item)
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+    def claim_copy(self, on_done):
+        """
+        Keep the copy after the upload. on_done is called with the file's
+        SHA-256 once the upload has finished, or with None if it was
+        interrupted, leaving a partial copy.
+        """
+        with self._lock:
+            self._claimed = True
+            upload_done = self._upload_done
+            if not upload_done:
+                self._on_done = on_done
+        if upload_done:
+            on_done(self._sha256)
+
+    def close(self):
+        """Stop reading; the rest of the upload is no longer queued"""
+        if not self._reader_closed.is_set():
+            self._reader_closed.set()
+            while True:
+                try:
+                    self._blocks.get_nowait()
+                except queue.Empty:
+                    break
+            self._settle()
+        super().close()
+
+    def _settle(self):
+        # Called as the upload ends and as the reader closes
+        with self._lock:
+            if not self._upload_done:
+                return
+            on_done, self._on_done = self._on_done, None
+            delete = not self._claimed and self._reader_closed.is_set() and self.copy_path
+        if on_done is not None:
+            on_done(self._sha256)
+        elif delete and os.path.exists(self.copy_path):
+            os.unlink(self.copy_path)
@@ -3,9 +3,16 @@ import pandas as pd
 from datetime import datetime
 import sqlite3
 from config import get_db_path
+from app.shared_lookups import get_lookup_table
+from fasta_reader import is_fasta_file
 
 def fetch_hgnc_mapping():
     """Fetch HGNC symbol mapping from database"""
+    # Worker processes share one published copy when shared lookups are enabled
+    hgnc_map = get_lookup_table('hgnc')
+    if hgnc_map is not None:
+        return hgnc_map
+    
     DB_PATH = get_db_path()
     conn = sqlite3.connect(DB_PATH)
     try:
@@ -19,6 +26,75 @@ def fetch_hgnc_mapping():
     finally:
         conn.close()
 
+def orf_metadata_table(conn):
+    """
+    Name of the table to query for ORF fields other than the sequence.
+
+    Once migrations/split_orf_sequences.py has run, orf_metadata holds these
+    fields without the sequence payload and orf_sequence is a view that joins
+    the payload back in; older databases only have the orf_sequence table.
+    """
+    c = conn.cursor()
+    c.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='orf_metadata'")
+    return 'orf_metadata' if c.fetchone() else 'orf_sequence'
+
+def orf_display_columns(conn, table, alias='os'):
+    """
+    Select list for ORF rows whose names and IDs were resolved at write time.
+
+    orf_name is read from display_name (the HGNC symbol if there is one) and
+    the stored name is returned as original_name and previous_name, the same
+    fields format_database_ids produces. Returns None if the table has no
+    display_name column yet (see migrations/canonicalize_orf_ids.py), in which
+    case callers fall back to format_database_ids.
+    """
+    c = conn.cursor()
+    c.execute(f"PRAGMA table_info({table})")
+    columns = [column[1] for column in c.fetchall()]
+    if 'display_name' not in columns:
+        return None
+    select_list = [f'{alias}.display_name AS orf_name' if col == 'orf_name' else f'{alias}.{col}' for col in columns]
+    select_list.append(f'{alias}.orf_name AS original_name')
+    select_list.append(f'NULLIF({alias}.orf_name, {alias}.display_name) AS previous_name')
+    return ', '.join(select_list)
+
+def exact_match_probes(conn, orf_table, ignore_case=False):
+    """
+    Subquery selecting the orf_id of every ORF whose ID, name or HGNC symbol
+    equals a search term.
+
+    A single WHERE that ORs these columns together, especially through the
+    LEFT JOIN to human_gene_data, leaves SQLite no choice but to scan the ORF
+    table. Each probe here is a lookup on its own index (see
+    setup_db.create_search_indexes) and the UNION of their results is joined
+    back to the ORF table by primary key.
+
+    Args:
+        conn: sqlite3 connection
+        orf_table (str): ORF table being searched, from orf_metadata_table
+        ignore_case (bool): Compare with COLLATE NOCASE, using the NOCASE indexes
+
+    Returns:
+        tuple: (SQL, number of ? placeholders), every placeholder taking the term
+    """
+    collate = ' COLLATE NOCASE' if ignore_case else ''
+    c = conn.cursor()
+    c.execute(f"PRAGMA table_info({orf_table})")
+    columns = [column[1] for column in c.fetchall()]
+
+    probes = [
+        f'SELECT orf_id FROM {orf_table} WHERE orf_id = ?{collate}',
+        f'SELECT orf_id FROM {orf_table} WHERE orf_name = ?{collate}',
+    ]
+    if 'display_name' in columns:
+        # display_name already holds the HGNC symbol where there is one
+        probes.append(f'SELECT orf_id FROM {orf_table} WHERE display_name = ?{collate}')
+    else:
+        c.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='human_gene_data'")
+        if c.fetchone():
+            probes.append(f'SELECT orf_id FROM human_gene_data WHERE hgnc_approved_symbol = ?{collate}')
+    return ' UNION '.join(probes), len(probes)
+
 def format_database_ids(orf_data):
     """
     Format database IDs to remove decimal points, map HGNC symbols
@@ -30,6 +106,10 @@ def format_database_ids(orf_data):
     # Fetch HGNC mapping 
     hgnc_map = fetch_hgnc_mapping()
 
+    # Packed sequences are raw bytes and cannot be serialized; callers that
+    # need the sequence decode it beforehand with unpack_orf_sequence
+    orf_data.pop('orf_sequence_packed', None)
+
     # Handle Entrez ID 
     if 'orf_entrez_id' in orf_data and orf_data['orf_entrez_id']:
         try:
@@ -50,11 +130,13 @@ def format_database_ids(orf_data):
 
     return orf_data
 
-# Allowed file extensions
-ALLOWED_EXTENSIONS = {'csv', 'xlsx'}
+# Allowed file extensions; FASTA files may also be gzipped
+ALLOWED_EXTENSIONS = {'csv', 'xlsx', 'parquet', 'pq', 'fasta', 'fa', 'fna', 'ffn'}
 
 def allowed_file(filename):
     """Check if a file extension is allowed"""
+    if is_fasta_file(filename):
+        return True
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 def get_column_info(import_type):
@@ -0,0 +1,49 @@
+"""
+Canonical forms for external database IDs stored with ORFs.
+
+IDs are canonicalized once, when a row is written, so that reads can return
+the stored values directly. Spreadsheet imports in particular turn Entrez
+Gene IDs into floats ("672.0"), and Ensembl/UniProt accessions arrive with
+stray whitespace or in lower case.
+"""
+
+def canonical_entrez_id(value):
+    """Entrez Gene IDs are integers: "672.0" and " 672 " both become "672" """
+    if value is None:
+        return value
+    value = str(value).strip()
+    try:
+        number = float(value)
+    except ValueError:
+        return value
+    if number.is_integer():
+        return str(int(number))
+    return value
+
+def canonical_accession(value):
+    """Ensembl and UniProt accessions are upper case without surrounding whitespace"""
+    if value is None:
+        return value
+    return str(value).strip().upper()
+
+# ORF columns holding external IDs, with the function that canonicalizes each
+EXTERNAL_ID_COLUMNS = {
+    'orf_entrez_id': canonical_entrez_id,
+    'orf_ensembl_id': canonical_accession,
+    'orf_uniprot_id': canonical_accession,
+}
+
+def canonicalize_orf_ids(orf_data):
+    """
+    Canonicalize the external ID fields of an ORF record in place.
+
+    Args:
+        orf_data (dict): ORF fields; missing ID fields are left alone
+
+    Returns:
+        dict: The same dict, for chaining
+    """
+    for column, canonical in EXTERNAL_ID_COLUMNS.items():
+        if column in orf_data:
+            orf_data[column] = canonical(orf_data[column])
+    return orf_data
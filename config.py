@@ -17,6 +17,51 @@ DEFAULT_CONFIG = {
     'use_onedrive': False,
     'onedrive_path': '',
     
+    # Store ORF sequences in the packed 2-bit format (see sequence_codec.py)
+    'pack_sequences': False,
+    
+    # Seconds between change_log compactions (0 disables compaction)
+    'change_log_compact_interval': 3600,
+    
+    # Longest a write waits for further writes to join its commit (milliseconds)
+    'write_group_commit_ms': 2,
+    
+    # Maximum number of writes per group commit
+    'write_group_max_size': 100,
+    
+    # Seconds between rebuilds of dirty ORF documents (0 disables the refresher)
+    'orf_document_refresh_interval': 5,
+    
+    # Publish lookup tables in shared memory for multiple worker processes
+    # (see app/shared_lookups.py), and the seconds between refreshes
+    'shared_lookups': False,
+    'shared_lookup_refresh_interval': 5,
+    
+    # Cache-Control header of the catalog API endpoints, by endpoint name
+    # (organisms, plasmids, freezers, orfs, stats) with a default for the rest;
+    # clients revalidate with the ETag, which is answered with 304 if unchanged
+    'api_cache_control': {'default': 'no-cache'},
+    
+    # Rows read and written at a time by CSV and Excel imports
+    'import_chunk_size': 10000,
+    
+    # Background import jobs run at the same time (see app/import_jobs.py)
+    'import_workers': 2,
+    
+    # Worker processes reading the sheets of a multi-sheet Excel import at the
+    # same time (see xlsx_reader.py)
+    'import_sheet_workers': 2,
+    
+    # Regular expression taking orf_id, and optionally orf_name and
+    # orf_annotation, from FASTA header lines as named groups (see
+    # fasta_reader.py); by default the first word is the ID
+    'fasta_header_pattern': r'(?P<orf_id>\S+)\s*(?P<orf_annotation>.*)',
+    
+    # Open the database in WAL mode, so reads are not blocked while an import
+    # or other write is in progress. Never used for OneDrive databases, since
+    # the sync client copies the database file without its -wal file
+    'wal_mode': True,
+    
     # Application settings
     'debug': True,
     'port': 5000
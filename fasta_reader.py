@@ -0,0 +1,179 @@
+"""
+Streaming reads of FASTA ORF sequence files.
+
+Sequences in spreadsheet cells are slow to parse and Excel cuts cells off at
+32,767 characters. A FASTA file (.fasta, .fa, .fna or .ffn, optionally
+gzipped) is read one line at a time instead, and its records are handed on as
+chunks of unified import rows with every cell as text, like the chunks of a
+CSV file (see app/unified_import.unified_csv_chunks). Memory then depends on
+the chunk size rather than the size of the file.
+
+orf_id, and optionally orf_name and orf_annotation, are taken from each header
+line with a regular expression using named groups (fasta_header_pattern in
+app_config.json). The default takes the first word as the ID and the rest of
+the line as the annotation:
+
+    >YAL001C TFC3 SGDID:S000000001, Chr I from 151006-147594
+
+An ORF without a name group is named after its ID. orf_length_bp is the number
+of bases, orf_with_stop whether the sequence ends in a stop codon (TAA, TAG,
+TGA) in frame, and orf_open whether it is an open reading frame: a whole
+number of codons, starting with ATG, with no stop codon before the last codon.
+Both are no for a sequence with characters other than IUPAC nucleotide codes,
+which the import rejects.
+"""
+
+import io
+import re
+import gzip
+
+import pandas as pd
+
+from sequence_codec import SEQUENCE_PATTERN
+
+FASTA_EXTENSIONS = ('.fasta', '.fa', '.fna', '.ffn')
+
+# First word as the ID, the rest of the header as the annotation
+DEFAULT_HEADER_PATTERN = r'(?P<orf_id>\S+)\s*(?P<orf_annotation>.*)'
+
+# Columns of the chunks, as named by map_column_names
+FASTA_COLUMNS = ['orf_id', 'orf_name', 'orf_annotation', 'orf_sequence', 'orf_length_bp',
+                 'orf_with_stop', 'orf_open']
+
+# A chunk is also ended once its sequences reach this many bases
+MAX_CHUNK_BASES = 64 * 1024 * 1024
+
+STOP_CODONS = ['TAA', 'TAG', 'TGA']
+
+# A stop codon in frame with at least one more codon after it
+INTERNAL_STOP_PATTERN = r'^(?:...)*?(?:TAA|TAG|TGA)(?=...)'
+
+GZIP_MAGIC = b'\x1f\x8b'
+
+def is_fasta_file(filename):
+    """Whether a file name has a FASTA extension, optionally followed by .gz"""
+    name = filename.lower()
+    if name.endswith('.gz'):
+        name = name[:-3]
+    return name.endswith(FASTA_EXTENSIONS)
+
+def _text_lines(source):
+    """Lines of a FASTA file given as a path or a binary file object, gunzipped if compressed"""
+    stream = open(source, 'rb') if isinstance(source, str) else source
+    stream = io.BufferedReader(stream) if not hasattr(stream, 'peek') else stream
+    if stream.peek(2)[:2] == GZIP_MAGIC:
+        stream = gzip.GzipFile(fileobj=stream)
+    return io.TextIOWrapper(stream, encoding='utf-8', errors='replace')
+
+def fasta_records(lines):
+    """
+    Parse FASTA records.
+
+    Yields:
+        tuple: (header without the '>', sequence with whitespace removed);
+        lines before the first header are ignored
+    """
+    header = None
+    sequence = []
+    for line in lines:
+        if line.startswith('>'):
+            if header is not None:
+                yield header, ''.join(sequence)
+            header = line[1:].strip()
+            sequence = []
+        elif header is not None:
+            sequence.append(''.join(line.split()))
+    if header is not None:
+        yield header, ''.join(sequence)
+
+def sequence_flags(sequences):
+    """
+    Stop codon and open reading frame flags of sequences.
+
+    Args:
+        sequences (Series): Nucleotide sequences, in either case, T or U
+
+    Returns:
+        tuple: (with_stop, open) boolean Series; both False for sequences
+        with characters other than IUPAC nucleotide codes
+    """
+    bases = sequences.str.upper().str.replace('U', 'T', regex=False)
+    whole_codons = (bases.str.len() % 3 == 0) & bases.str.fullmatch(SEQUENCE_PATTERN)
+    with_stop = whole_codons & (bases.str.len() >= 3) & bases.str[-3:].isin(STOP_CODONS)
+    internal_stop = bases.str.contains(INTERNAL_STOP_PATTERN, regex=True)
+    is_open = whole_codons & bases.str.startswith('ATG') & ~internal_stop
+    return with_stop, is_open
+
+def _frame(records, first_number, pattern):
+    headers = pd.Series([header for header, _ in records], dtype=object)
+    sequences = pd.Series([sequence for _, sequence in records], dtype=object)
+
+    fields = headers.str.extract(pattern)
+    for column in ['orf_name', 'orf_annotation']:
+        if column not in fields.columns:
+            fields[column] = float('nan')
+    fields = fields.replace('', float('nan'))
+    with_stop, is_open = sequence_flags(sequences)
+
+    df = pd.DataFrame({
+        'orf_id': fields['orf_id'],
+        # ORFs are named after their ID unless the header gives a name
+        'orf_name': fields['orf_name'].fillna(fields['orf_id']),
+        'orf_annotation': fields['orf_annotation'],
+        'orf_sequence': sequences.where(sequences != ''),
+        'orf_length_bp': sequences.str.len().astype(str),
+        'orf_with_stop': with_stop.map({True: 'yes', False: 'no'}),
+        'orf_open': is_open.map({True: 'yes', False: 'no'}),
+    }, columns=FASTA_COLUMNS)
+    # Record N gets row number N in error messages (index + 2, as for sheet rows)
+    df.index = pd.RangeIndex(first_number - 2, first_number - 2 + len(df))
+    return df
+
+def fasta_chunks(source, chunk_size, skip_rows=0, header_pattern=DEFAULT_HEADER_PATTERN):
+    """
+    Read a FASTA file in chunks of unified import rows, every cell as text.
+
+    Args:
+        source: Path to the file, or a binary file object (e.g. an upload
+            being received); gzipped files are recognized by their contents
+        chunk_size (int): Records per chunk
+        skip_rows (int): Records to skip, e.g. those a resumed import has
+            already committed
+        header_pattern (str): Regular expression matched at the start of
+            each header line, with an orf_id group and optionally orf_name
+            and orf_annotation groups
+
+    Yields:
+        DataFrame: Consecutive chunks with FASTA_COLUMNS. The index makes the
+        row number of record N (index + 2) N. A header the pattern does not
+        match leaves orf_id empty, so the import reports the record as missing
+        its ID
+
+    Raises:
+        ValueError: The pattern has no orf_id group
+    """
+    pattern = re.compile(header_pattern)
+    if 'orf_id' not in pattern.groupindex:
+        raise ValueError(f'FASTA header pattern has no orf_id group: {header_pattern}')
+    # Anchored at the start of the header, as re.match would be
+    pattern = f'^(?:{header_pattern})'
+
+    lines = _text_lines(source)
+    try:
+        records = []
+        bases = 0
+        first_number = skip_rows + 1
+        for number, record in enumerate(fasta_records(lines), start=1):
+            if number <= skip_rows:
+                continue
+            records.append(record)
+            bases += len(record[1])
+            if len(records) >= chunk_size or bases >= MAX_CHUNK_BASES:
+                yield _frame(records, first_number, pattern)
+                first_number += len(records)
+                records, bases = [], 0
+        if records:
+            yield _frame(records, first_number, pattern)
+    finally:
+        if isinstance(source, str):
+            lines.close()
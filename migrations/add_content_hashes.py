@@ -0,0 +1,71 @@
+"""
+Migration script to add the import_content_hashes table and its triggers.
+
+Unified imports record a content hash of every row they write, and skip rows
+whose hash is unchanged when the same sheet is imported again (see
+app/unified_import.py). The triggers drop a row's hashes when it is edited or
+deleted by anything else, so those rows are written again.
+"""
+
+import sqlite3
+import os
+import sys
+from datetime import datetime
+
+# Add parent directory to path so we can import config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import get_db_path
+from setup_db import create_content_hashes
+
+def migrate():
+    """Create the import_content_hashes table and its triggers"""
+    # Get the database path from configuration
+    DB_PATH = get_db_path()
+
+    if not os.path.exists(DB_PATH):
+        print(f'Error: Database does not exist at {DB_PATH}')
+        return False
+
+    print(f'Migrating database at {DB_PATH}')
+
+    # Create a backup of the database
+    backup_path = os.path.join(
+        os.path.dirname(DB_PATH),
+        f'db_backups/reagent_db_backup_{datetime.now().strftime("%Y%m%d_%H%M%S")}.sqlite'
+    )
+
+    # Ensure the backup directory exists
+    os.makedirs(os.path.dirname(backup_path), exist_ok=True)
+
+    # Copy the database file
+    import shutil
+    shutil.copy2(DB_PATH, backup_path)
+    print(f'Created backup at {backup_path}')
+
+    # Connect to the database
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+
+    try:
+        c.execute('BEGIN TRANSACTION')
+        create_content_hashes(c)
+        c.execute('COMMIT')
+        print('Content hashes enabled; the next import of each sheet still writes every row')
+        return True
+
+    except Exception as e:
+        c.execute('ROLLBACK')
+        print(f'Error during migration: {str(e)}')
+        import traceback
+        traceback.print_exc()
+        return False
+
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    success = migrate()
+    if success:
+        print('Migration completed successfully!')
+    else:
+        print('Migration failed!')
@@ -0,0 +1,71 @@
+"""
+Migration script to add the import_runs and import_run_errors tables.
+
+Unified imports commit in checkpointed batches and record their progress in
+import_runs, so a failed or cancelled import can be resumed from its last
+checkpoint instead of starting over (see app/import_runs.py). Rerunning it
+adds the owner_pid and sheet columns to tables created without them.
+"""
+
+import sqlite3
+import os
+import sys
+from datetime import datetime
+
+# Add parent directory to path so we can import config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import get_db_path
+from setup_db import create_import_runs
+
+def migrate():
+    """Create the import_runs and import_run_errors tables"""
+    # Get the database path from configuration
+    DB_PATH = get_db_path()
+
+    if not os.path.exists(DB_PATH):
+        print(f'Error: Database does not exist at {DB_PATH}')
+        return False
+
+    print(f'Migrating database at {DB_PATH}')
+
+    # Create a backup of the database
+    backup_path = os.path.join(
+        os.path.dirname(DB_PATH),
+        f'db_backups/reagent_db_backup_{datetime.now().strftime("%Y%m%d_%H%M%S")}.sqlite'
+    )
+
+    # Ensure the backup directory exists
+    os.makedirs(os.path.dirname(backup_path), exist_ok=True)
+
+    # Copy the database file
+    import shutil
+    shutil.copy2(DB_PATH, backup_path)
+    print(f'Created backup at {backup_path}')
+
+    # Connect to the database
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+
+    try:
+        c.execute('BEGIN TRANSACTION')
+        create_import_runs(c)
+        c.execute('COMMIT')
+        print('Import runs enabled')
+        return True
+
+    except Exception as e:
+        c.execute('ROLLBACK')
+        print(f'Error during migration: {str(e)}')
+        import traceback
+        traceback.print_exc()
+        return False
+
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    success = migrate()
+    if success:
+        print('Migration completed successfully!')
+    else:
+        print('Migration failed!')
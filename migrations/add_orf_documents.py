@@ -0,0 +1,74 @@
+"""
+Migration script to add the materialized orf_document table and its triggers.
+
+Search and the ORF detail pages read each ORF's assembled data from
+orf_document instead of joining five or six tables per request. Every ORF
+starts out with a dirty document; the application's background refresher
+builds them (see app/orf_documents.py), and until then reads assemble them
+from the underlying tables as before.
+"""
+
+import sqlite3
+import os
+import sys
+from datetime import datetime
+
+# Add parent directory to path so we can import config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import get_db_path
+from setup_db import create_orf_documents
+
+def migrate():
+    """Create orf_document and the triggers that mark documents dirty"""
+    # Get the database path from configuration
+    DB_PATH = get_db_path()
+
+    if not os.path.exists(DB_PATH):
+        print(f'Error: Database does not exist at {DB_PATH}')
+        return False
+
+    print(f'Migrating database at {DB_PATH}')
+
+    # Create a backup of the database
+    backup_path = os.path.join(
+        os.path.dirname(DB_PATH),
+        f'db_backups/reagent_db_backup_{datetime.now().strftime("%Y%m%d_%H%M%S")}.sqlite'
+    )
+
+    # Ensure the backup directory exists
+    os.makedirs(os.path.dirname(backup_path), exist_ok=True)
+
+    # Copy the database file
+    import shutil
+    shutil.copy2(DB_PATH, backup_path)
+    print(f'Created backup at {backup_path}')
+
+    # Connect to the database
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+
+    try:
+        c.execute('BEGIN TRANSACTION')
+        create_orf_documents(c)
+        c.execute('COMMIT')
+
+        c.execute('SELECT COUNT(*) FROM orf_document WHERE dirty = 1')
+        print(f'{c.fetchone()[0]} ORF documents will be built by the background refresher')
+        return True
+
+    except Exception as e:
+        c.execute('ROLLBACK')
+        print(f'Error during migration: {str(e)}')
+        import traceback
+        traceback.print_exc()
+        return False
+
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    success = migrate()
+    if success:
+        print('Migration completed successfully!')
+    else:
+        print('Migration failed!')
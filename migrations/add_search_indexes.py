@@ -0,0 +1,59 @@
+"""
+Migration script to add the indexes used by exact-match gene search.
+
+Exact-match search looks up the ORF ID, name and HGNC symbol with one
+indexed probe each; this creates those indexes, including the COLLATE NOCASE
+variants used for case-insensitive matching.
+"""
+
+import sqlite3
+import os
+import sys
+
+# Add parent directory to path so we can import config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import get_db_path
+from setup_db import create_search_indexes
+
+def migrate():
+    """Create the exact-match search indexes"""
+    # Get the database path from configuration
+    DB_PATH = get_db_path()
+
+    if not os.path.exists(DB_PATH):
+        print(f'Error: Database does not exist at {DB_PATH}')
+        return False
+
+    print(f'Migrating database at {DB_PATH}')
+
+    # Connect to the database
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+
+    try:
+        create_search_indexes(c)
+        conn.commit()
+
+        # Give the planner statistics for the new indexes
+        c.execute('ANALYZE')
+        conn.commit()
+
+        print('Search indexes created')
+        return True
+
+    except Exception as e:
+        conn.rollback()
+        print(f'Error during migration: {str(e)}')
+        import traceback
+        traceback.print_exc()
+        return False
+
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    success = migrate()
+    if success:
+        print('Migration completed successfully!')
+    else:
+        print('Migration failed!')
@@ -0,0 +1,147 @@
+"""
+Migration script to canonicalize ORF external IDs and add display names.
+
+Rewrites orf_entrez_id, orf_ensembl_id and orf_uniprot_id in their canonical
+form (see canonical_ids.py), adds the display_name column to the ORF metadata
+table, fills it from human_gene_data and creates the triggers that keep it
+current. Searches then read both directly instead of fixing them up per row.
+"""
+
+import sqlite3
+import os
+import sys
+from datetime import datetime
+
+# Add parent directory to path so we can import config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import get_db_path
+from canonical_ids import EXTERNAL_ID_COLUMNS
+from setup_db import orf_metadata_table_name, create_orf_sequence_view, create_display_names, create_search_indexes, create_change_log_triggers, create_orf_document_triggers, create_content_hash_triggers
+
+# Number of rows canonicalized per batch
+BATCH_SIZE = 1000
+
+def canonicalize_external_ids(c, table_name):
+    """Rewrite non-canonical external IDs, returning the number of rows changed"""
+    id_columns = list(EXTERNAL_ID_COLUMNS)
+    changed_count = 0
+    last_orf_id = ''
+    while True:
+        # Walk the table in primary key order, one batch at a time
+        c.execute(f'''
+            SELECT orf_id, {', '.join(id_columns)} FROM {table_name}
+            WHERE orf_id > ?
+            ORDER BY orf_id
+            LIMIT ?
+        ''', (last_orf_id, BATCH_SIZE))
+        rows = c.fetchall()
+        if not rows:
+            break
+        last_orf_id = rows[-1][0]
+
+        updates = []
+        for row in rows:
+            values = row[1:]
+            canonical_values = [EXTERNAL_ID_COLUMNS[col](value) for col, value in zip(id_columns, values)]
+            if list(values) != canonical_values:
+                updates.append((*canonical_values, row[0]))
+
+        c.executemany(f'''
+            UPDATE {table_name}
+            SET {', '.join(f'{col} = ?' for col in id_columns)}
+            WHERE orf_id = ?
+        ''', updates)
+        changed_count += len(updates)
+    return changed_count
+
+def migrate():
+    """Canonicalize external IDs and add the display_name column"""
+    # Get the database path from configuration
+    DB_PATH = get_db_path()
+
+    if not os.path.exists(DB_PATH):
+        print(f'Error: Database does not exist at {DB_PATH}')
+        return False
+
+    print(f'Migrating database at {DB_PATH}')
+
+    # Create a backup of the database
+    backup_path = os.path.join(
+        os.path.dirname(DB_PATH),
+        f'db_backups/reagent_db_backup_{datetime.now().strftime("%Y%m%d_%H%M%S")}.sqlite'
+    )
+
+    # Ensure the backup directory exists
+    os.makedirs(os.path.dirname(backup_path), exist_ok=True)
+
+    # Copy the database file
+    import shutil
+    shutil.copy2(DB_PATH, backup_path)
+    print(f'Created backup at {backup_path}')
+
+    # Connect to the database
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+
+    try:
+        # Start a transaction
+        c.execute('BEGIN TRANSACTION')
+
+        table_name = orf_metadata_table_name(c)
+
+        # Add the display_name column if it does not exist yet
+        c.execute(f"PRAGMA table_info({table_name})")
+        columns = [column[1] for column in c.fetchall()]
+        if 'display_name' not in columns:
+            print(f"Adding display_name column to {table_name} table")
+            c.execute(f'ALTER TABLE {table_name} ADD COLUMN display_name TEXT')
+
+        # The orf_sequence view lists its columns explicitly, and its triggers
+        # write display_name; recreated so rerunning the migration upgrades them
+        c.execute("SELECT 1 FROM sqlite_master WHERE type='view' AND name='orf_sequence'")
+        if c.fetchone():
+            c.execute('DROP VIEW orf_sequence')
+            create_orf_sequence_view(c)
+
+        changed_count = canonicalize_external_ids(c, table_name)
+        print(f'Canonicalized external IDs of {changed_count} ORFs')
+
+        create_display_names(c)
+        create_search_indexes(c)
+        print('Filled in display names from human_gene_data')
+
+        # human_gene_data may have just been created
+        c.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='change_log'")
+        if c.fetchone():
+            create_change_log_triggers(c)
+        c.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='orf_document'")
+        if c.fetchone():
+            create_orf_document_triggers(c)
+        c.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='import_content_hashes'")
+        if c.fetchone():
+            create_content_hash_triggers(c)
+
+        # Commit the transaction
+        c.execute('COMMIT')
+
+        print('Migration completed successfully')
+        return True
+
+    except Exception as e:
+        # If anything goes wrong, roll back the transaction
+        c.execute('ROLLBACK')
+        print(f'Error during migration: {str(e)}')
+        import traceback
+        traceback.print_exc()
+        return False
+
+    finally:
+        # Close the database connection
+        conn.close()
+
+if __name__ == "__main__":
+    success = migrate()
+    if success:
+        print('Migration completed successfully!')
+    else:
+        print('Migration failed!')
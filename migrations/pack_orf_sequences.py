@@ -0,0 +1,129 @@
+"""
+Migration script to convert ORF sequences to the packed 2-bit storage format.
+
+Adds the orf_sequence_packed BLOB column to orf_sequence, packs every existing
+text sequence into it and enables the pack_sequences option so that new
+entries are stored packed as well.
+"""
+
+import sqlite3
+import os
+import sys
+from datetime import datetime
+
+# Add parent directory to path so we can import config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import get_db_path, load_config, save_config
+from sequence_codec import pack_for_storage
+
+# Number of rows converted per batch
+BATCH_SIZE = 1000
+
+def migrate():
+    """Pack all text sequences in orf_sequence into orf_sequence_packed"""
+    # Get the database path from configuration
+    DB_PATH = get_db_path()
+
+    if not os.path.exists(DB_PATH):
+        print(f'Error: Database does not exist at {DB_PATH}')
+        return False
+
+    print(f'Migrating database at {DB_PATH}')
+
+    # Create a backup of the database
+    backup_path = os.path.join(
+        os.path.dirname(DB_PATH),
+        f'db_backups/reagent_db_backup_{datetime.now().strftime("%Y%m%d_%H%M%S")}.sqlite'
+    )
+
+    # Ensure the backup directory exists
+    os.makedirs(os.path.dirname(backup_path), exist_ok=True)
+
+    # Copy the database file
+    import shutil
+    shutil.copy2(DB_PATH, backup_path)
+    print(f'Created backup at {backup_path}')
+
+    # Connect to the database
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+
+    try:
+        # Start a transaction
+        c.execute('BEGIN TRANSACTION')
+
+        # Add the packed column if it does not exist yet
+        c.execute("PRAGMA table_info(orf_sequence)")
+        columns = [column[1] for column in c.fetchall()]
+        if 'orf_sequence_packed' not in columns:
+            print("Adding orf_sequence_packed column to orf_sequence table")
+            c.execute('ALTER TABLE orf_sequence ADD COLUMN orf_sequence_packed BLOB')
+
+        packed_count = 0
+        text_bytes = 0
+        packed_bytes = 0
+        last_orf_id = ''
+        while True:
+            # Walk the table in primary key order, one batch at a time
+            c.execute('''
+                SELECT orf_id, orf_sequence FROM orf_sequence
+                WHERE orf_id > ? AND orf_sequence IS NOT NULL AND orf_sequence != ''
+                ORDER BY orf_id
+                LIMIT ?
+            ''', (last_orf_id, BATCH_SIZE))
+            rows = c.fetchall()
+            if not rows:
+                break
+            last_orf_id = rows[-1][0]
+
+            updates = []
+            for orf_id, sequence in rows:
+                text_value, packed_value = pack_for_storage(sequence)
+                if packed_value is None:
+                    continue
+                updates.append((packed_value, orf_id))
+                text_bytes += len(sequence)
+                packed_bytes += len(packed_value)
+
+            c.executemany('''
+                UPDATE orf_sequence
+                SET orf_sequence_packed = ?, orf_sequence = NULL
+                WHERE orf_id = ?
+            ''', updates)
+            packed_count += len(updates)
+
+        # Commit the transaction
+        c.execute('COMMIT')
+
+        print(f'Packed {packed_count} sequences ({text_bytes} bytes of text into {packed_bytes} bytes)')
+
+        # Store new sequences packed from now on
+        config = load_config()
+        config['pack_sequences'] = True
+        save_config(config)
+        print('Enabled pack_sequences in the application configuration')
+
+        # Reclaim the space freed by the text sequences
+        c.execute('VACUUM')
+
+        print('Migration completed successfully')
+        return True
+
+    except Exception as e:
+        # If anything goes wrong, roll back the transaction
+        c.execute('ROLLBACK')
+        print(f'Error during migration: {str(e)}')
+        import traceback
+        traceback.print_exc()
+        return False
+
+    finally:
+        # Close the database connection
+        conn.close()
+
+if __name__ == "__main__":
+    success = migrate()
+    if success:
+        print('Migration completed successfully!')
+    else:
+        print('Migration failed!')
@@ -0,0 +1,162 @@
+"""
+Migration script to move ORF sequence payloads out of the orf_sequence table.
+
+The orf_sequence table is split into orf_metadata (all small per-ORF fields)
+and orf_sequence_blob (the sequence text or packed sequence, keyed by orf_id).
+An orf_sequence view joining the two, with INSTEAD OF triggers, replaces the
+original table so existing queries and writes keep working.
+"""
+
+import sqlite3
+import os
+import sys
+from datetime import datetime
+
+# Add parent directory to path so we can import config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import get_db_path
+from setup_db import (ORF_SEQUENCE_COLUMNS, ORF_SEQUENCE_PAYLOAD_COLUMNS, DISPLAY_NAME_HGNC_TRIGGERS,
+                      ORF_DOCUMENT_SHARED_TRIGGERS, create_orf_metadata_table, create_orf_sequence_blob_table,
+                      create_orf_sequence_view, create_change_log_triggers, create_display_names,
+                      create_search_indexes, create_orf_document_triggers, create_content_hash_triggers)
+
+def split_orf_sequences(conn):
+    """
+    Split the orf_sequence table on an open connection.
+
+    Args:
+        conn: sqlite3 connection; the caller is responsible for committing
+
+    Returns:
+        bool: True if the table was split, False if it was already split
+    """
+    c = conn.cursor()
+
+    c.execute("SELECT type FROM sqlite_master WHERE name='orf_sequence'")
+    row = c.fetchone()
+    if row is None or row[0] != 'table':
+        return False
+
+    c.execute("PRAGMA table_info(orf_sequence)")
+    existing_columns = [column[1] for column in c.fetchall()]
+    unknown_columns = [col for col in existing_columns if col not in ORF_SEQUENCE_COLUMNS]
+    if unknown_columns:
+        raise ValueError(f"orf_sequence has unexpected columns: {', '.join(unknown_columns)}")
+
+    # These name the table being rebuilt; they are recreated below
+    for trigger_name in DISPLAY_NAME_HGNC_TRIGGERS + ORF_DOCUMENT_SHARED_TRIGGERS:
+        c.execute(f'DROP TRIGGER IF EXISTS {trigger_name}')
+    
+    # Renaming first moves the foreign keys of orf_position, orf_sources and
+    # yeast_orf_position over to orf_metadata
+    c.execute('ALTER TABLE orf_sequence RENAME TO orf_metadata')
+
+    # Copy the sequence payloads into their own table
+    packed_column = 'orf_sequence_packed' if 'orf_sequence_packed' in existing_columns else 'NULL'
+    create_orf_sequence_blob_table(c)
+    c.execute(f'''
+        INSERT INTO orf_sequence_blob (orf_id, orf_sequence, orf_sequence_packed)
+        SELECT orf_id, orf_sequence, {packed_column} FROM orf_metadata
+    ''')
+
+    # Rebuild orf_metadata without the payload columns
+    metadata_columns = ', '.join(
+        col for col in ORF_SEQUENCE_COLUMNS
+        if col not in ORF_SEQUENCE_PAYLOAD_COLUMNS and col in existing_columns
+    )
+    create_orf_metadata_table(c, 'orf_metadata_new')
+    c.execute(f'''
+        INSERT INTO orf_metadata_new ({metadata_columns})
+        SELECT {metadata_columns} FROM orf_metadata
+    ''')
+    c.execute('DROP TABLE orf_metadata')
+    c.execute('ALTER TABLE orf_metadata_new RENAME TO orf_metadata')
+
+    create_orf_sequence_view(c)
+
+    # orf_metadata always has display_name, so fill it in and keep it current
+    create_display_names(c)
+    create_search_indexes(c)
+
+    # The rebuilt tables need their change_log triggers if the log is in use
+    c.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='change_log'")
+    if c.fetchone():
+        create_change_log_triggers(c)
+    
+    # Likewise the triggers that mark ORF documents dirty
+    c.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='orf_document'")
+    if c.fetchone():
+        create_orf_document_triggers(c)
+    
+    # And those that invalidate import content hashes
+    c.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='import_content_hashes'")
+    if c.fetchone():
+        create_content_hash_triggers(c)
+    return True
+
+def migrate():
+    """Split orf_sequence into orf_metadata and orf_sequence_blob"""
+    # Get the database path from configuration
+    DB_PATH = get_db_path()
+
+    if not os.path.exists(DB_PATH):
+        print(f'Error: Database does not exist at {DB_PATH}')
+        return False
+
+    print(f'Migrating database at {DB_PATH}')
+
+    # Create a backup of the database
+    backup_path = os.path.join(
+        os.path.dirname(DB_PATH),
+        f'db_backups/reagent_db_backup_{datetime.now().strftime("%Y%m%d_%H%M%S")}.sqlite'
+    )
+
+    # Ensure the backup directory exists
+    os.makedirs(os.path.dirname(backup_path), exist_ok=True)
+
+    # Copy the database file
+    import shutil
+    shutil.copy2(DB_PATH, backup_path)
+    print(f'Created backup at {backup_path}')
+
+    # Connect to the database
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+
+    try:
+        # Start a transaction
+        c.execute('BEGIN TRANSACTION')
+
+        if split_orf_sequences(conn):
+            c.execute('SELECT COUNT(*) FROM orf_metadata')
+            print(f'Moved {c.fetchone()[0]} ORF sequences into orf_sequence_blob')
+        else:
+            print('orf_sequence is already split into orf_metadata and orf_sequence_blob')
+
+        # Commit the transaction
+        c.execute('COMMIT')
+
+        # Rewrite the file so metadata pages are stored contiguously
+        c.execute('VACUUM')
+
+        print('Migration completed successfully')
+        return True
+
+    except Exception as e:
+        # If anything goes wrong, roll back the transaction
+        c.execute('ROLLBACK')
+        print(f'Error during migration: {str(e)}')
+        import traceback
+        traceback.print_exc()
+        return False
+
+    finally:
+        # Close the database connection
+        conn.close()
+
+if __name__ == "__main__":
+    success = migrate()
+    if success:
+        print('Migration completed successfully!')
+    else:
+        print('Migration failed!')
@@ -0,0 +1,194 @@
+"""
+Parquet import and export files.
+
+CSV and Excel files are slow to parse, and a number column loses its type on
+the way through them (an Entrez ID column with an empty cell is read back as
+floats, "1234.0"). A Parquet file keeps each column's type. Import files are
+read a batch of rows at a time with pyarrow and handed on as chunks with every
+cell as text, the same chunks the CSV reader produces (see
+app/unified_import.unified_csv_chunks); integers are written out as integers
+and dates as ISO dates, as they were typed. Exports are written a batch of
+rows at a time with an explicit schema per table (EXPORT_COLUMNS), so a column
+keeps its type even when every value in it is empty.
+
+pyarrow is optional: without it, Parquet files are refused with a message
+saying it is needed, and everything else works as before.
+"""
+
+import os
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pc = pq = None
+
+PARQUET_EXTENSIONS = ('.parquet', '.pq')
+
+# Rows per row group of exported files, and so per chunk when they are imported
+EXPORT_BATCH_ROWS = 10000
+
+# Columns of each exported table with their Parquet types, in the order of the
+# CSV export, which lacks position_type and human_gene_data; flags are stored
+# as 0/1 and exported as booleans
+EXPORT_COLUMNS = {
+    'freezer': [('freezer_id', 'string'), ('freezer_location', 'string'), ('freezer_condition', 'string'),
+                ('freezer_date', 'string')],
+    'organisms': [('organism_id', 'string'), ('organism_name', 'string'), ('organism_genus', 'string'),
+                  ('organism_species', 'string'), ('organism_strain', 'string')],
+    'plasmid': [('plasmid_id', 'string'), ('plasmid_name', 'string'), ('plasmid_type', 'string'),
+                ('plasmid_express_organism', 'string'), ('plasmid_description', 'string')],
+    'orf_sequence': [('orf_id', 'string'), ('orf_name', 'string'), ('orf_annotation', 'string'),
+                     ('orf_sequence', 'string'), ('orf_with_stop', 'bool_'), ('orf_open', 'bool_'),
+                     ('orf_organism_id', 'string'), ('orf_length_bp', 'int64'), ('orf_entrez_id', 'string'),
+                     ('orf_ensembl_id', 'string'), ('orf_uniprot_id', 'string'), ('orf_ref_url', 'string')],
+    'orf_position': [('orf_id', 'string'), ('plate', 'string'), ('well', 'string'), ('freezer_id', 'string'),
+                     ('plasmid_id', 'string'), ('orf_create_date', 'string')],
+    'yeast_orf_position': [('orf_id', 'string'), ('plate', 'string'), ('well', 'string'),
+                           ('position_type', 'string')],
+    'orf_sources': [('orf_id', 'string'), ('source_name', 'string'), ('source_details', 'string'),
+                    ('source_url', 'string'), ('submission_date', 'string'), ('submitter', 'string'),
+                    ('notes', 'string')],
+    'human_gene_data': [('orf_id', 'string'), ('hgnc_approved_symbol', 'string')],
+}
+
+# Columns pandas adds for a DataFrame index, which are not sheet columns
+INDEX_COLUMN_PREFIX = '__index_level_'
+
+MISSING = float('nan')
+
+def is_parquet_file(filename):
+    """Whether a file name has a Parquet extension"""
+    return filename.lower().endswith(PARQUET_EXTENSIONS)
+
+def require_pyarrow():
+    """
+    Raises:
+        ValueError: pyarrow is not installed
+    """
+    if pa is None:
+        raise ValueError('Parquet files need the pyarrow package (pip install pyarrow)')
+
+def parquet_header(file_path):
+    """The column names of a Parquet file, without pandas index columns"""
+    require_pyarrow()
+    return [name for name in pq.read_schema(file_path).names if not name.startswith(INDEX_COLUMN_PREFIX)]
+
+def _text(array):
+    """An Arrow column as strings, as the cells would read in a CSV file"""
+    if pa.types.is_dictionary(array.type):
+        array = array.dictionary_decode()
+    if pa.types.is_timestamp(array.type):
+        # Dates without a time read as the date alone, as in Excel imports
+        midnight = pc.equal(pc.floor_temporal(array, unit='day'), array)
+        return pc.if_else(midnight, pc.strftime(array, format='%Y-%m-%d'),
+                          pc.strftime(array, format='%Y-%m-%d %H:%M:%S'))
+    if pa.types.is_nested(array.type):
+        raise ValueError(f'{array.type} columns cannot be imported')
+    return pc.cast(array, pa.string())
+
+def _frame(batch, first_number, columns):
+    cells = {}
+    for column, array in zip(columns, batch.columns):
+        try:
+            values = _text(array).to_pandas()
+        except (pa.ArrowException, ValueError) as e:
+            raise ValueError(f'Column {column}: {e}')
+        # Empty strings are missing values, as empty CSV cells are
+        cells[column] = values.where(values.notna() & (values != ''), MISSING).astype(object)
+    df = pd.DataFrame(cells, columns=columns)
+    # Row N of the file gets row number N (index + 2), as FASTA records do
+    df.index = pd.RangeIndex(first_number - 2, first_number - 2 + batch.num_rows)
+    return df
+
+def parquet_chunks(file_path, columns, chunk_size, skip_rows=0):
+    """
+    Read a Parquet file in chunks, every cell as text.
+
+    Args:
+        file_path (str): Path to the .parquet file
+        columns (list): Column names to give the chunks, one per column of
+            parquet_header
+        chunk_size (int): Rows per chunk
+        skip_rows (int): Rows to skip, e.g. those a resumed import has
+            already committed; whole row groups are skipped unread
+
+    Yields:
+        DataFrame: Consecutive chunks of at most chunk_size rows. The index
+        makes the row number of row N (index + 2) N. A chunk never spans
+        two row groups, which pyarrow reads one at a time
+    """
+    require_pyarrow()
+    parquet = pq.ParquetFile(file_path)
+    try:
+        names = [name for name in parquet.schema_arrow.names if not name.startswith(INDEX_COLUMN_PREFIX)]
+        metadata = parquet.metadata
+
+        first_group = 0
+        skipped = 0
+        while (first_group < metadata.num_row_groups
+               and skipped + metadata.row_group(first_group).num_rows <= skip_rows):
+            skipped += metadata.row_group(first_group).num_rows
+            first_group += 1
+
+        number = skipped + 1
+        for batch in parquet.iter_batches(batch_size=chunk_size, columns=names,
+                                          row_groups=list(range(first_group, metadata.num_row_groups))):
+            if skipped < skip_rows:
+                drop = min(batch.num_rows, skip_rows - skipped)
+                batch = batch.slice(drop)
+                skipped += drop
+                number += drop
+                if batch.num_rows == 0:
+                    continue
+            yield _frame(batch, number, columns)
+            number += batch.num_rows
+    finally:
+        parquet.close()
+
+def export_schema(table):
+    """The Parquet schema of an exported table (see EXPORT_COLUMNS)"""
+    require_pyarrow()
+    return pa.schema([(column, getattr(pa, type_name)()) for column, type_name in EXPORT_COLUMNS[table]])
+
+def _array(values, field):
+    try:
+        if pa.types.is_boolean(field.type):
+            # Flags are stored as 0/1
+            return pa.array(values, type=pa.int64()).cast(pa.bool_())
+        return pa.array(values, type=field.type)
+    except (pa.ArrowException, TypeError) as e:
+        raise ValueError(f'Column {field.name}: {e}')
+
+def write_parquet(file_path, schema, batches):
+    """
+    Write rows to a Parquet file, one row group per batch.
+
+    The file is written next to file_path and moved into place once it is
+    complete, so a failed export leaves the previous file as it was.
+
+    Args:
+        file_path (str): Path of the .parquet file
+        schema: pyarrow schema of the rows
+        batches: Iterable of lists of row tuples in schema order
+
+    Returns:
+        int: Rows written
+    """
+    require_pyarrow()
+    partial_path = file_path + '.partial'
+    rows_written = 0
+    try:
+        with pq.ParquetWriter(partial_path, schema, compression='zstd') as writer:
+            for rows in batches:
+                arrays = [_array(list(column), field) for column, field in zip(zip(*rows), schema)]
+                writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+                rows_written += len(rows)
+        os.replace(partial_path, file_path)
+    finally:
+        if os.path.exists(partial_path):
+            os.unlink(partial_path)
+    return rows_written
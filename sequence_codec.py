@@ -0,0 +1,169 @@
+"""
+Compact 2-bit storage for ORF nucleotide sequences.
+
+Sequences are packed four bases per byte (A=0, C=1, G=2, T=3). Characters
+outside of ACGT (N, IUPAC ambiguity codes, gaps, mixed case) are kept in an
+exception list of runs so that decoding always returns the original string.
+
+Layout of a packed value (all integers little-endian):
+
+    version   uint8
+    flags     uint8   (bit 0: the whole sequence was lowercase)
+    length    uint32  number of bases
+    runs      uint32  number of exception runs
+    runs x (start uint32, length uint32)
+    exception characters (sum of run lengths bytes)
+    packed bases (ceil(length / 4) bytes, first base in the high bits)
+"""
+
+import struct
+
+import numpy as np
+
+FORMAT_VERSION = 1
+FLAG_LOWERCASE = 0x01
+
+# IUPAC nucleotide codes, in either case: the characters an ORF sequence may hold
+SEQUENCE_PATTERN = r'[ACGTUNRYKMSWBDHVacgtunrykmswbdhv]*'
+
+_HEADER = struct.Struct('<BBII')
+_BASES = np.frombuffer(b'ACGT', dtype=np.uint8)
+_EXCEPTION = 0xFF
+
+# Lookup table from ASCII code to 2-bit base code (0xFF marks an exception)
+_CODES = np.full(256, _EXCEPTION, dtype=np.uint8)
+for _code, _base in enumerate(b'ACGT'):
+    _CODES[_base] = _code
+
+
+def encode_sequence(sequence):
+    """
+    Pack a nucleotide sequence into the 2-bit representation.
+
+    Args:
+        sequence (str): ASCII nucleotide sequence
+
+    Returns:
+        bytes: Packed sequence
+
+    Raises:
+        ValueError: If the sequence contains non-ASCII characters
+    """
+    raw = sequence.encode('ascii')
+    flags = 0
+    if raw.islower():
+        raw = raw.upper()
+        flags |= FLAG_LOWERCASE
+
+    chars = np.frombuffer(raw, dtype=np.uint8)
+    codes = _CODES[chars]
+    is_exception = codes == _EXCEPTION
+
+    # Collapse exception positions into (start, length) runs
+    edges = np.diff(np.concatenate(([0], is_exception.view(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    runs = np.empty((len(starts), 2), dtype='<u4')
+    runs[:, 0] = starts
+    runs[:, 1] = ends - starts
+    exceptions = chars[is_exception].tobytes()
+
+    codes = np.where(is_exception, 0, codes)
+    padding = (-len(codes)) % 4
+    if padding:
+        codes = np.concatenate((codes, np.zeros(padding, dtype=np.uint8)))
+    quads = codes.reshape(-1, 4)
+    packed = (quads[:, 0] << 6) | (quads[:, 1] << 4) | (quads[:, 2] << 2) | quads[:, 3]
+
+    header = _HEADER.pack(FORMAT_VERSION, flags, len(chars), len(runs))
+    return header + runs.tobytes() + exceptions + packed.astype(np.uint8).tobytes()
+
+
+def decode_sequence(packed):
+    """
+    Unpack a sequence produced by encode_sequence.
+
+    Args:
+        packed (bytes): Packed sequence
+
+    Returns:
+        str: The original nucleotide sequence
+    """
+    version, flags, length, run_count = _HEADER.unpack_from(packed)
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported packed sequence version: {version}")
+
+    offset = _HEADER.size
+    runs = np.frombuffer(packed, dtype='<u4', count=run_count * 2, offset=offset).reshape(-1, 2)
+    offset += runs.nbytes
+    exception_count = int(runs[:, 1].sum()) if run_count else 0
+    exceptions = np.frombuffer(packed, dtype=np.uint8, count=exception_count, offset=offset)
+    offset += exception_count
+
+    data = np.frombuffer(packed, dtype=np.uint8, offset=offset)
+    codes = np.empty((len(data), 4), dtype=np.uint8)
+    codes[:, 0] = data >> 6
+    codes[:, 1] = (data >> 4) & 0x03
+    codes[:, 2] = (data >> 2) & 0x03
+    codes[:, 3] = data & 0x03
+    chars = _BASES[codes.reshape(-1)[:length]]
+
+    if run_count:
+        # Expand each run into its individual positions
+        run_starts = runs[:, 0].astype(np.int64)
+        run_lengths = runs[:, 1].astype(np.int64)
+        run_offsets = np.repeat(run_starts - np.cumsum(run_lengths) + run_lengths, run_lengths)
+        positions = run_offsets + np.arange(exception_count)
+        chars[positions] = exceptions
+
+    sequence = chars.tobytes().decode('ascii')
+    if flags & FLAG_LOWERCASE:
+        sequence = sequence.lower()
+    return sequence
+
+
+def pack_for_storage(sequence, enabled=True):
+    """
+    Choose the storage representation for a sequence about to be written.
+
+    Args:
+        sequence (str): Sequence text from a form or import file
+        enabled (bool): Whether packed storage is switched on
+
+    Returns:
+        tuple: (orf_sequence, orf_sequence_packed) column values. Exactly one
+        of them is set; the text form is kept when packing is disabled, the
+        sequence is empty or not ASCII, or packing would not save space.
+    """
+    if not enabled or not sequence:
+        return sequence, None
+    try:
+        packed = encode_sequence(sequence)
+    except (UnicodeEncodeError, AttributeError):
+        return sequence, None
+    if len(packed) >= len(sequence):
+        return sequence, None
+    return None, packed
+
+
+def unpack_orf_sequence(orf_data):
+    """
+    Replace a packed sequence in a row dictionary with its decoded text.
+
+    Args:
+        orf_data (dict): Row from orf_sequence, possibly with orf_sequence_packed
+
+    Returns:
+        dict: The same dictionary with orf_sequence filled in
+    """
+    packed = orf_data.pop('orf_sequence_packed', None)
+    if packed is not None and not orf_data.get('orf_sequence'):
+        orf_data['orf_sequence'] = decode_sequence(packed)
+    return orf_data
+
+
+def sequence_text(text, packed):
+    """Return the sequence text for a row given its text and packed columns"""
+    if packed is not None and not text:
+        return decode_sequence(packed)
+    return text
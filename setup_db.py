@@ -6,6 +6,519 @@ import sqlite3
 import os
 from config import get_db_path, load_config
 
+# Columns of the orf_sequence view, in the order of the original table
+ORF_SEQUENCE_COLUMNS = [
+    'orf_id', 'orf_name', 'orf_annotation', 'orf_sequence', 'orf_sequence_packed',
+    'orf_with_stop', 'orf_open', 'orf_organism_id', 'orf_length_bp', 'orf_entrez_id',
+    'orf_ensembl_id', 'orf_uniprot_id', 'orf_ref_url', 'display_name'
+]
+
+# Columns that live in orf_sequence_blob rather than orf_metadata
+ORF_SEQUENCE_PAYLOAD_COLUMNS = ['orf_sequence', 'orf_sequence_packed']
+
+# Columns maintained by triggers, never written directly
+ORF_SEQUENCE_DERIVED_COLUMNS = ['display_name']
+
+def create_orf_sequence_tables(c):
+    """
+    Create the split ORF storage: orf_metadata holds the small per-ORF fields,
+    orf_sequence_blob holds the sequence payload keyed by orf_id, and the
+    orf_sequence view joins them so existing queries and writes keep working.
+    """
+    create_orf_metadata_table(c)
+    create_orf_sequence_blob_table(c)
+    create_orf_sequence_view(c)
+
+def create_orf_metadata_table(c, table_name='orf_metadata'):
+    """Create the ORF metadata table (everything except the sequence payload)"""
+    c.execute(f'''
+    CREATE TABLE {table_name} (
+        orf_id TEXT PRIMARY KEY,
+        orf_name TEXT,
+        orf_annotation TEXT,
+        orf_with_stop INTEGER,
+        orf_open INTEGER,
+        orf_organism_id TEXT,
+        orf_length_bp INTEGER,
+        orf_entrez_id TEXT,
+        orf_ensembl_id TEXT,
+        orf_uniprot_id TEXT,
+        orf_ref_url TEXT,
+        display_name TEXT,
+        FOREIGN KEY (orf_organism_id) REFERENCES organisms (organism_id)
+    )
+    ''')
+
+def create_orf_sequence_blob_table(c):
+    """Create the table holding sequence payloads, one row per ORF"""
+    c.execute('''
+    CREATE TABLE orf_sequence_blob (
+        orf_id TEXT PRIMARY KEY,
+        orf_sequence TEXT,
+        orf_sequence_packed BLOB,
+        FOREIGN KEY (orf_id) REFERENCES orf_metadata (orf_id)
+    )
+    ''')
+
+def create_orf_sequence_view(c):
+    """Create the orf_sequence view and the triggers that make it writable"""
+    metadata_columns = [
+        col for col in ORF_SEQUENCE_COLUMNS
+        if col not in ORF_SEQUENCE_PAYLOAD_COLUMNS and col not in ORF_SEQUENCE_DERIVED_COLUMNS
+    ]
+    select_list = ', '.join(
+        f'b.{col}' if col in ORF_SEQUENCE_PAYLOAD_COLUMNS else f'm.{col}'
+        for col in ORF_SEQUENCE_COLUMNS
+    )
+    
+    c.execute(f'''
+    CREATE VIEW orf_sequence AS
+    SELECT {select_list}
+    FROM orf_metadata m
+    LEFT JOIN orf_sequence_blob b ON b.orf_id = m.orf_id
+    ''')
+    
+    # display_name is written with the row, so the display name triggers on
+    # orf_metadata have nothing left to do
+    display_name = resolved_display_name('NEW.orf_id', 'NEW.orf_name')
+    
+    # INSERT OR REPLACE on the view carries its conflict policy into the trigger body
+    c.execute(f'''
+    CREATE TRIGGER orf_sequence_insert INSTEAD OF INSERT ON orf_sequence
+    BEGIN
+        INSERT INTO orf_metadata ({', '.join(metadata_columns)}, display_name)
+        VALUES ({', '.join('NEW.' + col for col in metadata_columns)}, {display_name});
+        INSERT INTO orf_sequence_blob (orf_id, orf_sequence, orf_sequence_packed)
+        VALUES (NEW.orf_id, NEW.orf_sequence, NEW.orf_sequence_packed);
+    END
+    ''')
+    
+    # Only rewrite the payload row when the sequence or the ID actually changed
+    c.execute(f'''
+    CREATE TRIGGER orf_sequence_update INSTEAD OF UPDATE ON orf_sequence
+    BEGIN
+        UPDATE orf_metadata
+        SET {', '.join(f'{col} = NEW.{col}' for col in metadata_columns)}, display_name = {display_name}
+        WHERE orf_id = OLD.orf_id;
+        UPDATE orf_sequence_blob
+        SET orf_id = NEW.orf_id, orf_sequence = NEW.orf_sequence, orf_sequence_packed = NEW.orf_sequence_packed
+        WHERE orf_id = OLD.orf_id
+        AND (NEW.orf_id IS NOT OLD.orf_id
+             OR NEW.orf_sequence IS NOT OLD.orf_sequence
+             OR NEW.orf_sequence_packed IS NOT OLD.orf_sequence_packed);
+        INSERT OR IGNORE INTO orf_sequence_blob (orf_id, orf_sequence, orf_sequence_packed)
+        VALUES (NEW.orf_id, NEW.orf_sequence, NEW.orf_sequence_packed);
+    END
+    ''')
+    
+    c.execute('''
+    CREATE TRIGGER orf_sequence_delete INSTEAD OF DELETE ON orf_sequence
+    BEGIN
+        DELETE FROM orf_sequence_blob WHERE orf_id = OLD.orf_id;
+        DELETE FROM orf_metadata WHERE orf_id = OLD.orf_id;
+    END
+    ''')
+
+def orf_metadata_table_name(c):
+    """orf_metadata once sequences are split out, otherwise the orf_sequence table"""
+    c.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='orf_metadata'")
+    return 'orf_metadata' if c.fetchone() else 'orf_sequence'
+
+def create_human_gene_data_table(c):
+    """Create the table of HGNC approved symbols for human ORFs, if missing"""
+    c.execute(f'''
+    CREATE TABLE IF NOT EXISTS human_gene_data (
+        orf_id TEXT PRIMARY KEY,
+        hgnc_approved_symbol TEXT,
+        FOREIGN KEY (orf_id) REFERENCES {orf_metadata_table_name(c)} (orf_id)
+    )
+    ''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_human_gene_data_symbol ON human_gene_data (hgnc_approved_symbol)')
+
+def resolved_display_name(orf_id, orf_name):
+    """SQL expression for the display_name of an ORF: its HGNC approved symbol, or else its name"""
+    return f'''COALESCE(
+        (SELECT NULLIF(h.hgnc_approved_symbol, '') FROM human_gene_data h WHERE h.orf_id = {orf_id}),
+        {orf_name}
+    )'''
+
+# Names of the triggers on the ORF metadata table that fill in display_name
+DISPLAY_NAME_ORF_TRIGGERS = ['display_name_insert', 'display_name_update']
+
+# Names of the triggers on human_gene_data that keep display_name current
+DISPLAY_NAME_HGNC_TRIGGERS = ['hgnc_display_name_insert', 'hgnc_display_name_update', 'hgnc_display_name_delete']
+
+def create_display_names(c):
+    """
+    Fill in display_name and create the index and triggers that keep it current.
+
+    display_name is the HGNC approved symbol of an ORF if it has one and its
+    orf_name otherwise. The triggers set it when an ORF is written or renamed
+    and when its human_gene_data row changes, so reads never need the join.
+    Safe to call repeatedly, e.g. after a migration rebuilds the metadata table.
+    """
+    table_name = orf_metadata_table_name(c)
+    
+    create_human_gene_data_table(c)
+    
+    # Backfill rows written before the triggers existed
+    resolved_name = resolved_display_name(f'{table_name}.orf_id', 'orf_name')
+    c.execute(f'''
+    UPDATE {table_name} SET display_name = {resolved_name}
+    WHERE display_name IS NOT {resolved_name}
+    ''')
+    
+    c.execute(f'CREATE INDEX IF NOT EXISTS idx_orf_display_name ON {table_name} (display_name)')
+    
+    # Writers set display_name themselves (the orf_sequence view's triggers
+    # and unified imports do), so these only fire for rows written without
+    # it; an unconditional UPDATE would log every insert twice in change_log
+    # and mark its orf_document dirty again
+    resolved_name = resolved_display_name('NEW.orf_id', 'NEW.orf_name')
+    for trigger_name in DISPLAY_NAME_ORF_TRIGGERS:
+        c.execute(f'DROP TRIGGER IF EXISTS {table_name}_{trigger_name}')
+    
+    c.execute(f'''
+    CREATE TRIGGER {table_name}_display_name_insert AFTER INSERT ON {table_name}
+    WHEN NEW.display_name IS NOT {resolved_name}
+    BEGIN
+        UPDATE {table_name} SET display_name = {resolved_name}
+        WHERE orf_id = NEW.orf_id;
+    END
+    ''')
+    
+    c.execute(f'''
+    CREATE TRIGGER {table_name}_display_name_update AFTER UPDATE OF orf_id, orf_name ON {table_name}
+    WHEN NEW.display_name IS NOT {resolved_name}
+    BEGIN
+        UPDATE {table_name} SET display_name = {resolved_name}
+        WHERE orf_id = NEW.orf_id;
+    END
+    ''')
+    
+    # The human_gene_data triggers name the metadata table, so they are
+    # recreated whenever it changes
+    for trigger_name in DISPLAY_NAME_HGNC_TRIGGERS:
+        c.execute(f'DROP TRIGGER IF EXISTS {trigger_name}')
+    
+    c.execute(f'''
+    CREATE TRIGGER hgnc_display_name_insert AFTER INSERT ON human_gene_data
+    BEGIN
+        UPDATE {table_name} SET display_name = COALESCE(NULLIF(NEW.hgnc_approved_symbol, ''), orf_name)
+        WHERE orf_id = NEW.orf_id;
+    END
+    ''')
+    
+    c.execute(f'''
+    CREATE TRIGGER hgnc_display_name_update AFTER UPDATE ON human_gene_data
+    BEGIN
+        UPDATE {table_name} SET display_name = orf_name
+        WHERE orf_id = OLD.orf_id AND OLD.orf_id IS NOT NEW.orf_id;
+        UPDATE {table_name} SET display_name = COALESCE(NULLIF(NEW.hgnc_approved_symbol, ''), orf_name)
+        WHERE orf_id = NEW.orf_id;
+    END
+    ''')
+    
+    c.execute(f'''
+    CREATE TRIGGER hgnc_display_name_delete AFTER DELETE ON human_gene_data
+    BEGIN
+        UPDATE {table_name} SET display_name = orf_name
+        WHERE orf_id = OLD.orf_id;
+    END
+    ''')
+
+def create_search_indexes(c):
+    """
+    Create the indexes probed by exact-match gene search (see
+    app/utils.exact_match_probes): one per searchable column, plus a
+    COLLATE NOCASE variant of each for case-insensitive matching. Safe to call
+    repeatedly, e.g. after a migration rebuilds the metadata table.
+    """
+    table_name = orf_metadata_table_name(c)
+    c.execute(f"PRAGMA table_info({table_name})")
+    columns = [column[1] for column in c.fetchall()]
+    
+    # orf_id is already covered case-sensitively by the primary key
+    c.execute(f'CREATE INDEX IF NOT EXISTS idx_orf_id_nocase ON {table_name} (orf_id COLLATE NOCASE)')
+    c.execute(f'CREATE INDEX IF NOT EXISTS idx_orf_name ON {table_name} (orf_name)')
+    c.execute(f'CREATE INDEX IF NOT EXISTS idx_orf_name_nocase ON {table_name} (orf_name COLLATE NOCASE)')
+    if 'display_name' in columns:
+        c.execute(f'CREATE INDEX IF NOT EXISTS idx_orf_display_name ON {table_name} (display_name)')
+        c.execute(f'CREATE INDEX IF NOT EXISTS idx_orf_display_name_nocase ON {table_name} (display_name COLLATE NOCASE)')
+    
+    c.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='human_gene_data'")
+    if c.fetchone():
+        c.execute('CREATE INDEX IF NOT EXISTS idx_human_gene_data_symbol ON human_gene_data (hgnc_approved_symbol)')
+        c.execute('''
+        CREATE INDEX IF NOT EXISTS idx_human_gene_data_symbol_nocase
+        ON human_gene_data (hgnc_approved_symbol COLLATE NOCASE)
+        ''')
+
+# Tables holding a single ORF's data, keyed by orf_id (the metadata table is
+# added by create_orf_document_triggers)
+ORF_DOCUMENT_ORF_TABLES = ['orf_position', 'yeast_orf_position', 'orf_sources', 'human_gene_data']
+
+# Triggers on tables whose rows are copied into the documents of many ORFs;
+# they name the metadata table or orf_position, so they are recreated whenever
+# those change
+ORF_DOCUMENT_SHARED_TRIGGERS = [
+    f'{table_name}_orf_document_{operation}'
+    for table_name in ['organisms', 'freezer', 'plasmid']
+    for operation in ['insert', 'update', 'delete']
+]
+
+def _mark_orf_document_dirty(orf_id):
+    """Trigger statements marking the document of one ORF for a rebuild"""
+    return f'''
+        INSERT OR IGNORE INTO orf_document (orf_id) SELECT {orf_id} WHERE {orf_id} IS NOT NULL;
+        UPDATE orf_document SET dirty = 1 WHERE orf_id = {orf_id};'''
+
+def create_orf_documents(c):
+    """
+    Create the orf_document table and the triggers that mark documents dirty.
+
+    orf_document holds one JSON document per ORF with everything search and
+    the ORF detail pages show: the ORF with its organism and HGNC symbol,
+    entry and yeast positions with freezer and plasmid names, and sources.
+    Writes to any of those tables only mark the affected documents dirty; the
+    refresher in app/orf_documents.py rebuilds them. Every existing ORF starts
+    out dirty. Safe to call repeatedly, e.g. after a migration rebuilds a table.
+    """
+    c.execute('''
+    CREATE TABLE IF NOT EXISTS orf_document (
+        orf_id TEXT PRIMARY KEY,
+        document TEXT,
+        dirty INTEGER NOT NULL DEFAULT 1,
+        refreshed_at TEXT
+    )
+    ''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_orf_document_dirty ON orf_document (dirty) WHERE dirty = 1')
+    create_orf_document_triggers(c)
+    
+    table_name = orf_metadata_table_name(c)
+    c.execute(f'INSERT OR IGNORE INTO orf_document (orf_id) SELECT orf_id FROM {table_name}')
+
+def create_orf_document_triggers(c):
+    """Create the triggers marking orf_document rows dirty on every table that exists"""
+    table_name = orf_metadata_table_name(c)
+    
+    # Lookups for the triggers on shared tables
+    c.execute(f'CREATE INDEX IF NOT EXISTS idx_orf_organism_id ON {table_name} (orf_organism_id)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_orf_position_freezer ON orf_position (freezer_id)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_orf_position_plasmid ON orf_position (plasmid_id)')
+    
+    for orf_table in [table_name] + ORF_DOCUMENT_ORF_TABLES:
+        c.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (orf_table,))
+        if not c.fetchone():
+            continue
+        
+        c.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {orf_table}_orf_document_insert AFTER INSERT ON {orf_table}
+        BEGIN{_mark_orf_document_dirty('NEW.orf_id')}
+        END
+        ''')
+        
+        c.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {orf_table}_orf_document_update AFTER UPDATE ON {orf_table}
+        BEGIN{_mark_orf_document_dirty('OLD.orf_id')}{_mark_orf_document_dirty('NEW.orf_id')}
+        END
+        ''')
+        
+        c.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {orf_table}_orf_document_delete AFTER DELETE ON {orf_table}
+        BEGIN{_mark_orf_document_dirty('OLD.orf_id')}
+        END
+        ''')
+    
+    for trigger_name in ORF_DOCUMENT_SHARED_TRIGGERS:
+        c.execute(f'DROP TRIGGER IF EXISTS {trigger_name}')
+    
+    # Organism fields are copied into the documents of all its ORFs, freezer
+    # and plasmid names into the documents of the ORFs stored in them
+    shared_tables = {
+        'organisms': ('organism_id', f'SELECT orf_id FROM {table_name} WHERE orf_organism_id = {{key}}'),
+        'freezer': ('freezer_id', 'SELECT orf_id FROM orf_position WHERE freezer_id = {key}'),
+        'plasmid': ('plasmid_id', 'SELECT orf_id FROM orf_position WHERE plasmid_id = {key}'),
+    }
+    for shared_table, (key, affected_orfs) in shared_tables.items():
+        c.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (shared_table,))
+        if not c.fetchone():
+            continue
+        
+        for operation, rows in [('insert', ['NEW']), ('update', ['OLD', 'NEW']), ('delete', ['OLD'])]:
+            statements = ''.join(f'''
+            UPDATE orf_document SET dirty = 1
+            WHERE dirty = 0 AND orf_id IN ({affected_orfs.format(key=f'{row}.{key}')});'''
+                for row in rows
+            )
+            c.execute(f'''
+            CREATE TRIGGER {shared_table}_orf_document_{operation} AFTER {operation.upper()} ON {shared_table}
+            BEGIN{statements}
+            END
+            ''')
+
+# Tables whose writes are recorded in change_log, with the key that is logged
+CHANGE_LOG_TABLES = {
+    'freezer': 'freezer_id',
+    'organisms': 'organism_id',
+    'plasmid': 'plasmid_id',
+    'orf_metadata': 'orf_id',
+    'orf_sequence_blob': 'orf_id',
+    'orf_sequence': 'orf_id',  # Databases where orf_sequence has not been split yet
+    'orf_position': 'id',
+    'orf_sources': 'id',
+    'yeast_orf_position': 'id',
+    'human_gene_data': 'orf_id',
+}
+
+def create_change_log(c):
+    """Create the change_log table and its triggers on the existing core tables"""
+    c.execute('''
+    CREATE TABLE IF NOT EXISTS change_log (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        table_name TEXT NOT NULL,
+        row_key TEXT NOT NULL,
+        operation TEXT NOT NULL,
+        changed_at TEXT DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_change_log_row ON change_log (table_name, row_key, seq)')
+    create_change_log_triggers(c)
+
+def create_import_runs(c):
+    """
+    Create the tables recording checkpointed imports: one import_runs row per
+    run with the rows committed so far and the process running it, and the
+    errors of its committed rows. Safe to call repeatedly; adds owner_pid and
+    the sheet of errors to tables created without them
+    """
+    c.execute('''
+    CREATE TABLE IF NOT EXISTS import_runs (
+        run_id TEXT PRIMARY KEY,
+        import_type TEXT NOT NULL,
+        filename TEXT,
+        file_hash TEXT NOT NULL,
+        file_path TEXT,
+        status TEXT NOT NULL,
+        rows_committed INTEGER NOT NULL DEFAULT 0,
+        stats TEXT,
+        message TEXT,
+        started_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        finished_at TEXT,
+        owner_pid INTEGER
+    )
+    ''')
+    c.execute("PRAGMA table_info(import_runs)")
+    if 'owner_pid' not in [column[1] for column in c.fetchall()]:
+        c.execute('ALTER TABLE import_runs ADD COLUMN owner_pid INTEGER')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_import_runs_file_hash ON import_runs (file_hash)')
+    c.execute('''
+    CREATE TABLE IF NOT EXISTS import_run_errors (
+        run_id TEXT NOT NULL,
+        row_number INTEGER,
+        step INTEGER,
+        message TEXT,
+        sheet INTEGER NOT NULL DEFAULT 0,
+        FOREIGN KEY (run_id) REFERENCES import_runs (run_id)
+    )
+    ''')
+    c.execute("PRAGMA table_info(import_run_errors)")
+    if 'sheet' not in [column[1] for column in c.fetchall()]:
+        c.execute('ALTER TABLE import_run_errors ADD COLUMN sheet INTEGER NOT NULL DEFAULT 0')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_import_run_errors_run ON import_run_errors (run_id)')
+
+# Entities whose unchanged rows unified imports skip: entity -> (tables whose
+# updates and deletes invalidate its hashes, identity columns). The identity
+# columns are the leading values of the entity's import rows
+CONTENT_HASH_ENTITIES = {
+    'organisms': (['organisms'], ['organism_id']),
+    'freezers': (['freezer'], ['freezer_id']),
+    'plasmids': (['plasmid'], ['plasmid_id']),
+    'sequences': (['orf_metadata', 'orf_sequence_blob', 'orf_sequence'], ['orf_id']),
+    'entry_positions': (['orf_position'], ['orf_id', 'plate', 'well']),
+    'yeast_ad_positions': (['yeast_orf_position'], ['orf_id', 'plate', 'well']),
+    'yeast_db_positions': (['yeast_orf_position'], ['orf_id', 'plate', 'well']),
+    'sources': (['orf_sources'], ['orf_id', 'source_name']),
+}
+
+def create_content_hashes(c):
+    """
+    Create the import_content_hashes table, holding the content hash of each
+    row a unified import wrote, and the triggers that drop a row's hashes
+    once it is changed by anything else
+    """
+    c.execute('''
+    CREATE TABLE IF NOT EXISTS import_content_hashes (
+        entity TEXT NOT NULL,
+        row_key TEXT NOT NULL,
+        content_hash INTEGER NOT NULL,
+        PRIMARY KEY (entity, row_key, content_hash)
+    ) WITHOUT ROWID
+    ''')
+    create_content_hash_triggers(c)
+
+def create_content_hash_triggers(c):
+    """
+    Create the triggers invalidating import content hashes for every table
+    that exists (views are skipped). Safe to call repeatedly, e.g. after a
+    migration rebuilds a table.
+    """
+    tables = {}
+    for entity, (table_names, identity) in CONTENT_HASH_ENTITIES.items():
+        for table_name in table_names:
+            tables.setdefault(table_name, ([], identity))[0].append(entity)
+    
+    for table_name, (entities, identity) in tables.items():
+        c.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (table_name,))
+        if not c.fetchone():
+            continue
+        
+        # Identity values joined by a unit separator, as unified_import._content_hash_keys joins them
+        row_key = " || char(31) || ".join(f"COALESCE(OLD.{column}, '')" for column in identity)
+        entity_list = ', '.join(f"'{entity}'" for entity in entities)
+        for operation in ['update', 'delete']:
+            c.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {table_name}_content_hash_{operation} AFTER {operation.upper()} ON {table_name}
+            BEGIN
+                DELETE FROM import_content_hashes WHERE entity IN ({entity_list}) AND row_key = {row_key};
+            END
+            ''')
+
+def create_change_log_triggers(c):
+    """
+    Create the change_log triggers for every core table that exists (views are
+    skipped). Safe to call repeatedly, e.g. after a migration rebuilds a table.
+    """
+    for table_name, key in CHANGE_LOG_TABLES.items():
+        c.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (table_name,))
+        if not c.fetchone():
+            continue
+        
+        c.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {table_name}_change_log_insert AFTER INSERT ON {table_name}
+        BEGIN
+            INSERT INTO change_log (table_name, row_key, operation) VALUES ('{table_name}', NEW.{key}, 'INSERT');
+        END
+        ''')
+        
+        # A changed key is logged as a delete of the old key plus an update of the new one
+        c.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {table_name}_change_log_update AFTER UPDATE ON {table_name}
+        BEGIN
+            INSERT INTO change_log (table_name, row_key, operation)
+            SELECT '{table_name}', OLD.{key}, 'DELETE' WHERE OLD.{key} IS NOT NEW.{key};
+            INSERT INTO change_log (table_name, row_key, operation) VALUES ('{table_name}', NEW.{key}, 'UPDATE');
+        END
+        ''')
+        
+        c.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {table_name}_change_log_delete AFTER DELETE ON {table_name}
+        BEGIN
+            INSERT INTO change_log (table_name, row_key, operation) VALUES ('{table_name}', OLD.{key}, 'DELETE');
+        END
+        ''')
+
 def init_db():
     # Get the database path from configuration
     DB_PATH = get_db_path()
@@ -45,23 +558,8 @@ def init_db():
         )
         ''')
         
-        c.execute('''
-        CREATE TABLE orf_sequence (
-            orf_id TEXT PRIMARY KEY,
-            orf_name TEXT,
-            orf_annotation TEXT,
-            orf_sequence TEXT,
-            orf_with_stop INTEGER,
-            orf_open INTEGER,
-            orf_organism_id TEXT,
-            orf_length_bp INTEGER,
-            orf_entrez_id TEXT,
-            orf_ensembl_id TEXT,
-            orf_uniprot_id TEXT,
-            orf_ref_url TEXT,
-            FOREIGN KEY (orf_organism_id) REFERENCES organisms (organism_id)
-        )
-        ''')
+        # ORF metadata, sequence payloads and the orf_sequence compatibility view
+        create_orf_sequence_tables(c)
         
         c.execute('''
         CREATE TABLE orf_position (
@@ -72,7 +570,7 @@ def init_db():
             freezer_id TEXT,
             plasmid_id TEXT,
             orf_create_date TEXT,
-            FOREIGN KEY (orf_id) REFERENCES orf_sequence (orf_id),
+            FOREIGN KEY (orf_id) REFERENCES orf_metadata (orf_id),
             FOREIGN KEY (freezer_id) REFERENCES freezer (freezer_id),
             FOREIGN KEY (plasmid_id) REFERENCES plasmid (plasmid_id)
         )
@@ -88,7 +586,7 @@ def init_db():
             submission_date TEXT,
             submitter TEXT,
             notes TEXT,
-            FOREIGN KEY (orf_id) REFERENCES orf_sequence (orf_id)
+            FOREIGN KEY (orf_id) REFERENCES orf_metadata (orf_id)
         )
         ''')
         
@@ -98,10 +596,28 @@ def init_db():
             orf_id TEXT,
             plate TEXT,
             well TEXT,
-            FOREIGN KEY (orf_id) REFERENCES orf_sequence (orf_id)
+            FOREIGN KEY (orf_id) REFERENCES orf_metadata (orf_id)
         )
         ''')
         
+        # HGNC symbols, and the display names derived from them
+        create_display_names(c)
+        
+        # Indexes for exact-match gene search
+        create_search_indexes(c)
+        
+        # Assembled per-ORF documents for search and the detail pages
+        create_orf_documents(c)
+        
+        # Record every write to the tables above for incremental consumers
+        create_change_log(c)
+        
+        # Checkpoints of resumable imports
+        create_import_runs(c)
+        
+        # Content hashes that let re-imports skip unchanged rows
+        create_content_hashes(c)
+        
         conn.commit()
         conn.close()
         print('Database schema created successfully')
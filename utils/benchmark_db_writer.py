@@ -0,0 +1,99 @@
+"""
+Benchmark concurrent small writes with and without the single database writer
+(app/db_writer.py).
+
+A throwaway database is written to by several threads at once, the way
+simultaneous form submissions arrive: first with every write on its own
+connection and commit, then with every write submitted to one DatabaseWriter
+that groups them into shared commits.
+"""
+
+import os
+import sys
+import sqlite3
+import argparse
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add parent directory to path so we can import the writer
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.db_writer import DatabaseWriter
+
+def create_database(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.execute('''
+    CREATE TABLE freezer (
+        freezer_id TEXT PRIMARY KEY,
+        freezer_location TEXT,
+        freezer_condition TEXT,
+        freezer_date TEXT
+    )
+    ''')
+    conn.commit()
+    conn.close()
+
+def insert_freezer(conn, freezer_id):
+    conn.execute(
+        'INSERT INTO freezer (freezer_id, freezer_location) VALUES (?, ?)',
+        (freezer_id, 'Benchmark')
+    )
+
+def run_per_connection(db_path, threads, writes, busy_timeout):
+    """Every write opens its own connection and commits, as the routes used to"""
+    def write(i):
+        try:
+            conn = sqlite3.connect(db_path, timeout=busy_timeout)
+            try:
+                insert_freezer(conn, f'CONN{i}')
+                conn.commit()
+            finally:
+                conn.close()
+            return True
+        except sqlite3.OperationalError:
+            return False
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(threads) as executor:
+        results = list(executor.map(write, range(writes)))
+    return time.perf_counter() - started, results.count(False)
+
+def run_writer(db_path, threads, writes, group_commit_ms):
+    """Every write is submitted to one DatabaseWriter"""
+    writer = DatabaseWriter(db_path, group_commit_ms)
+
+    def write(i):
+        try:
+            writer.submit(lambda conn: insert_freezer(conn, f'WRITER{i}')).result()
+            return True
+        except sqlite3.OperationalError:
+            return False
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(threads) as executor:
+        results = list(executor.map(write, range(writes)))
+    return time.perf_counter() - started, results.count(False)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the single database writer')
+    parser.add_argument('--threads', type=int, default=16, help='Concurrent writers')
+    parser.add_argument('--writes', type=int, default=2000, help='Total number of writes')
+    parser.add_argument('--group-commit-ms', type=int, default=2, help='Writer latency budget')
+    parser.add_argument('--busy-timeout', type=float, default=5, help='Per-connection lock timeout (seconds)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'benchmark.sqlite')
+        create_database(db_path)
+
+        print(f"{args.writes} writes from {args.threads} threads")
+        conn_time, conn_errors = run_per_connection(db_path, args.threads, args.writes, args.busy_timeout)
+        writer_time, writer_errors = run_writer(db_path, args.threads, args.writes, args.group_commit_ms)
+
+        print(f"\n{'mode':<16}{'time (s)':>10}{'writes/s':>10}{'lock errors':>13}")
+        for name, elapsed, errors in [('per-connection', conn_time, conn_errors),
+                                      ('single writer', writer_time, writer_errors)]:
+            print(f"{name:<16}{elapsed:>10.2f}{args.writes / elapsed:>10.0f}{errors:>13}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+"""
+Benchmark exact-match gene search with and without the indexed UNION probes
+(app/utils.exact_match_probes).
+
+A throwaway database is filled with synthetic ORFs, a share of which have HGNC
+symbols. The exact-match query is timed in three shapes: the original OR over
+the LEFT JOINed human_gene_data, the OR over display_name, and the UNION of
+indexed probes used by app/routes/search.py. The query plan of the probe
+query is checked to make sure no step scans the ORF table.
+"""
+
+import os
+import sys
+import sqlite3
+import argparse
+import tempfile
+import time
+import statistics
+
+# Add parent directory to path so we can import the schema and the search helper
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from setup_db import create_orf_sequence_tables, create_display_names, create_search_indexes
+from app.utils import exact_match_probes, orf_display_columns
+
+SELECT = '''
+    SELECT DISTINCT {columns}, o.organism_name, o.organism_genus, o.organism_species, o.organism_strain,
+           hgd.hgnc_approved_symbol
+    FROM orf_metadata os
+    LEFT JOIN organisms o ON os.orf_organism_id = o.organism_id
+    LEFT JOIN human_gene_data hgd ON os.orf_id = hgd.orf_id
+'''
+
+def create_database(db_path, orf_count, hgnc_share):
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+    c.execute('''
+    CREATE TABLE organisms (
+        organism_id TEXT PRIMARY KEY,
+        organism_name TEXT,
+        organism_genus TEXT,
+        organism_species TEXT,
+        organism_strain TEXT
+    )
+    ''')
+    c.executemany(
+        'INSERT INTO organisms VALUES (?, ?, ?, ?, ?)',
+        [(f'ORG{i:03d}', f'Organism {i}', 'Genus', 'species', '') for i in range(10)]
+    )
+    create_orf_sequence_tables(c)
+    create_display_names(c)
+
+    c.executemany(
+        'INSERT INTO orf_metadata (orf_id, orf_name, orf_organism_id, orf_entrez_id) VALUES (?, ?, ?, ?)',
+        [(f'ORF{i:07d}', f'Gene{i}', f'ORG{i % 10:03d}', str(1000 + i)) for i in range(orf_count)]
+    )
+    step = max(1, int(round(1 / hgnc_share))) if hgnc_share else 0
+    if step:
+        c.executemany(
+            'INSERT INTO human_gene_data (orf_id, hgnc_approved_symbol) VALUES (?, ?)',
+            [(f'ORF{i:07d}', f'HGNC{i}') for i in range(0, orf_count, step)]
+        )
+    create_search_indexes(c)
+    c.execute('ANALYZE')
+    conn.commit()
+    return conn
+
+def query_plan(conn, sql, params):
+    return [row[3] for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}', params).fetchall()]
+
+def assert_indexed(conn, sql, params):
+    """Fail if any step of the plan scans the ORF table instead of searching an index"""
+    plan = query_plan(conn, sql, params)
+    scans = [step for step in plan if step.startswith('SCAN') and ('orf_metadata' in step or ' os' in step)]
+    assert not scans, f"Query scans the ORF table: {scans}\nPlan: {plan}"
+    return plan
+
+def time_query(conn, sql, params, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        conn.execute(sql, params).fetchall()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark exact-match gene search')
+    parser.add_argument('--orfs', type=int, default=100000, help='Number of synthetic ORFs')
+    parser.add_argument('--hgnc-share', type=float, default=0.3, help='Share of ORFs with an HGNC symbol')
+    parser.add_argument('--repeat', type=int, default=20, help='Runs per query')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'benchmark.sqlite')
+        print(f"Creating {args.orfs} ORFs...")
+        conn = create_database(db_path, args.orfs, args.hgnc_share)
+        columns = orf_display_columns(conn, 'orf_metadata')
+
+        # A symbol in the middle of the table, so no shape gets lucky with scan order
+        middle = args.orfs // 2
+        hgnc_term = conn.execute(
+            'SELECT hgnc_approved_symbol FROM human_gene_data WHERE orf_id >= ? ORDER BY orf_id LIMIT 1',
+            (f'ORF{middle:07d}',)
+        ).fetchone()
+        terms = {'orf_id': f'ORF{middle:07d}', 'orf_name': f'Gene{middle}'}
+        if hgnc_term:
+            terms['hgnc'] = hgnc_term[0]
+
+        shapes = {
+            'OR + COALESCE': (
+                SELECT.format(columns='os.*')
+                + " WHERE (os.orf_name = ? OR os.orf_id = ? OR COALESCE(hgd.hgnc_approved_symbol, '') = ?)",
+                3
+            ),
+            'OR display_name': (
+                SELECT.format(columns=columns)
+                + ' WHERE (os.orf_name = ? OR os.orf_id = ? OR os.display_name = ?)',
+                3
+            ),
+        }
+        for ignore_case in (False, True):
+            probe_sql, probe_count = exact_match_probes(conn, 'orf_metadata', ignore_case)
+            name = 'UNION probes' + (' (nocase)' if ignore_case else '')
+            shapes[name] = (SELECT.format(columns=columns) + f' WHERE os.orf_id IN ({probe_sql})', probe_count)
+
+        # The probe queries must only ever search indexes
+        for name, (sql, count) in shapes.items():
+            if name.startswith('UNION'):
+                plan = assert_indexed(conn, sql, ['x'] * count)
+                print(f"\n{name} plan:")
+                for step in plan:
+                    print(f"  {step}")
+
+        print(f"\n{'query':<24}" + ''.join(f'{term:>12}' for term in terms) + '   (ms)')
+        for name, (sql, count) in shapes.items():
+            timings = []
+            for term in terms.values():
+                # Case-insensitive probes are timed with a differently cased term
+                value = term.lower() if 'nocase' in name else term
+                rows = conn.execute(sql, [value] * count).fetchall()
+                assert rows, f"{name} found nothing for {value}"
+                timings.append(time_query(conn, sql, [value] * count, args.repeat))
+            print(f"{name:<24}" + ''.join(f'{t * 1000:>12.2f}' for t in timings))
+
+        conn.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""
+Benchmark unified Excel imports read with pd.read_excel against imports
+streamed from openpyxl's read-only reader (xlsx_reader.py).
+
+Synthetic workbooks of increasing size are written to a temporary directory,
+with the rows in one sheet or split over several. Each one is imported into a
+throwaway database in a fresh process:
+
+- read_excel: the whole workbook read into DataFrames, as the import did before;
+- streamed: sheets read in chunks one after another in the importing process;
+- parallel: each sheet read in chunks by its own worker process (multi-sheet
+  workbooks only).
+
+Every process reports its peak resident set size and the time taken. Worker
+processes of the parallel mode are not included in the peak RSS; their own
+peak is about that of a streamed read of one sheet.
+"""
+
+import os
+import sys
+import sqlite3
+import argparse
+import resource
+import tempfile
+import time
+import multiprocessing
+
+# Add parent directory to path so we can import the importer
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmark_import_memory import COLUMNS, create_database
+
+def write_workbook(xlsx_path, row_count, sheet_count, sequence_length):
+    from openpyxl import Workbook
+
+    # A normal (not write-only) workbook, so sheets carry their dimensions
+    # and strings are shared, as in files saved by Excel
+    sequence = ('ATGC' * (sequence_length // 4 + 1))[:sequence_length]
+    workbook = Workbook()
+    workbook.remove(workbook.active)
+    per_sheet = -(-row_count // sheet_count)
+    for sheet_number in range(sheet_count):
+        sheet = workbook.create_sheet(f'ORFs {sheet_number + 1}')
+        sheet.append(COLUMNS)
+        for i in range(sheet_number * per_sheet, min(row_count, (sheet_number + 1) * per_sheet)):
+            plate, well = divmod(i, 96)
+            # Sequences differ per row, as real ones do, so the shared string table holds them all
+            sheet.append([
+                f'ORF{i:07d}', f'Gene{i}', sequence[:-7] + f'{i:07d}'.translate(str.maketrans('0123456789', 'ACGTACGTAC')),
+                f'Synthetic ORF {i}', 'yes', sequence_length, 1000 + i,
+                f'P{plate}-{chr(65 + well // 12)}{well % 12 + 1:02d}', f'AD{plate}:{well}', f'DB{plate}_{well}',
+                f'F{i % 5}', f'PL{i % 20}', 'Benchmark', 'Generated row'
+            ])
+    workbook.save(xlsx_path)
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def run_import(mode, xlsx_path, db_path, chunk_size, results):
+    import pandas as pd
+    from app.unified_import import import_unified_chunks
+    from xlsx_reader import sheet_headers, workbook_chunks
+
+    stats = {key: 0 for key in ['sequences', 'entry_positions', 'yeast_ad_positions', 'yeast_db_positions',
+                                'sources', 'organisms', 'freezers', 'plasmids', 'unchanged']}
+    errors = []
+    baseline = peak_rss_mb()
+    started = time.perf_counter()
+
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    conn.execute('BEGIN')
+    if mode == 'read_excel':
+        chunks = list(pd.read_excel(xlsx_path, sheet_name=None).values())
+    else:
+        sheets = list(sheet_headers(xlsx_path).items())
+        chunks = workbook_chunks(xlsx_path, sheets, chunk_size, workers=2 if mode == 'parallel' else 1)
+    import_unified_chunks(conn, chunks, stats, errors)
+    conn.execute('ROLLBACK')
+    conn.close()
+
+    results.put((peak_rss_mb(), peak_rss_mb() - baseline, time.perf_counter() - started, stats['sequences']))
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark unified Excel imports read whole against streamed')
+    parser.add_argument('--rows', type=int, nargs='+', default=[25000, 100000], help='Workbook sizes to try')
+    parser.add_argument('--sheets', type=int, nargs='+', default=[1, 4], help='Sheets to split the rows over')
+    parser.add_argument('--sequence-length', type=int, default=1000, help='Length of each synthetic sequence')
+    parser.add_argument('--chunk-size', type=int, default=10000, help='Rows per chunk')
+    args = parser.parse_args()
+
+    # Each import runs in a fresh process so its peak RSS is its own
+    context = multiprocessing.get_context('spawn')
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'benchmark.sqlite')
+        create_database(db_path)
+
+        print(f"{'rows':>8}{'sheets':>7}{'file MB':>9}  {'mode':<12}{'peak RSS MB':>12}{'import MB':>11}{'seconds':>9}")
+        for row_count in args.rows:
+            for sheet_count in args.sheets:
+                xlsx_path = os.path.join(tmp_dir, f'sheet_{row_count}_{sheet_count}.xlsx')
+                # Written in a process of its own: the workbook is built in memory, and
+                # the import processes would otherwise start with the writer's peak RSS
+                writer = context.Process(target=write_workbook,
+                                         args=(xlsx_path, row_count, sheet_count, args.sequence_length))
+                writer.start()
+                writer.join()
+                file_mb = os.path.getsize(xlsx_path) / 1024 / 1024
+
+                modes = ['read_excel', 'streamed'] + (['parallel'] if sheet_count > 1 else [])
+                for mode in modes:
+                    results = context.Queue()
+                    process = context.Process(target=run_import,
+                                              args=(mode, xlsx_path, db_path, args.chunk_size, results))
+                    process.start()
+                    peak, grown, seconds, sequences = results.get()
+                    process.join()
+                    assert sequences == row_count
+                    print(f"{row_count:>8}{sheet_count:>7}{file_mb:>9.1f}  {mode:<12}{peak:>12.1f}{grown:>11.1f}{seconds:>9.1f}")
+                os.unlink(xlsx_path)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark FASTA imports (fasta_reader.py) of growing ORF sets.
+
+Synthetic ORF sets of increasing size are written to a temporary directory as
+gzipped FASTA, with random sequences of 300 to 3,000 bases. Each one is
+imported into a throwaway database in a fresh process, once into an empty
+database and once more on top of it, where every record is unchanged. Every
+process reports its peak resident set size and the time taken.
+"""
+
+import os
+import sys
+import gzip
+import random
+import sqlite3
+import argparse
+import resource
+import tempfile
+import time
+import multiprocessing
+
+# Add parent directory to path so we can import the importer
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmark_import_memory import create_database
+from setup_db import create_content_hashes
+
+def write_fasta(fasta_path, orf_count, seed=0):
+    """Write random ORFs: ATG, a random number of random codons, a stop codon; returns the bases written"""
+    rng = random.Random(seed)
+    codons = [a + b + c for a in 'ACGT' for b in 'ACGT' for c in 'ACGT' if a + b + c not in ('TAA', 'TAG', 'TGA')]
+    bases = 0
+    with gzip.open(fasta_path, 'wt', compresslevel=1) as f:
+        for i in range(orf_count):
+            sequence = 'ATG' + ''.join(rng.choices(codons, k=rng.randint(100, 1000))) + 'TAA'
+            bases += len(sequence)
+            f.write(f'>ORF{i:07d} Synthetic ORF {i}\n')
+            for start in range(0, len(sequence), 60):
+                f.write(sequence[start:start + 60] + '\n')
+    return bases
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def run_import(fasta_path, db_path, chunk_size, results):
+    from app.unified_import import import_unified_chunks
+    from fasta_reader import fasta_chunks
+
+    stats = {key: 0 for key in ['sequences', 'entry_positions', 'yeast_ad_positions', 'yeast_db_positions',
+                                'sources', 'organisms', 'freezers', 'plasmids', 'unchanged']}
+    errors = []
+    baseline = peak_rss_mb()
+    started = time.perf_counter()
+
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    conn.execute('BEGIN')
+    import_unified_chunks(conn, fasta_chunks(fasta_path, chunk_size), stats, errors)
+    conn.execute('COMMIT')
+    conn.close()
+
+    results.put((peak_rss_mb(), peak_rss_mb() - baseline, time.perf_counter() - started,
+                 stats['sequences'], stats['unchanged']))
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark FASTA imports of growing ORF sets')
+    parser.add_argument('--orfs', type=int, nargs='+', default=[5000, 20000, 50000], help='ORF set sizes to try')
+    parser.add_argument('--chunk-size', type=int, default=10000, help='Records per chunk')
+    args = parser.parse_args()
+
+    # Each import runs in a fresh process so its peak RSS is its own
+    context = multiprocessing.get_context('spawn')
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        print(f"{'ORFs':>8}{'Mbases':>8}{'gz MB':>7}  {'import':<10}{'peak RSS MB':>12}{'import MB':>11}{'seconds':>9}")
+        for orf_count in args.orfs:
+            fasta_path = os.path.join(tmp_dir, f'orfs_{orf_count}.fasta.gz')
+            bases = write_fasta(fasta_path, orf_count)
+            file_mb = os.path.getsize(fasta_path) / 1024 / 1024
+            db_path = os.path.join(tmp_dir, f'benchmark_{orf_count}.sqlite')
+            create_database(db_path)
+            # With the content hash table, as in a database created by setup_db
+            conn = sqlite3.connect(db_path)
+            create_content_hashes(conn.cursor())
+            conn.commit()
+            conn.close()
+
+            for label in ['first', 'unchanged']:
+                results = context.Queue()
+                process = context.Process(target=run_import, args=(fasta_path, db_path, args.chunk_size, results))
+                process.start()
+                peak, grown, seconds, sequences, unchanged = results.get()
+                process.join()
+                assert sequences + unchanged == orf_count
+                print(f"{orf_count:>8}{bases / 1e6:>8.1f}{file_mb:>7.1f}  {label:<10}{peak:>12.1f}{grown:>11.1f}{seconds:>9.1f}")
+            os.unlink(fasta_path)
+
+if __name__ == '__main__':
+    main()
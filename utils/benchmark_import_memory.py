@@ -0,0 +1,120 @@
+"""
+Benchmark the peak memory of unified CSV imports read whole against imports
+read in chunks (app/unified_import.py).
+
+Synthetic unified import sheets of increasing size are written to a temporary
+directory. Each one is imported into a throwaway database twice, each time in
+a fresh process: once with the whole file read into one DataFrame, as the
+import did before, and once in chunks. Every process reports its peak
+resident set size; with chunks it should stay flat as the file grows.
+"""
+
+import os
+import sys
+import csv
+import sqlite3
+import argparse
+import resource
+import tempfile
+import time
+import multiprocessing
+
+# Add parent directory to path so we can import the importer
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+COLUMNS = ['orf_id', 'orf_name', 'orf_sequence', 'orf_annotation', 'orf_with_stop', 'orf_length_bp',
+           'orf_entrez_id', 'entry_position', 'yeast_ad_position', 'yeast_db_position',
+           'freezer_id', 'plasmid_id', 'source_name', 'source_details']
+
+def create_database(db_path):
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+    c.execute('CREATE TABLE organisms (organism_id TEXT PRIMARY KEY, organism_name TEXT, organism_genus TEXT, organism_species TEXT, organism_strain TEXT)')
+    c.execute('CREATE TABLE freezer (freezer_id TEXT PRIMARY KEY, freezer_location TEXT, freezer_condition TEXT, freezer_date TEXT)')
+    c.execute('CREATE TABLE plasmid (plasmid_id TEXT PRIMARY KEY, plasmid_name TEXT, plasmid_type TEXT, plasmid_express_organism TEXT, plasmid_description TEXT)')
+    c.execute('''
+    CREATE TABLE orf_sequence (
+        orf_id TEXT PRIMARY KEY, orf_name TEXT, orf_annotation TEXT, orf_sequence TEXT,
+        orf_sequence_packed BLOB, orf_with_stop INTEGER, orf_open INTEGER, orf_organism_id TEXT,
+        orf_length_bp INTEGER, orf_entrez_id TEXT, orf_ensembl_id TEXT, orf_uniprot_id TEXT, orf_ref_url TEXT
+    )
+    ''')
+    c.execute('CREATE TABLE orf_position (id INTEGER PRIMARY KEY AUTOINCREMENT, orf_id TEXT, plate TEXT, well TEXT, freezer_id TEXT, plasmid_id TEXT, orf_create_date TEXT)')
+    c.execute('CREATE TABLE yeast_orf_position (id INTEGER PRIMARY KEY AUTOINCREMENT, orf_id TEXT, plate TEXT, well TEXT, position_type TEXT)')
+    c.execute('CREATE TABLE orf_sources (id INTEGER PRIMARY KEY AUTOINCREMENT, orf_id TEXT, source_name TEXT, source_details TEXT, source_url TEXT, submission_date TEXT, submitter TEXT, notes TEXT)')
+    conn.commit()
+    conn.close()
+
+def write_sheet(csv_path, row_count, sequence_length):
+    sequence = ('ATGC' * (sequence_length // 4 + 1))[:sequence_length]
+    with open(csv_path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        for i in range(row_count):
+            plate, well = divmod(i, 96)
+            writer.writerow([
+                f'ORF{i:07d}', f'Gene{i}', sequence, f'Synthetic ORF {i}', 'yes', sequence_length,
+                f'{1000 + i}.0', f'P{plate}-{chr(65 + well // 12)}{well % 12 + 1:02d}',
+                f'AD{plate}:{well}', f'DB{plate}_{well}', f'F{i % 5}', f'PL{i % 20}',
+                'Benchmark', 'Generated row'
+            ])
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def run_import(mode, csv_path, db_path, chunk_size, results):
+    import pandas as pd
+    from app.unified_import import unified_csv_chunks, import_unified_chunks
+
+    stats = {key: 0 for key in ['sequences', 'entry_positions', 'yeast_ad_positions', 'yeast_db_positions',
+                                'sources', 'organisms', 'freezers', 'plasmids', 'unchanged']}
+    errors = []
+    baseline = peak_rss_mb()
+    started = time.perf_counter()
+
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    conn.execute('BEGIN')
+    if mode == 'whole file':
+        chunks = [pd.read_csv(csv_path)]
+    else:
+        columns = list(pd.read_csv(csv_path, nrows=0).columns)
+        chunks = unified_csv_chunks(csv_path, columns, chunk_size)
+    import_unified_chunks(conn, chunks, stats, errors)
+    conn.execute('ROLLBACK')
+    conn.close()
+
+    results.put((peak_rss_mb(), peak_rss_mb() - baseline, time.perf_counter() - started, stats['sequences']))
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark peak memory of unified CSV imports')
+    parser.add_argument('--rows', type=int, nargs='+', default=[25000, 100000, 200000], help='Sheet sizes to try')
+    parser.add_argument('--sequence-length', type=int, default=1000, help='Length of each synthetic sequence')
+    parser.add_argument('--chunk-size', type=int, default=10000, help='Rows per chunk')
+    args = parser.parse_args()
+
+    # Each import runs in a fresh process so its peak RSS is its own
+    context = multiprocessing.get_context('spawn')
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'benchmark.sqlite')
+        create_database(db_path)
+
+        print(f"{'rows':>8}{'file MB':>9}  {'mode':<12}{'peak RSS MB':>12}{'import MB':>11}{'seconds':>9}")
+        for row_count in args.rows:
+            csv_path = os.path.join(tmp_dir, f'sheet_{row_count}.csv')
+            write_sheet(csv_path, row_count, args.sequence_length)
+            file_mb = os.path.getsize(csv_path) / 1024 / 1024
+
+            for mode in ['whole file', 'chunked']:
+                results = context.Queue()
+                process = context.Process(target=run_import, args=(mode, csv_path, db_path, args.chunk_size, results))
+                process.start()
+                peak, grown, seconds, sequences = results.get()
+                process.join()
+                assert sequences == row_count
+                print(f"{row_count:>8}{file_mb:>9.1f}  {mode:<12}{peak:>12.1f}{grown:>11.1f}{seconds:>9.1f}")
+            os.unlink(csv_path)
+
+if __name__ == '__main__':
+    main()
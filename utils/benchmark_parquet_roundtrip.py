@@ -0,0 +1,120 @@
+"""
+Benchmark database round trips through CSV and Parquet files (parquet_io.py).
+
+A synthetic unified import sheet of each size is written as CSV and as
+Parquet and imported into a throwaway database. Every table of the database
+is then exported, as /export does, to CSV files and to Parquet files, and the
+exported files are read back as import chunks. Each step is timed, and the
+size of the exported files is reported.
+"""
+
+import os
+import sys
+import csv
+import sqlite3
+import argparse
+import tempfile
+import time
+
+import pandas as pd
+
+# Add parent directory to path so we can import the importer
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmark_import_memory import create_database, write_sheet
+from app.unified_import import unified_csv_chunks, import_unified_chunks
+from app.routes.import_export import export_parquet_tables
+from parquet_io import EXPORT_COLUMNS, parquet_header, parquet_chunks
+
+def import_sheet(db_path, chunks):
+    stats = {key: 0 for key in ['sequences', 'entry_positions', 'yeast_ad_positions', 'yeast_db_positions',
+                                'sources', 'organisms', 'freezers', 'plasmids', 'unchanged']}
+    errors = []
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    conn.execute('BEGIN')
+    import_unified_chunks(conn, chunks, stats, errors)
+    conn.execute('COMMIT')
+    conn.close()
+    return stats['sequences']
+
+def export_csv_tables(conn, export_dir):
+    # The CSV files of /export, with the same tables and columns as the
+    # Parquet files (see export_parquet_tables)
+    c = conn.cursor()
+    c.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'view')")
+    tables = {row[0] for row in c.fetchall()}
+    for table, columns in EXPORT_COLUMNS.items():
+        if table not in tables:
+            continue
+        c.execute(f"PRAGMA table_info({table})")
+        table_columns = [column[1] for column in c.fetchall()]
+        names = [column for column, _ in columns]
+        c.execute(f"SELECT {', '.join(name if name in table_columns else 'NULL' for name in names)} FROM {table}")
+        with open(os.path.join(export_dir, f'{table}.csv'), 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(names)
+            for row in c.fetchall():
+                writer.writerow(row)
+
+def read_back(export_dir, extension, chunk_size):
+    rows = 0
+    for table in EXPORT_COLUMNS:
+        file_path = os.path.join(export_dir, f'{table}.{extension}')
+        if not os.path.exists(file_path):
+            continue
+        if extension == 'csv':
+            chunks = unified_csv_chunks(file_path, list(pd.read_csv(file_path, nrows=0).columns), chunk_size)
+        else:
+            chunks = parquet_chunks(file_path, parquet_header(file_path), chunk_size)
+        rows += sum(len(chunk) for chunk in chunks)
+    return rows
+
+def directory_mb(directory, extension):
+    return sum(os.path.getsize(os.path.join(directory, name))
+               for name in os.listdir(directory) if name.endswith(extension)) / 1024 / 1024
+
+def timed(function, *args):
+    started = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark CSV and Parquet round trips')
+    parser.add_argument('--rows', type=int, nargs='+', default=[20000, 100000], help='Sheet sizes to try')
+    parser.add_argument('--sequence-length', type=int, default=1000, help='Length of each synthetic sequence')
+    parser.add_argument('--chunk-size', type=int, default=10000, help='Rows per chunk')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        print(f"{'rows':>8}  {'format':<8}{'import s':>9}{'export s':>9}{'read s':>8}{'export MB':>10}")
+        for row_count in args.rows:
+            csv_path = os.path.join(tmp_dir, f'sheet_{row_count}.csv')
+            parquet_path = os.path.join(tmp_dir, f'sheet_{row_count}.parquet')
+            write_sheet(csv_path, row_count, args.sequence_length)
+            pd.read_csv(csv_path).to_parquet(parquet_path, index=False, row_group_size=args.chunk_size)
+
+            for extension in ['csv', 'parquet']:
+                db_path = os.path.join(tmp_dir, f'benchmark_{row_count}_{extension}.sqlite')
+                export_dir = os.path.join(tmp_dir, f'exports_{row_count}_{extension}')
+                os.makedirs(export_dir)
+                create_database(db_path)
+
+                if extension == 'csv':
+                    columns = list(pd.read_csv(csv_path, nrows=0).columns)
+                    chunks = unified_csv_chunks(csv_path, columns, args.chunk_size)
+                else:
+                    chunks = parquet_chunks(parquet_path, parquet_header(parquet_path), args.chunk_size)
+                sequences, import_seconds = timed(import_sheet, db_path, chunks)
+                assert sequences == row_count
+
+                conn = sqlite3.connect(db_path)
+                export = export_csv_tables if extension == 'csv' else export_parquet_tables
+                _, export_seconds = timed(export, conn, export_dir)
+                conn.close()
+
+                _, read_seconds = timed(read_back, export_dir, extension, args.chunk_size)
+                print(f"{row_count:>8}  {extension:<8}{import_seconds:>9.1f}{export_seconds:>9.1f}"
+                      f"{read_seconds:>8.1f}{directory_mb(export_dir, extension):>10.1f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""
+Benchmark search and list latency before and after splitting sequence
+payloads out of the orf_sequence table (migrations/split_orf_sequences.py).
+
+A throwaway database is filled with synthetic ORFs, the app's gene search and
+/api/orfs list queries are timed against the original single-table layout,
+the table is split and the same queries are timed against orf_metadata.
+"""
+
+import os
+import sys
+import sqlite3
+import argparse
+import tempfile
+import time
+import statistics
+
+import numpy as np
+
+# Add parent directory to path so we can import the migration
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from migrations.split_orf_sequences import split_orf_sequences
+
+# Same shape as the partial-match gene search in app/routes/search.py
+SEARCH_QUERY = '''
+    SELECT DISTINCT os.*, o.organism_name, o.organism_genus, o.organism_species, o.organism_strain
+    FROM {table} os
+    LEFT JOIN organisms o ON os.orf_organism_id = o.organism_id
+    WHERE (os.orf_name LIKE ? OR os.orf_id LIKE ?)
+'''
+
+# Same as /api/orfs in app/routes/api.py
+LIST_QUERY = 'SELECT orf_id, orf_name, orf_annotation FROM {table}'
+
+def create_database(db_path, orf_count, sequence_length):
+    """Create the original single-table layout filled with synthetic ORFs"""
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+    c.execute('''
+    CREATE TABLE organisms (
+        organism_id TEXT PRIMARY KEY,
+        organism_name TEXT,
+        organism_genus TEXT,
+        organism_species TEXT,
+        organism_strain TEXT
+    )
+    ''')
+    c.execute('''
+    CREATE TABLE orf_sequence (
+        orf_id TEXT PRIMARY KEY,
+        orf_name TEXT,
+        orf_annotation TEXT,
+        orf_sequence TEXT,
+        orf_with_stop INTEGER,
+        orf_open INTEGER,
+        orf_organism_id TEXT,
+        orf_length_bp INTEGER,
+        orf_entrez_id TEXT,
+        orf_ensembl_id TEXT,
+        orf_uniprot_id TEXT,
+        orf_ref_url TEXT,
+        FOREIGN KEY (orf_organism_id) REFERENCES organisms (organism_id)
+    )
+    ''')
+    c.executemany(
+        'INSERT INTO organisms VALUES (?, ?, ?, ?, ?)',
+        [(f'ORG{i:03d}', f'Organism {i}', 'Genus', 'species', '') for i in range(10)]
+    )
+
+    rng = np.random.default_rng(0)
+    bases = np.frombuffer(b'ACGT', dtype=np.uint8)
+    batch_size = 5000
+    for start in range(0, orf_count, batch_size):
+        count = min(batch_size, orf_count - start)
+        block = bases[rng.integers(0, 4, size=(count, sequence_length))]
+        rows = []
+        for offset in range(count):
+            i = start + offset
+            rows.append((
+                f'ORF{i:07d}', f'GENE{i}', f'Synthetic gene {i}',
+                block[offset].tobytes().decode('ascii'),
+                1, 1, f'ORG{i % 10:03d}', sequence_length, str(1000 + i), '', '', ''
+            ))
+        c.executemany('INSERT INTO orf_sequence VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+    conn.commit()
+    conn.close()
+
+def time_query(db_path, sql, params, repeat):
+    """Median wall time of a query, each run on a fresh connection (cold page cache)"""
+    timings = []
+    for _ in range(repeat):
+        conn = sqlite3.connect(db_path)
+        started = time.perf_counter()
+        conn.execute(sql, params).fetchall()
+        timings.append(time.perf_counter() - started)
+        conn.close()
+    return statistics.median(timings)
+
+def run_queries(db_path, table, repeat):
+    return {
+        'search': time_query(db_path, SEARCH_QUERY.format(table=table), ('%GENE123%', '%GENE123%'), repeat),
+        'list': time_query(db_path, LIST_QUERY.format(table=table), (), repeat),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the orf_sequence payload split')
+    parser.add_argument('--orfs', type=int, default=100000, help='Number of synthetic ORFs')
+    parser.add_argument('--length', type=int, default=1500, help='Sequence length in bases')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per query')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'benchmark.sqlite')
+
+        print(f"Creating {args.orfs} ORFs of {args.length} bp...")
+        create_database(db_path, args.orfs, args.length)
+        before = run_queries(db_path, 'orf_sequence', args.repeat)
+
+        print("Splitting sequence payloads into orf_sequence_blob...")
+        conn = sqlite3.connect(db_path, isolation_level=None)
+        conn.execute('BEGIN')
+        split_orf_sequences(conn)
+        conn.execute('COMMIT')
+        conn.execute('VACUUM')
+        conn.close()
+        after = run_queries(db_path, 'orf_metadata', args.repeat)
+
+        print(f"\n{'query':<10}{'before (ms)':>14}{'after (ms)':>14}{'speedup':>10}")
+        for name in before:
+            speedup = before[name] / after[name] if after[name] else float('inf')
+            print(f"{name:<10}{before[name] * 1000:>14.1f}{after[name] * 1000:>14.1f}{speedup:>9.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""
+Benchmark lookup tables held per worker process against the shared-memory
+tables of app/shared_lookups.py.
+
+A throwaway database is filled with synthetic HGNC symbols and organisms.
+Several worker processes then each load the HGNC map and the organisms table:
+first as their own dicts read from the database, then by mapping the segments
+published once by this process. Every worker looks up a sample of ORF and
+organism IDs and reports how much private memory (memory no other process
+shares) the tables cost it. Linux only, since private memory is read from
+/proc.
+"""
+
+import os
+import sys
+import sqlite3
+import argparse
+import tempfile
+import time
+import random
+import multiprocessing
+
+# Add parent directory to path so we can import the lookup tables
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.shared_lookups import LookupPublisher, SharedLookups
+
+def create_database(db_path, orf_count, organism_count):
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+    c.execute('CREATE TABLE human_gene_data (orf_id TEXT PRIMARY KEY, hgnc_approved_symbol TEXT)')
+    c.execute('''CREATE TABLE organisms (organism_id TEXT PRIMARY KEY, organism_name TEXT, organism_genus TEXT,
+                 organism_species TEXT, organism_strain TEXT)''')
+    c.executemany('INSERT INTO human_gene_data VALUES (?, ?)',
+                  [(f'ORF{i:07d}', f'HGNC{i}') for i in range(0, orf_count, 2)])
+    c.executemany('INSERT INTO organisms VALUES (?, ?, ?, ?, ?)',
+                  [(str(i), f'Organism {i}', f'Genus{i}', f'species{i}', f'strain {i}')
+                   for i in range(organism_count)])
+    conn.commit()
+    conn.close()
+
+def private_kb():
+    """Private_Clean + Private_Dirty of this process, in kB"""
+    total = 0
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            if line.startswith(('Private_Clean:', 'Private_Dirty:')):
+                total += int(line.split()[1])
+    return total
+
+def worker(mode, db_path, sample, results):
+    before = private_kb()
+    if mode == 'per-process':
+        conn = sqlite3.connect(db_path)
+        hgnc_map = dict(conn.execute('SELECT orf_id, hgnc_approved_symbol FROM human_gene_data').fetchall())
+        # Organism rows as dimension_cache.dimension holds them
+        c = conn.execute('SELECT * FROM organisms')
+        columns = [column[0] for column in c.description]
+        organisms = {row[0]: dict(zip(columns, row)) for row in c.fetchall()}
+        conn.close()
+    else:
+        lookups = SharedLookups(db_path)
+        hgnc_map = lookups.table('hgnc')
+        organisms = lookups.table('organisms')
+
+    started = time.perf_counter()
+    found = sum(1 for orf_id, organism_id in sample
+                if hgnc_map.get(orf_id) and organisms.get(organism_id, {}).get('organism_name'))
+    elapsed = time.perf_counter() - started
+    results.put((private_kb() - before, elapsed / len(sample), found))
+
+def run(mode, db_path, workers, sample):
+    results = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=worker, args=(mode, db_path, sample, results))
+                 for _ in range(workers)]
+    for process in processes:
+        process.start()
+    reports = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return sum(report[0] for report in reports), max(report[1] for report in reports)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark shared-memory lookup tables')
+    parser.add_argument('--orfs', type=int, default=200000, help='Number of synthetic ORFs, half with an HGNC symbol')
+    parser.add_argument('--organisms', type=int, default=50000, help='Number of synthetic organisms')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8], help='Worker counts to try')
+    parser.add_argument('--lookups', type=int, default=10000, help='Lookups per worker')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'benchmark.sqlite')
+        print(f"Creating {args.orfs} ORFs and {args.organisms} organisms...")
+        create_database(db_path, args.orfs, args.organisms)
+
+        publisher = LookupPublisher(db_path)
+        try:
+            conn = sqlite3.connect(db_path)
+            started = time.perf_counter()
+            published = publisher.publish(conn)
+            print(f"Published {', '.join(published)} in {time.perf_counter() - started:.2f} s")
+            conn.close()
+
+            sample = [(f'ORF{random.randrange(args.orfs):07d}', str(random.randrange(args.organisms * 2)))
+                      for _ in range(args.lookups)]
+            print(f"\n{'mode':<14}{'workers':>8}{'private MB':>12}{'lookup (us)':>13}")
+            for mode in ['per-process', 'shared']:
+                for workers in args.workers:
+                    private, per_lookup = run(mode, db_path, workers, sample)
+                    print(f"{mode:<14}{workers:>8}{private / 1024:>12.1f}{per_lookup * 1e6:>13.2f}")
+        finally:
+            publisher.close()
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,11 @@
 """
 Utility script to check and fix relationships between organisms and ORF sequences
+
+Every check and fix is one set-based statement: anti-joins on the organisms
+primary key and on the ORF table's orf_organism_id index, instead of NOT IN
+subqueries and a statement per organism or ORF. The fixes are worked out in
+temp tables, which the dry run prints and --fix applies with one UPDATE and
+one INSERT, in one short transaction.
 """
 
 import sqlite3
@@ -11,6 +17,51 @@ from datetime import datetime
 # Add parent directory to path so we can import config
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config import get_db_path
+from setup_db import orf_metadata_table_name
+
+def percent(part, whole):
+    """part as a percentage of whole, 0 for an empty whole"""
+    return part / whole * 100 if whole > 0 else 0
+
+def stage_fixes(c, table_name):
+    """
+    Work out the fixes in temp tables, without touching the database.
+    
+    organism_links: organisms without an orf_id and the ORF to link each to
+    (the lowest ORF ID referring to it). missing_organisms: organism IDs that
+    ORFs refer to but that do not exist, each with the ORF (lowest ID) it
+    will be created from.
+    """
+    c.execute('DROP TABLE IF EXISTS temp.organism_links')
+    c.execute(f'''
+    CREATE TEMP TABLE organism_links AS
+    SELECT o.organism_id, MIN(s.orf_id) AS orf_id
+    FROM organisms o
+    JOIN {table_name} s ON s.orf_organism_id = o.organism_id
+    WHERE o.orf_id IS NULL
+    GROUP BY o.organism_id
+    ''')
+    
+    # The bare orf_name comes from the row with the lowest orf_id
+    c.execute('DROP TABLE IF EXISTS temp.missing_organisms')
+    c.execute(f'''
+    CREATE TEMP TABLE missing_organisms AS
+    SELECT s.orf_organism_id AS organism_id, MIN(s.orf_id) AS orf_id, s.orf_name
+    FROM {table_name} s
+    LEFT JOIN organisms o ON o.organism_id = s.orf_organism_id
+    WHERE s.orf_organism_id IS NOT NULL AND o.organism_id IS NULL
+    GROUP BY s.orf_organism_id
+    ''')
+
+def orphaned_orf_count(c, table_name):
+    """Number of ORFs referring to organisms that do not exist"""
+    c.execute(f'''
+    SELECT COUNT(*)
+    FROM {table_name} s
+    LEFT JOIN organisms o ON o.organism_id = s.orf_organism_id
+    WHERE s.orf_organism_id IS NOT NULL AND o.organism_id IS NULL
+    ''')
+    return c.fetchone()[0]
 
 def analyze_links():
     """Analyze the links between organisms and ORF sequences"""
@@ -37,18 +88,16 @@ def analyze_links():
             print("Please run the fix_organisms_schema migration first.")
             return False
         
-        # 2. Get statistics about the current state
-        c.execute('''SELECT COUNT(*) FROM organisms''')
-        total_organisms = c.fetchone()[0]
-        
-        c.execute('''SELECT COUNT(*) FROM organisms WHERE orf_id IS NOT NULL''')
-        organisms_with_orf = c.fetchone()[0]
+        # Queried directly rather than through the orf_sequence view, so
+        # the orf_organism_id index is used
+        table_name = orf_metadata_table_name(c)
         
-        c.execute('''SELECT COUNT(*) FROM orf_sequence''')
-        total_orfs = c.fetchone()[0]
+        # 2. Get statistics about the current state
+        c.execute('''SELECT COUNT(*), COUNT(orf_id) FROM organisms''')
+        total_organisms, organisms_with_orf = c.fetchone()
         
-        c.execute('''SELECT COUNT(*) FROM orf_sequence WHERE orf_organism_id IS NOT NULL''')
-        orfs_with_organism = c.fetchone()[0]
+        c.execute(f'''SELECT COUNT(*), COUNT(orf_organism_id) FROM {table_name}''')
+        total_orfs, orfs_with_organism = c.fetchone()
         
         # 3. Find organisms without linked ORFs
         c.execute('''
@@ -60,20 +109,31 @@ def analyze_links():
         unlinked_organisms = c.fetchall()
         
         # 4. Find ORFs referring to non-existent organisms
-        c.execute('''
-        SELECT orf_id, orf_name, orf_organism_id
-        FROM orf_sequence
-        WHERE orf_organism_id IS NOT NULL 
-        AND orf_organism_id NOT IN (SELECT organism_id FROM organisms)
+        orphaned_count = orphaned_orf_count(c, table_name)
+        c.execute(f'''
+        SELECT s.orf_id, s.orf_name, s.orf_organism_id
+        FROM {table_name} s
+        LEFT JOIN organisms o ON o.organism_id = s.orf_organism_id
+        WHERE s.orf_organism_id IS NOT NULL AND o.organism_id IS NULL
         LIMIT 10
         ''')
         orphaned_orfs = c.fetchall()
         
         # 5. Find organisms with multiple ORFs
-        c.execute('''
+        c.execute(f'''
+        SELECT COUNT(*) FROM (
+            SELECT orf_organism_id
+            FROM {table_name}
+            WHERE orf_organism_id IN (SELECT organism_id FROM organisms)
+            GROUP BY orf_organism_id
+            HAVING COUNT(*) > 1
+        )
+        ''')
+        multi_orf_count = c.fetchone()[0]
+        c.execute(f'''
         SELECT o.organism_id, o.organism_name, COUNT(s.orf_id) as orf_count
         FROM organisms o
-        JOIN orf_sequence s ON o.organism_id = s.orf_organism_id
+        JOIN {table_name} s ON o.organism_id = s.orf_organism_id
         GROUP BY o.organism_id
         HAVING COUNT(s.orf_id) > 1
         LIMIT 10
@@ -83,9 +143,9 @@ def analyze_links():
         # Print the report
         print("\n===== DATABASE RELATIONSHIP ANALYSIS =====")
         print(f"Total organisms: {total_organisms}")
-        print(f"Organisms with linked ORFs: {organisms_with_orf} ({organisms_with_orf/total_organisms*100:.1f}% if total_organisms > 0 else 0}%)")
+        print(f"Organisms with linked ORFs: {organisms_with_orf} ({percent(organisms_with_orf, total_organisms):.1f}%)")
         print(f"Total ORF sequences: {total_orfs}")
-        print(f"ORFs with organism references: {orfs_with_organism} ({orfs_with_organism/total_orfs*100:.1f}% if total_orfs > 0 else 0}%)")
+        print(f"ORFs with organism references: {orfs_with_organism} ({percent(orfs_with_organism, total_orfs):.1f}%)")
         
         print("\n----- ISSUES DETECTED -----")
         print(f"Organisms without linked ORFs: {total_organisms - organisms_with_orf}")
@@ -94,20 +154,20 @@ def analyze_links():
             for org in unlinked_organisms:
                 print(f"  - {org['organism_id']}: {org['organism_name']} ({org['organism_genus']} {org['organism_species']})")
         
-        print(f"\nORFs with invalid organism references: {len(orphaned_orfs)}")
+        print(f"\nORFs with invalid organism references: {orphaned_count}")
         if orphaned_orfs:
             print("Sample orphaned ORFs:")
             for orf in orphaned_orfs:
                 print(f"  - {orf['orf_id']}: {orf['orf_name']} (references unknown organism {orf['orf_organism_id']})")
         
-        print(f"\nOrganisms with multiple ORFs: {len(multi_orf_organisms)}")
+        print(f"\nOrganisms with multiple ORFs: {multi_orf_count}")
         if multi_orf_organisms:
             print("Sample multi-ORF organisms:")
             for org in multi_orf_organisms:
                 print(f"  - {org['organism_id']}: {org['organism_name']} ({org['orf_count']} ORFs)")
         
         return True
-        
+    
     except Exception as e:
         print(f'Error during analysis: {str(e)}')
         import traceback
@@ -134,6 +194,8 @@ def fix_links(dry_run=True):
     c = conn.cursor()
     
     try:
+        table_name = orf_metadata_table_name(c)
+        
         if not dry_run:
             # Create a backup first
             backup_path = os.path.join(
@@ -149,85 +211,59 @@ def fix_links(dry_run=True):
             shutil.copy2(DB_PATH, backup_path)
             print(f'Created backup at {backup_path}')
             
-            # Start a transaction
-            c.execute('BEGIN TRANSACTION')
+            # Start a transaction; the fixes are worked out inside it, so
+            # they match the data they are applied to
+            c.execute('BEGIN IMMEDIATE TRANSACTION')
+            
+            # The anti-joins look ORFs up by organism
+            c.execute(f'CREATE INDEX IF NOT EXISTS idx_orf_organism_id ON {table_name} (orf_organism_id)')
+        
+        stage_fixes(c, table_name)
         
         # 1. Update organisms.orf_id where it's missing but a matching ORF exists
-        c.execute('''
-        SELECT organism_id 
-        FROM organisms 
-        WHERE orf_id IS NULL 
-        AND organism_id IN (
-            SELECT orf_organism_id 
-            FROM orf_sequence 
-            WHERE orf_organism_id IS NOT NULL
-        )
-        ''')
-        missing_orf_ids = [row[0] for row in c.fetchall()]
+        c.execute('SELECT organism_id, orf_id FROM organism_links ORDER BY organism_id')
+        links = c.fetchall()
         
-        print(f"Found {len(missing_orf_ids)} organisms missing orf_id that have matching ORFs")
+        print(f"Found {len(links)} organisms missing orf_id that have matching ORFs")
         
-        fixed_count = 0
-        for organism_id in missing_orf_ids:
-            # Get the first ORF associated with this organism
+        if dry_run:
+            for link in links:
+                print(f"Would link organism {link['organism_id']} to ORF {link['orf_id']}")
+        else:
             c.execute('''
-            SELECT orf_id 
-            FROM orf_sequence 
-            WHERE orf_organism_id = ?
-            LIMIT 1
-            ''', (organism_id,))
-            orf_id = c.fetchone()[0]
-            
-            if dry_run:
-                print(f"Would link organism {organism_id} to ORF {orf_id}")
-            else:
-                c.execute('''
-                UPDATE organisms
-                SET orf_id = ?
-                WHERE organism_id = ?
-                ''', (orf_id, organism_id))
-                fixed_count += 1
-        
-        if not dry_run:
-            print(f"Fixed {fixed_count} organism-ORF links")
+            UPDATE organisms
+            SET orf_id = (SELECT orf_id FROM organism_links l WHERE l.organism_id = organisms.organism_id)
+            WHERE organism_id IN (SELECT organism_id FROM organism_links)
+            ''')
+            print(f"Fixed {c.rowcount} organism-ORF links")
         
-        # 2. Create missing organisms for orphaned ORFs
-        c.execute('''
-        SELECT orf_id, orf_name, orf_organism_id
-        FROM orf_sequence
-        WHERE orf_organism_id IS NOT NULL 
-        AND orf_organism_id NOT IN (SELECT organism_id FROM organisms)
-        ''')
-        orphaned_orfs = c.fetchall()
+        # 2. Create missing organisms for orphaned ORFs, one per missing
+        # organism ID however many ORFs refer to it
+        print(f"Found {orphaned_orf_count(c, table_name)} ORFs with missing organism references")
         
-        print(f"Found {len(orphaned_orfs)} ORFs with missing organism references")
-        
-        created_count = 0
-        for orf in orphaned_orfs:
-            # Construct an organism name from the ORF info
-            organism_name = f"Unknown ({orf['orf_name']})"
-            
-            if dry_run:
-                print(f"Would create organism {orf['orf_organism_id']} for ORF {orf['orf_id']}")
-            else:
-                c.execute('''
-                INSERT INTO organisms (organism_id, organism_name, organism_genus, organism_species, organism_strain, orf_id)
-                VALUES (?, ?, 'Unknown', 'Unknown', 'Unknown', ?)
-                ''', (orf['orf_organism_id'], organism_name, orf['orf_id']))
-                created_count += 1
-        
-        if not dry_run:
-            print(f"Created {created_count} missing organisms")
+        if dry_run:
+            c.execute('SELECT organism_id, orf_id FROM missing_organisms ORDER BY organism_id')
+            for organism in c.fetchall():
+                print(f"Would create organism {organism['organism_id']} for ORF {organism['orf_id']}")
+        else:
+            # Named after the ORF, as "Unknown (<orf_name>)"
+            c.execute('''
+            INSERT INTO organisms (organism_id, organism_name, organism_genus, organism_species, organism_strain, orf_id)
+            SELECT organism_id, 'Unknown (' || COALESCE(orf_name, 'None') || ')', 'Unknown', 'Unknown', 'Unknown', orf_id
+            FROM missing_organisms
+            ''')
+            print(f"Created {c.rowcount} missing organisms")
             c.execute('COMMIT')
             print("Changes committed to database")
-        else:
+        
+        if dry_run:
             print("\nThis was a dry run. No changes were made to the database.")
             print("Run with --fix to apply these changes.")
         
         return True
-        
+    
     except Exception as e:
-        if not dry_run:
+        if not dry_run and conn.in_transaction:
             c.execute('ROLLBACK')
             print("Changes rolled back due to error")
         
@@ -0,0 +1,235 @@
+"""
+Utility script to import many position CSV files in one run, e.g. a
+delivery of plate maps.
+
+Takes files, directories (every .csv file in them) and glob patterns. Each
+file is parsed and validated by a pool of worker processes, against a set of
+ORF IDs loaded once from the database. A file is a unified position file if
+its header has an entry_position column and a yeast position file otherwise
+(see import_unified_positions.py and import_yeast_positions.py for the
+formats). The parsed rows are written in file order through one database
+connection, in one transaction, while the workers parse the next files.
+"""
+
+import os
+import sys
+import csv
+import glob
+import time
+import sqlite3
+import argparse
+import multiprocessing
+
+# Add parent directory to path so we can import config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import get_db_path
+from position_files import load_orf_ids
+from import_unified_positions import parse_unified_positions, write_unified_positions
+from import_yeast_positions import parse_yeast_positions, write_yeast_positions
+
+# Set in each worker process by _init_worker
+_orf_ids = None
+_has_position_type = True
+
+def expand_paths(paths):
+    """Files named by paths, directories (their .csv files) and glob patterns, in order, without duplicates"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            matches = sorted(glob.glob(os.path.join(path, '*.csv')))
+        elif os.path.isfile(path):
+            matches = [path]
+        else:
+            matches = sorted(glob.glob(path))
+        for match in matches:
+            if os.path.isfile(match) and match not in files:
+                files.append(match)
+    return files
+
+def file_kind(csv_path):
+    """'unified' if the file's header has an entry_position column, otherwise 'yeast'"""
+    with open(csv_path, 'r', newline='', encoding='utf-8-sig') as f:
+        header = next(csv.reader(f), [])
+    return 'unified' if 'entry_position' in [col.strip().lower() for col in header] else 'yeast'
+
+def _init_worker(orf_ids, has_position_type):
+    global _orf_ids, _has_position_type
+    _orf_ids = orf_ids
+    _has_position_type = has_position_type
+
+def parse_file(task):
+    """Worker: parse and validate one file; returns its parsed rows (see parse_unified_positions)"""
+    csv_path, kind = task
+    try:
+        kind = kind if kind != 'auto' else file_kind(csv_path)
+        if kind == 'unified':
+            parsed = parse_unified_positions(csv_path, _orf_ids)
+        else:
+            parsed = parse_yeast_positions(csv_path, _orf_ids, _has_position_type)
+    except Exception as e:
+        parsed = {'file': csv_path, 'error': str(e), 'rows': [], 'valid_rows': 0, 'invalid_rows': 0,
+                  'warnings': [], 'errors': []}
+    parsed['kind'] = kind
+    return parsed
+
+def import_position_files(paths, kind='auto', dry_run=True, validate_orfs=True, workers=None, verbose=False):
+    """
+    Import position CSV files in parallel
+
+    Args:
+        paths: Files, directories and glob patterns
+        kind: 'unified', 'yeast', or 'auto' to tell each file by its header
+        dry_run: If True, only validate the files without making changes
+        validate_orfs: If True, check that all ORF IDs exist in the database
+        workers: Worker processes parsing files; defaults to the number of CPUs
+        verbose: Print every skipped row, not just each file's summary
+    """
+    files = expand_paths(paths)
+    if not files:
+        print(f"Error: No files found in {', '.join(paths)}")
+        return False
+
+    # Get the database path
+    DB_PATH = get_db_path()
+    if not os.path.exists(DB_PATH):
+        print(f"Error: Database not found at {DB_PATH}")
+        return False
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(files)))
+    print(f"{'Validating' if dry_run else 'Importing'} {len(files)} files with {workers} worker processes")
+    started = time.perf_counter()
+
+    # The one connection that writes
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+
+    try:
+        # Check if the required tables exist
+        for table in ['orf_position', 'yeast_orf_position', 'orf_sources']:
+            c.execute(f"SELECT name FROM sqlite_master WHERE type='table' AND name='{table}'")
+            if not c.fetchone():
+                print(f"Error: {table} table does not exist")
+                return False
+
+        # Check if the position_type column exists in yeast_orf_position
+        c.execute("PRAGMA table_info(yeast_orf_position)")
+        has_position_type = 'position_type' in [column[1] for column in c.fetchall()]
+        if not has_position_type:
+            print("Error: position_type column does not exist in yeast_orf_position table")
+            print("Run the migrations/update_yeast_orf_position.py script first")
+            return False
+
+        # Loaded once and handed to every worker, instead of a query per row
+        orf_ids = load_orf_ids(c) if validate_orfs else None
+
+        if not dry_run:
+            c.execute('BEGIN TRANSACTION')
+
+        totals = {'files': 0, 'failed_files': 0, 'valid_rows': 0, 'invalid_rows': 0, 'inserted': 0}
+        errors = []
+        write_seconds = 0
+        context = multiprocessing.get_context('spawn')
+        with context.Pool(workers, initializer=_init_worker, initargs=(orf_ids, has_position_type)) as pool:
+            # Files are written in order, while the workers parse the ones after them
+            for parsed in pool.imap(parse_file, [(csv_path, kind) for csv_path in files]):
+                totals['files'] += 1
+                if parsed['error']:
+                    totals['failed_files'] += 1
+                    message = parsed['error'].replace('\n', '\n    ')
+                    print(f"  {parsed['file']}: Error: {message}")
+                    continue
+
+                if verbose:
+                    for warning in parsed['warnings']:
+                        print(f"  {parsed['file']}: Warning: {warning}")
+                file_errors = list(parsed['errors'])
+
+                inserted = 0
+                if not dry_run:
+                    write_started = time.perf_counter()
+                    if parsed['kind'] == 'unified':
+                        inserted = sum(write_unified_positions(c, parsed['rows'], file_errors).values())
+                    else:
+                        inserted = write_yeast_positions(c, parsed['rows'], has_position_type, file_errors)
+                    write_seconds += time.perf_counter() - write_started
+
+                totals['valid_rows'] += parsed['valid_rows']
+                totals['invalid_rows'] += parsed['invalid_rows']
+                totals['inserted'] += inserted
+                errors.extend(f"{parsed['file']}: {error}" for error in file_errors)
+                print(f"  {parsed['file']} ({parsed['kind']}): {parsed['valid_rows']} valid, "
+                      f"{parsed['invalid_rows']} invalid" + ('' if dry_run else f", {inserted} inserted"))
+
+        if not dry_run:
+            if totals['inserted'] > 0:
+                c.execute('COMMIT')
+            else:
+                c.execute('ROLLBACK')
+        seconds = time.perf_counter() - started
+
+        # Summary
+        rows = totals['valid_rows'] + totals['invalid_rows']
+        print("\nSummary:")
+        print(f"  Files: {totals['files']} ({totals['failed_files']} could not be read)")
+        print(f"  Valid rows: {totals['valid_rows']}")
+        print(f"  Invalid rows: {totals['invalid_rows']}")
+        if not dry_run:
+            print(f"  Inserted rows: {totals['inserted']}")
+        print(f"  Time: {seconds:.1f}s ({totals['files'] / seconds:.1f} files/s, {rows / seconds:.0f} rows/s"
+              + ('' if dry_run else f"; {write_seconds:.1f}s writing") + ")")
+
+        if errors:
+            print(f"\nErrors ({len(errors)}):")
+            for error in errors[:10]:  # Show only the first 10 errors
+                print(f"  {error}")
+            if len(errors) > 10:
+                print(f"  ... and {len(errors) - 10} more errors")
+
+        if dry_run:
+            print("\nDry run completed, no changes made to the database")
+            return totals['valid_rows'] > 0
+        if totals['inserted'] > 0:
+            print("\nSuccessfully imported positions")
+            return True
+        print("\nNo valid rows to import, rolling back")
+        return False
+
+    except Exception as e:
+        # Roll back the transaction if not a dry run
+        if conn.in_transaction:
+            conn.rollback()
+
+        print(f"Error during import: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+    finally:
+        # Close the database connection
+        conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description='Import position data from many CSV files in parallel')
+    parser.add_argument('paths', nargs='+', help='CSV files, directories of CSV files, or glob patterns')
+    parser.add_argument('--kind', choices=['auto', 'unified', 'yeast'], default='auto',
+                        help='File format; auto tells each file by its header')
+    parser.add_argument('--workers', type=int, help='Worker processes parsing files (default: number of CPUs)')
+    parser.add_argument('--dry-run', action='store_true', help='Validate the files without making changes')
+    parser.add_argument('--no-validate', action='store_true', help='Skip ORF ID validation')
+    parser.add_argument('--verbose', action='store_true', help='Print every skipped row')
+
+    args = parser.parse_args()
+
+    success = import_position_files(
+        paths=args.paths,
+        kind=args.kind,
+        dry_run=args.dry_run,
+        validate_orfs=not args.no_validate,
+        workers=args.workers,
+        verbose=args.verbose
+    )
+
+    sys.exit(0 if success else 1)
+
+if __name__ == '__main__':
+    main()
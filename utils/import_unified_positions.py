@@ -14,6 +14,149 @@ from datetime import datetime
 # Add parent directory to path so we can import config
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config import get_db_path
+from position_files import load_orf_ids, insert_rows
+
+def parse_boolean(value):
+    """Parse a position flag (Yes/No/True/False)"""
+    if not value:
+        return False
+    value = value.strip().lower()
+    return value in ['yes', 'true', '1', 'y', 't']
+
+def parse_unified_positions(csv_path, orf_ids=None):
+    """
+    Parse and validate a unified position CSV file, without touching the database.
+    
+    Args:
+        csv_path: Path to the CSV file
+        orf_ids: Set of known ORF IDs; rows with other IDs are skipped. None
+            skips the check
+    
+    Returns:
+        dict: error (a message if the file cannot be imported at all, else
+        None), rows ((row_number, (orf_id, plate, well, entry_position,
+        yeast_ad_position, yeast_db_position, source_name, source_details))
+        tuples), valid_rows, invalid_rows, warnings and errors
+    """
+    parsed = {'file': csv_path, 'error': None, 'rows': [], 'valid_rows': 0, 'invalid_rows': 0,
+              'warnings': [], 'errors': []}
+    warnings = parsed['warnings']
+    
+    with open(csv_path, 'r', newline='', encoding='utf-8-sig') as f:
+        reader = csv.reader(f)
+        
+        # Get the header row
+        try:
+            header = next(reader)
+        except StopIteration:
+            parsed['error'] = "CSV file is empty"
+            return parsed
+        
+        # Check if the header has the expected columns
+        expected_columns = [
+            'orf_id', 'plate', 'well', 
+            'entry_position', 'yeast_ad_position', 'yeast_db_position',
+            'source_name', 'source_details'
+        ]
+        
+        # Check if all required columns are present (case-insensitive)
+        header_lower = [col.lower() for col in header]
+        missing_columns = [col for col in expected_columns if col.lower() not in header_lower]
+        
+        if missing_columns:
+            parsed['error'] = (f"CSV file is missing required columns: {', '.join(missing_columns)}\n"
+                               f"Expected columns: {', '.join(expected_columns)}\n"
+                               f"Found columns: {', '.join(header)}")
+            return parsed
+        
+        # Get the column indices
+        orf_id_idx = header_lower.index('orf_id')
+        plate_idx = header_lower.index('plate')
+        well_idx = header_lower.index('well')
+        entry_position_idx = header_lower.index('entry_position')
+        yeast_ad_position_idx = header_lower.index('yeast_ad_position')
+        yeast_db_position_idx = header_lower.index('yeast_db_position')
+        source_name_idx = header_lower.index('source_name')
+        source_details_idx = header_lower.index('source_details')
+        
+        for i, row in enumerate(reader, start=2):  # Start from 2 to account for header row
+            if len(row) < len(header):
+                warnings.append(f"Row {i} has fewer columns than header, skipping")
+                parsed['invalid_rows'] += 1
+                continue
+            
+            orf_id = row[orf_id_idx].strip()
+            plate = row[plate_idx].strip()
+            well = row[well_idx].strip()
+            
+            entry_position = parse_boolean(row[entry_position_idx])
+            yeast_ad_position = parse_boolean(row[yeast_ad_position_idx])
+            yeast_db_position = parse_boolean(row[yeast_db_position_idx])
+            
+            # Get source information
+            source_name = row[source_name_idx].strip()
+            source_details = row[source_details_idx].strip()
+            
+            # Skip empty rows
+            if not orf_id or not plate or not well:
+                warnings.append(f"Row {i} has empty required fields, skipping")
+                parsed['invalid_rows'] += 1
+                continue
+            
+            # Skip rows with no positions
+            if not (entry_position or yeast_ad_position or yeast_db_position):
+                warnings.append(f"Row {i} has no positions enabled, skipping")
+                parsed['invalid_rows'] += 1
+                continue
+            
+            # Skip rows with no source information
+            if not source_name:
+                warnings.append(f"Row {i} has no source name, skipping")
+                parsed['invalid_rows'] += 1
+                continue
+            
+            # Validate ORF ID against the preloaded set
+            if orf_ids is not None and orf_id not in orf_ids:
+                warnings.append(f"Row {i} has unknown ORF ID '{orf_id}', skipping")
+                parsed['errors'].append(f"Row {i}: Unknown ORF ID '{orf_id}'")
+                parsed['invalid_rows'] += 1
+                continue
+            
+            parsed['valid_rows'] += 1
+            parsed['rows'].append((i, (orf_id, plate, well, entry_position, yeast_ad_position, yeast_db_position,
+                                       source_name, source_details)))
+    
+    return parsed
+
+def write_unified_positions(c, rows, errors, submission_date=None):
+    """
+    Insert parsed unified positions (see parse_unified_positions), one
+    statement per table.
+    
+    Returns:
+        dict: Rows inserted into each table: entry, yeast_ad, yeast_db, source
+    """
+    submission_date = submission_date or datetime.now().strftime("%Y-%m-%d")
+    entry, yeast_ad, yeast_db, sources = [], [], [], []
+    for i, (orf_id, plate, well, entry_position, yeast_ad_position, yeast_db_position,
+            source_name, source_details) in rows:
+        if entry_position:
+            entry.append((i, (orf_id, plate, well)))
+        if yeast_ad_position:
+            yeast_ad.append((i, (orf_id, plate, well, 'AD')))
+        if yeast_db_position:
+            yeast_db.append((i, (orf_id, plate, well, 'DB')))
+        sources.append((i, (orf_id, source_name, source_details, submission_date)))
+    
+    yeast_sql = "INSERT INTO yeast_orf_position (orf_id, plate, well, position_type) VALUES (?, ?, ?, ?)"
+    return {
+        'entry': insert_rows(c, "INSERT INTO orf_position (orf_id, plate, well) VALUES (?, ?, ?)",
+                             entry, errors, 'Entry position'),
+        'yeast_ad': insert_rows(c, yeast_sql, yeast_ad, errors, 'Yeast AD position'),
+        'yeast_db': insert_rows(c, yeast_sql, yeast_db, errors, 'Yeast DB position'),
+        'source': insert_rows(c, "INSERT INTO orf_sources (orf_id, source_name, source_details, submission_date) "
+                                 "VALUES (?, ?, ?, ?)", sources, errors, 'Source information'),
+    }
 
 def import_unified_positions(csv_path, dry_run=True, validate_orfs=True):
     """
@@ -63,202 +206,61 @@ def import_unified_positions(csv_path, dry_run=True, validate_orfs=True):
             print("Run the migrations/update_yeast_orf_position.py script first")
             return False
         
-        # Read the CSV file
-        with open(csv_path, 'r') as f:
-            reader = csv.reader(f)
-            
-            # Get the header row
-            try:
-                header = next(reader)
-            except StopIteration:
-                print("Error: CSV file is empty")
-                return False
-            
-            # Check if the header has the expected columns
-            expected_columns = [
-                'orf_id', 'plate', 'well', 
-                'entry_position', 'yeast_ad_position', 'yeast_db_position',
-                'source_name', 'source_details'
-            ]
-            
-            # Check if all required columns are present (case-insensitive)
-            header_lower = [col.lower() for col in header]
-            missing_columns = [col for col in expected_columns if col.lower() not in header_lower]
-            
-            if missing_columns:
-                print(f"Error: CSV file is missing required columns: {', '.join(missing_columns)}")
-                print(f"Expected columns: {', '.join(expected_columns)}")
-                print(f"Found columns: {', '.join(header)}")
+        # ORF IDs are checked against a set loaded once, not a query per row
+        orf_ids = load_orf_ids(c) if validate_orfs else None
+        parsed = parse_unified_positions(csv_path, orf_ids)
+        if parsed['error']:
+            print(f"Error: {parsed['error']}")
+            return False
+        
+        for warning in parsed['warnings']:
+            print(f"Warning: {warning}")
+        
+        valid_rows = parsed['valid_rows']
+        invalid_rows = parsed['invalid_rows']
+        errors = parsed['errors']
+        
+        # Insert the data if not a dry run
+        inserted_rows = {'entry': 0, 'yeast_ad': 0, 'yeast_db': 0, 'source': 0}
+        if not dry_run:
+            inserted_rows = write_unified_positions(c, parsed['rows'], errors)
+        
+        # Summary
+        print(f"\nSummary:")
+        print(f"  Valid rows: {valid_rows}")
+        print(f"  Invalid rows: {invalid_rows}")
+        if not dry_run:
+            print(f"  Inserted rows:")
+            print(f"    Entry positions: {inserted_rows['entry']}")
+            print(f"    Yeast AD positions: {inserted_rows['yeast_ad']}")
+            print(f"    Yeast DB positions: {inserted_rows['yeast_db']}")
+            print(f"    Source attributions: {inserted_rows['source']}")
+        
+        if errors:
+            print(f"\nErrors ({len(errors)}):")
+            for error in errors[:10]:  # Show only the first 10 errors
+                print(f"  {error}")
+            if len(errors) > 10:
+                print(f"  ... and {len(errors) - 10} more errors")
+        
+        # Commit the transaction if not a dry run
+        if not dry_run:
+            if sum(inserted_rows.values()) > 0:
+                c.execute('COMMIT')
+                print("\nSuccessfully imported unified positions")
+                return True
+            else:
+                c.execute('ROLLBACK')
+                print("\nNo valid rows to import, rolling back")
                 return False
-            
-            # Get the column indices
-            orf_id_idx = header_lower.index('orf_id')
-            plate_idx = header_lower.index('plate')
-            well_idx = header_lower.index('well')
-            entry_position_idx = header_lower.index('entry_position')
-            yeast_ad_position_idx = header_lower.index('yeast_ad_position')
-            yeast_db_position_idx = header_lower.index('yeast_db_position')
-            source_name_idx = header_lower.index('source_name')
-            source_details_idx = header_lower.index('source_details')
-            
-            # Process the data rows
-            valid_rows = 0
-            invalid_rows = 0
-            inserted_rows = {
-                'entry': 0,
-                'yeast_ad': 0,
-                'yeast_db': 0,
-                'source': 0
-            }
-            errors = []
-            
-            for i, row in enumerate(reader, start=2):  # Start from 2 to account for header row
-                if len(row) < len(header):
-                    print(f"Warning: Row {i} has fewer columns than header, skipping")
-                    invalid_rows += 1
-                    continue
-                
-                orf_id = row[orf_id_idx].strip()
-                plate = row[plate_idx].strip()
-                well = row[well_idx].strip()
-                
-                # Parse position flags (Yes/No/True/False)
-                def parse_boolean(value):
-                    if not value:
-                        return False
-                    value = value.strip().lower()
-                    return value in ['yes', 'true', '1', 'y', 't']
-                
-                entry_position = parse_boolean(row[entry_position_idx])
-                yeast_ad_position = parse_boolean(row[yeast_ad_position_idx])
-                yeast_db_position = parse_boolean(row[yeast_db_position_idx])
-                
-                # Get source information
-                source_name = row[source_name_idx].strip()
-                source_details = row[source_details_idx].strip()
-                
-                # Skip empty rows
-                if not orf_id or not plate or not well:
-                    print(f"Warning: Row {i} has empty required fields, skipping")
-                    invalid_rows += 1
-                    continue
-                
-                # Skip rows with no positions
-                if not (entry_position or yeast_ad_position or yeast_db_position):
-                    print(f"Warning: Row {i} has no positions enabled, skipping")
-                    invalid_rows += 1
-                    continue
-                
-                # Skip rows with no source information
-                if not source_name:
-                    print(f"Warning: Row {i} has no source name, skipping")
-                    invalid_rows += 1
-                    continue
-                
-                # Validate ORF ID if requested
-                if validate_orfs:
-                    c.execute("SELECT 1 FROM orf_sequence WHERE orf_id = ?", (orf_id,))
-                    if not c.fetchone():
-                        print(f"Warning: Row {i} has unknown ORF ID '{orf_id}', skipping")
-                        errors.append(f"Row {i}: Unknown ORF ID '{orf_id}'")
-                        invalid_rows += 1
-                        continue
-                
-                valid_rows += 1
-                
-                # Insert the data if not a dry run
-                if not dry_run:
-                    try:
-                        # 1. Insert entry position if enabled
-                        if entry_position:
-                            try:
-                                c.execute(
-                                    "INSERT INTO orf_position (orf_id, plate, well) VALUES (?, ?, ?)",
-                                    (orf_id, plate, well)
-                                )
-                                inserted_rows['entry'] += 1
-                            except sqlite3.Error as e:
-                                print(f"Warning: Failed to insert entry position in row {i}: {e}")
-                                errors.append(f"Row {i}: Entry position error: {e}")
-                        
-                        # 2. Insert yeast AD position if enabled
-                        if yeast_ad_position:
-                            try:
-                                c.execute(
-                                    "INSERT INTO yeast_orf_position (orf_id, plate, well, position_type) VALUES (?, ?, ?, ?)",
-                                    (orf_id, plate, well, 'AD')
-                                )
-                                inserted_rows['yeast_ad'] += 1
-                            except sqlite3.Error as e:
-                                print(f"Warning: Failed to insert yeast AD position in row {i}: {e}")
-                                errors.append(f"Row {i}: Yeast AD position error: {e}")
-                        
-                        # 3. Insert yeast DB position if enabled
-                        if yeast_db_position:
-                            try:
-                                c.execute(
-                                    "INSERT INTO yeast_orf_position (orf_id, plate, well, position_type) VALUES (?, ?, ?, ?)",
-                                    (orf_id, plate, well, 'DB')
-                                )
-                                inserted_rows['yeast_db'] += 1
-                            except sqlite3.Error as e:
-                                print(f"Warning: Failed to insert yeast DB position in row {i}: {e}")
-                                errors.append(f"Row {i}: Yeast DB position error: {e}")
-                        
-                        # 4. Insert the source information
-                        try:
-                            submission_date = datetime.now().strftime("%Y-%m-%d")
-                            c.execute(
-                                "INSERT INTO orf_sources (orf_id, source_name, source_details, submission_date) VALUES (?, ?, ?, ?)",
-                                (orf_id, source_name, source_details, submission_date)
-                            )
-                            inserted_rows['source'] += 1
-                        except sqlite3.Error as e:
-                            print(f"Warning: Failed to insert source information in row {i}: {e}")
-                            errors.append(f"Row {i}: Source information error: {e}")
-                    
-                    except Exception as e:
-                        print(f"Error processing row {i}: {e}")
-                        errors.append(f"Row {i}: {e}")
-                        invalid_rows += 1
-                        continue
-            
-            # Summary
-            print(f"\nSummary:")
-            print(f"  Valid rows: {valid_rows}")
-            print(f"  Invalid rows: {invalid_rows}")
-            if not dry_run:
-                print(f"  Inserted rows:")
-                print(f"    Entry positions: {inserted_rows['entry']}")
-                print(f"    Yeast AD positions: {inserted_rows['yeast_ad']}")
-                print(f"    Yeast DB positions: {inserted_rows['yeast_db']}")
-                print(f"    Source attributions: {inserted_rows['source']}")
-            
-            if errors:
-                print(f"\nErrors ({len(errors)}):")
-                for error in errors[:10]:  # Show only the first 10 errors
-                    print(f"  {error}")
-                if len(errors) > 10:
-                    print(f"  ... and {len(errors) - 10} more errors")
-            
-            # Commit the transaction if not a dry run
-            if not dry_run:
-                if sum(inserted_rows.values()) > 0:
-                    c.execute('COMMIT')
-                    print("\nSuccessfully imported unified positions")
-                    return True
-                else:
-                    c.execute('ROLLBACK')
-                    print("\nNo valid rows to import, rolling back")
-                    return False
+        else:
+            print("\nDry run completed, no changes made to the database")
+            if valid_rows > 0:
+                print(f"Would have imported {valid_rows} rows")
+                return True
             else:
-                print("\nDry run completed, no changes made to the database")
-                if valid_rows > 0:
-                    print(f"Would have imported {valid_rows} rows")
-                    return True
-                else:
-                    print("No valid rows to import")
-                    return False
+                print("No valid rows to import")
+                return False
     
     except Exception as e:
         # Roll back the transaction if not a dry run
@@ -0,0 +1,51 @@
+"""
+Helpers shared by the position import scripts (import_yeast_positions.py,
+import_unified_positions.py and import_position_files.py).
+
+ORF IDs are checked against a set loaded once, instead of a query per row,
+and parsed rows are written with executemany. A batch that fails is written
+again row by row, so every bad row still gets its own error message.
+"""
+
+import sqlite3
+
+from setup_db import orf_metadata_table_name
+
+def load_orf_ids(c):
+    """The set of every ORF ID in the database"""
+    c.execute(f'SELECT orf_id FROM {orf_metadata_table_name(c)}')
+    return {row[0] for row in c.fetchall()}
+
+def insert_rows(c, sql, rows, errors, label):
+    """
+    Insert parsed rows.
+
+    Args:
+        c: Cursor of the writing connection
+        sql (str): INSERT statement
+        rows (list): (row_number, params) tuples
+        errors (list): Error messages of rows that fail are appended here
+        label (str): What a row is, for the error messages
+
+    Returns:
+        int: Rows inserted
+    """
+    if not rows:
+        return 0
+    c.execute('SAVEPOINT insert_rows')
+    try:
+        c.executemany(sql, [params for _, params in rows])
+        c.execute('RELEASE SAVEPOINT insert_rows')
+        return len(rows)
+    except sqlite3.Error:
+        c.execute('ROLLBACK TO SAVEPOINT insert_rows')
+        c.execute('RELEASE SAVEPOINT insert_rows')
+
+    inserted = 0
+    for row_number, params in rows:
+        try:
+            c.execute(sql, params)
+            inserted += 1
+        except sqlite3.Error as e:
+            errors.append(f"Row {row_number}: {label} error: {e}")
+    return inserted
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+"""
+Test script for importing uploads as they arrive and resuming import runs.
+
+A unified CSV file and a FASTA file are posted to /import_file, which parses
+them while they upload (see app/upload_stream.py), and a failed run is
+resumed through /api/import_runs/<run_id>/resume. Neither path has a saved
+file to pass to run_import. Everything runs in this process against a
+throwaway database; the script exits with status 1 if a check fails.
+"""
+
+import io
+import os
+import sys
+import sqlite3
+import tempfile
+
+# Add parent directory to path so we can import the application
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TMP_DIR = tempfile.mkdtemp()
+
+# The application opens the database named by get_db_path when it is imported
+import config
+config.get_db_path = lambda: os.path.join(TMP_DIR, 'reagent_db.sqlite')
+
+from setup_db import init_db
+init_db()
+
+from app import app, DB_PATH
+from app.import_runs import start_run, finish_run, release_run, get_run
+
+CSV_ROWS = b'orf_id,orf_name,orf_sequence,source_name\nUPLOAD1,upload one,ATGAAATAA,test\nUPLOAD2,upload two,ATGCCCTAG,test\n'
+FASTA_RECORDS = b'>FASTA1 first\nATGAAATAA\n>FASTA2 second\nATGCCCTAG\n'
+RESUME_ROWS = b'orf_id,orf_name,orf_sequence,source_name\nRESUME1,resume one,ATGAAATAA,test\n'
+
+def check(name, passed, detail=''):
+    print(f"{'✅' if passed else '❌'} {name}{': ' + detail if detail and not passed else ''}")
+    return passed
+
+def orf_ids():
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        return {row[0] for row in conn.execute('SELECT orf_id FROM orf_sequence')}
+    finally:
+        conn.close()
+
+def upload(client, filename, content, import_type):
+    response = client.post('/import_file', content_type='multipart/form-data', data={
+        'import_type': import_type,
+        'wait': '1',
+        'file': (io.BytesIO(content), filename),
+    })
+    return response.get_json()
+
+def check_streamed_uploads(client):
+    result = upload(client, 'streamed.csv', CSV_ROWS, 'unified_position')
+    passed = check('Streamed CSV upload imported', result['success'], result['message'])
+    passed &= check('Streamed CSV rows saved', {'UPLOAD1', 'UPLOAD2'} <= orf_ids())
+
+    result = upload(client, 'streamed.fasta', FASTA_RECORDS, 'fasta')
+    passed &= check('Streamed FASTA upload imported', result['success'], result['message'])
+    passed &= check('Streamed FASTA records saved', {'FASTA1', 'FASTA2'} <= orf_ids())
+    return passed
+
+def check_resume(client):
+    # A run that failed before committing anything
+    file_path = os.path.join(TMP_DIR, 'resume.csv')
+    with open(file_path, 'wb') as f:
+        f.write(RESUME_ROWS)
+    run = start_run('unified_position', 'resume.csv', file_path)
+    finish_run(run, 'failed', 'Error during import: test')
+    release_run(run)
+
+    response = client.post(f"/api/import_runs/{run['run_id']}/resume", data={'wait': '1'})
+    result = response.get_json()
+    passed = check('Failed run resumed', result['success'], result['message'])
+    passed &= check('Resumed run completed', get_run(run['run_id'])['status'] == 'completed')
+    passed &= check('Resumed rows saved', 'RESUME1' in orf_ids())
+    return passed
+
+def main():
+    client = app.test_client()
+    passed = check_streamed_uploads(client)
+    passed &= check_resume(client)
+    return 0 if passed else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
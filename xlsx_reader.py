@@ -0,0 +1,233 @@
+"""
+Streaming reads of Excel (.xlsx) import files.
+
+pd.read_excel loads a whole workbook into memory before the first row can be
+imported. Here openpyxl's read-only mode parses the sheet XML as rows are
+requested instead, and rows are handed on as DataFrame chunks with every cell
+as text, the same chunks the CSV reader produces (see
+app/unified_import.unified_csv_chunks). Apart from the workbook's shared
+string table, which openpyxl always loads whole, memory then depends on the
+chunk size rather than the size of the workbook.
+
+A workbook with several sheets to import has each sheet read by its own worker
+process, a few chunks ahead of the import, so the sheets are parsed in
+parallel while the import writes them in workbook order.
+
+This module only needs pandas and openpyxl, so worker processes start without
+loading the application.
+"""
+
+import queue
+import multiprocessing
+from datetime import datetime, date, time
+
+import pandas as pd
+from openpyxl import load_workbook
+
+# Chunks a sheet worker reads ahead of the import
+READ_AHEAD_CHUNKS = 2
+
+# Seconds between checks that a sheet worker is still alive while waiting
+# for its next chunk
+WORKER_POLL_SECONDS = 1
+
+# Keys of DataFrame.attrs giving the name and the position among the sheets
+# read of the sheet a chunk of a multi-sheet workbook came from, so errors can
+# say which sheet their row numbers count in and be listed in sheet order
+SHEET_ATTR = 'sheet'
+SHEET_INDEX_ATTR = 'sheet_index'
+
+# Value of empty cells, as read_csv gives them
+MISSING = float('nan')
+
+def cell_text(value):
+    """A cell's value as text, MISSING for empty cells"""
+    if value is None or value == '':
+        return MISSING
+    if isinstance(value, datetime):
+        # Dates without a time read as the date alone, as they are displayed
+        return value.date().isoformat() if value.time() == time() else value.isoformat(sep=' ')
+    if isinstance(value, (date, time)):
+        return value.isoformat()
+    return str(value)
+
+def sheet_headers(file_path):
+    """
+    The header row of every sheet of a workbook.
+
+    Returns:
+        dict: Sheet name -> column names in sheet order; unnamed columns are
+        called "Unnamed: N" as pandas calls them
+    """
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        headers = {}
+        for sheet in workbook.worksheets:
+            header = next(sheet.iter_rows(max_row=1, values_only=True), ())
+            # Trailing empty header cells are formatting, not columns
+            while header and header[-1] is None:
+                header = header[:-1]
+            headers[sheet.title] = [f'Unnamed: {position}' if name is None else str(name)
+                                    for position, name in enumerate(header)]
+        return headers
+    finally:
+        workbook.close()
+
+def _frame(rows, row_numbers, columns):
+    return pd.DataFrame(rows, columns=columns, index=pd.Index([row_number - 2 for row_number in row_numbers]),
+                        dtype=object)
+
+def read_sheet_chunks(file_path, sheet_name, columns, chunk_size, skip_rows=0):
+    """
+    Read a sheet in chunks, every cell as text.
+
+    Args:
+        file_path (str): Path to the .xlsx file
+        sheet_name (str): Sheet to read; its first row is the header
+        columns (list): Column names to give the chunks, one per header cell
+        chunk_size (int): Rows per chunk
+        skip_rows (int): Data rows to skip, e.g. those a resumed import has
+            already committed
+
+    Yields:
+        DataFrame: Consecutive chunks, indexed by sheet row number - 2 like
+        CSV chunks. Empty rows at the end of the sheet are left out; empty
+        rows between others are kept, so rows keep their sheet numbers
+    """
+    width = len(columns)
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        sheet = workbook[sheet_name]
+        rows, row_numbers, empty = [], [], []
+        first_row = 2 + skip_rows
+        for row_number, values in enumerate(sheet.iter_rows(min_row=first_row, max_col=width, values_only=True),
+                                            start=first_row):
+            cells = [cell_text(value) for value in values]
+            cells += [MISSING] * (width - len(cells))
+            if all(cell is MISSING for cell in cells):
+                empty.append((row_number, cells))
+                continue
+            # Empty rows only count once a row with values follows them
+            for empty_number, empty_cells in empty:
+                row_numbers.append(empty_number)
+                rows.append(empty_cells)
+            empty = []
+            row_numbers.append(row_number)
+            rows.append(cells)
+            if len(rows) >= chunk_size:
+                yield _frame(rows, row_numbers, columns)
+                rows, row_numbers = [], []
+        if rows:
+            yield _frame(rows, row_numbers, columns)
+    finally:
+        workbook.close()
+
+def _read_sheet_worker(results, file_path, sheet_name, columns, chunk_size):
+    """Worker process: put a sheet's chunks on the queue, then None (or the error message)"""
+    try:
+        for chunk in read_sheet_chunks(file_path, sheet_name, columns, chunk_size):
+            results.put(chunk)
+        results.put(None)
+    except Exception as e:
+        results.put(f'Error reading sheet {sheet_name}: {str(e)}')
+
+def _next_result(process, results, sheet_name):
+    """
+    The next chunk, None or error message a sheet worker put on its queue.
+
+    Raises:
+        ValueError: The worker exited without finishing, e.g. killed for
+        running out of memory
+    """
+    while True:
+        try:
+            return results.get(timeout=WORKER_POLL_SECONDS)
+        except queue.Empty:
+            if process.exitcode is None:
+                continue
+        # A worker flushes its queue before it exits, so whatever it put
+        # is readable by now
+        try:
+            return results.get(timeout=WORKER_POLL_SECONDS)
+        except queue.Empty:
+            raise ValueError(f'Error reading sheet {sheet_name}: the worker reading it exited '
+                             f'unexpectedly (exit code {process.exitcode})')
+
+def _tag(chunk, sheet_name, position):
+    """Name the sheet of a chunk in its attrs (see SHEET_ATTR)"""
+    chunk.attrs[SHEET_ATTR] = sheet_name
+    chunk.attrs[SHEET_INDEX_ATTR] = position
+    return chunk
+
+def _skip(chunks, skip_rows):
+    """Leave the first skip_rows rows out of a chunk stream"""
+    for chunk in chunks:
+        if skip_rows >= len(chunk):
+            skip_rows -= len(chunk)
+            continue
+        yield chunk.iloc[skip_rows:]
+        skip_rows = 0
+
+def _parallel_chunks(file_path, sheets, chunk_size, workers):
+    context = multiprocessing.get_context('spawn')
+    started = []
+
+    def start(position):
+        sheet_name, columns = sheets[position]
+        results = context.Queue(maxsize=READ_AHEAD_CHUNKS)
+        process = context.Process(target=_read_sheet_worker,
+                                  args=(results, file_path, sheet_name, columns, chunk_size), daemon=True)
+        process.start()
+        started.append((process, results))
+
+    try:
+        for position in range(min(workers, len(sheets))):
+            start(position)
+        for position in range(len(sheets)):
+            process, results = started[position]
+            sheet_name = sheets[position][0]
+            while True:
+                chunk = _next_result(process, results, sheet_name)
+                if chunk is None:
+                    break
+                if isinstance(chunk, str):
+                    raise ValueError(chunk)
+                yield _tag(chunk, sheet_name, position)
+            process.join()
+            # Keep `workers` sheets in flight
+            if len(started) < len(sheets):
+                start(len(started))
+    finally:
+        # Stop the workers of an import that ended early
+        for process, _ in started:
+            if process.is_alive():
+                process.terminate()
+
+def workbook_chunks(file_path, sheets, chunk_size, skip_rows=0, workers=1):
+    """
+    Read the sheets of a workbook in chunks, one sheet after another.
+
+    Args:
+        file_path (str): Path to the .xlsx file
+        sheets (list): (sheet name, column names) of the sheets to read, in order
+        chunk_size (int): Rows per chunk
+        skip_rows (int): Data rows to skip, counted across the sheets
+        workers (int): Worker processes reading sheets at the same time; a
+            single sheet, or one worker, is read in this process
+
+    Yields:
+        DataFrame: Chunks of each sheet in turn (see read_sheet_chunks); a
+        chunk never spans two sheets. With several sheets, each chunk names
+        its sheet in attrs[SHEET_ATTR] and attrs[SHEET_INDEX_ATTR]
+    """
+    if len(sheets) == 1:
+        sheet_name, columns = sheets[0]
+        yield from read_sheet_chunks(file_path, sheet_name, columns, chunk_size, skip_rows)
+        return
+
+    if workers > 1:
+        chunks = _parallel_chunks(file_path, sheets, chunk_size, workers)
+    else:
+        chunks = (_tag(chunk, sheet_name, position) for position, (sheet_name, columns) in enumerate(sheets)
+                  for chunk in read_sheet_chunks(file_path, sheet_name, columns, chunk_size))
+    yield from _skip(chunks, skip_rows)